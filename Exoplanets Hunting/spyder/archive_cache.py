@@ -0,0 +1,188 @@
+# archive_cache.py
+# Ayrıştırılmış arşiv tabloları için içerik adresli, ikili sütunlu önbellek
+
+import hashlib
+import json
+import os
+import pandas as pd
+from nasa_archive import ArchiveSchema, read_nasa_archive
+
+# Optional pyarrow import (Feather için; yoksa pickle kullanılır)
+try:
+    import pyarrow  # noqa: F401
+    has_pyarrow = True
+except Exception:
+    has_pyarrow = False
+
+# Okuyucu ayrıştırma davranışı değişince artır: eski girdiler otomatik geçersiz olur
+READER_VERSION = 1
+
+CACHE_DIR = ".archive_cache"
+MAX_CACHE_BYTES = 2 * 1024 ** 3  # 2 GB
+INDEX_FILE = "index.json"
+ENTRY_SUFFIXES = (".feather", ".pkl", ".schema.json")
+
+
+def _atomic_write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def file_content_hash(path, cache_dir=CACHE_DIR):
+    """
+    Dosya içeriğinin SHA-1 özeti.
+    Boyut ve mtime değişmediyse önceki özet index.json'dan okunur (dosya yeniden okunmaz).
+    """
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    index = _read_index(cache_dir)
+    known = index.get(abs_path)
+    if known and known["size"] == st.st_size and known["mtime_ns"] == st.st_mtime_ns:
+        return known["sha1"]
+
+    digest = hashlib.sha1()
+    with open(abs_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    sha1 = digest.hexdigest()
+
+    os.makedirs(cache_dir, exist_ok=True)
+    index = _read_index(cache_dir)
+    index[abs_path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": sha1}
+    _atomic_write_json(os.path.join(cache_dir, INDEX_FILE), index)
+    return sha1
+
+
+def _options_key(options):
+    text = f"{READER_VERSION}|{sorted((k, repr(v)) for k, v in options.items())}"
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def _entry_paths(cache_dir, path, content_hash, options):
+    stem = f"{os.path.basename(path)}.{content_hash[:16]}.{_options_key(options)}"
+    return {
+        "feather": os.path.join(cache_dir, stem + ".feather"),
+        "pickle": os.path.join(cache_dir, stem + ".pkl"),
+        "schema": os.path.join(cache_dir, stem + ".schema.json"),
+    }
+
+
+def _write_frame(df, entry):
+    """Önce Feather dene, sütun tipleri uygun değilse pickle'a düş"""
+    if has_pyarrow:
+        tmp_path = f"{entry['feather']}.{os.getpid()}.tmp"
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, entry["feather"])
+            return entry["feather"]
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    tmp_path = f"{entry['pickle']}.{os.getpid()}.tmp"
+    df.to_pickle(tmp_path)
+    os.replace(tmp_path, entry["pickle"])
+    return entry["pickle"]
+
+
+def _read_frame(entry):
+    if has_pyarrow and os.path.exists(entry["feather"]):
+        return entry["feather"], pd.read_feather(entry["feather"])
+    if os.path.exists(entry["pickle"]):
+        return entry["pickle"], pd.read_pickle(entry["pickle"])
+    return None, None
+
+
+def _parse_entry_name(name):
+    """'<kaynak>.<içerik özeti>.<seçenek anahtarı>.<uzantı>' -> (kaynak, içerik özeti)"""
+    for suffix in ENTRY_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    source, content_hash, _ = name.rsplit(".", 2)
+    return source, content_hash
+
+
+def evict_stale_entries(cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, keep=()):
+    """
+    Önbelleği temizle:
+      1) Aynı kaynak dosyanın eski içerik özetine ait girdileri sil
+      2) Toplam boyut max_bytes'ı aşarsa en uzun süredir kullanılmayanları sil
+    """
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(ENTRY_SUFFIXES):
+            continue
+        full = os.path.join(cache_dir, name)
+        st = os.stat(full)
+        entries.append((full, name, st.st_size, st.st_mtime))
+
+    current = {}
+    for full in keep:
+        source, content_hash = _parse_entry_name(os.path.basename(full))
+        current[source] = content_hash
+
+    removed = []
+    for full, name, size, mtime in entries:
+        source, content_hash = _parse_entry_name(name)
+        if source in current and current[source] != content_hash:
+            os.remove(full)
+            removed.append(full)
+
+    remaining = sorted((e for e in entries if e[0] not in removed), key=lambda e: e[3])
+    total = sum(e[2] for e in remaining)
+    protected = set(keep)
+    for full, name, size, mtime in remaining:
+        if total <= max_bytes:
+            break
+        if full in protected:
+            continue
+        os.remove(full)
+        removed.append(full)
+        total -= size
+
+    return removed
+
+
+def load_archive_table(path, use_cache=True, cache_dir=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, **read_csv_kwargs):
+    """
+    read_nasa_archive'ın önbellekli hali.
+    Anahtar: dosya içerik özeti + READER_VERSION + okuma seçenekleri.
+    (df, ArchiveSchema) döndürür.
+    """
+    if not use_cache:
+        return read_nasa_archive(path, **read_csv_kwargs)
+
+    content_hash = file_content_hash(path, cache_dir=cache_dir)
+    entry = _entry_paths(cache_dir, path, content_hash, read_csv_kwargs)
+
+    frame_path, df = _read_frame(entry)
+    if df is not None and os.path.exists(entry["schema"]):
+        with open(entry["schema"], 'r', encoding='utf-8') as f:
+            schema = ArchiveSchema.from_dict(json.load(f))
+        # LRU tahliyesi için son kullanım zamanını güncelle
+        os.utime(frame_path)
+        os.utime(entry["schema"])
+        print(f"  ⚡ Cache hit: {os.path.basename(frame_path)}")
+        return df, schema
+
+    df, schema = read_nasa_archive(path, **read_csv_kwargs)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    frame_path = _write_frame(df, entry)
+    _atomic_write_json(entry["schema"], schema.to_dict())
+    evict_stale_entries(cache_dir, max_bytes=max_bytes, keep=(frame_path, entry["schema"]))
+    return df, schema
@@ -0,0 +1,345 @@
+# benchmark_pipeline.py
+# Eğitim hattının ölçeklenme testi: sentetik KOI/TOI/K2 katalogları (10k - 10M satır) üzerinde
+# build_combined_dataset / add_derived_features / preprocess_and_split / evaluate_models için süre, tepe RSS
+# ve model verimi
+#
+# Kullanım:
+#   python benchmark_pipeline.py --sizes 10000 100000 --output benchmark_results.json
+#   python benchmark_pipeline.py --compare benchmark_baseline.json --threshold 0.2
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+from exoplanet_tabular_pipeline import build_combined_dataset, preprocess_and_split, evaluate_models
+from derived_features import add_derived_features
+from pipeline_profiler import StageMeter, has_psutil
+
+SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+DEFAULT_OUTPUT = "benchmark_results.json"
+REGRESSION_THRESHOLD = 0.20   # %20'den fazla kötüleşme regresyon sayılır
+GENERATE_CHUNK_ROWS = 500_000
+
+# Görev payları gerçek arşiv dökümlerindeki oranlara yakın
+MISSION_SHARES = {"KOI": 0.45, "TOI": 0.36, "K2": 0.19}
+
+# Görev başına sütun adları, etiket dağılımı ve sütun başına eksik değer oranı
+# (arşiv dökümlerindeki eksiklik desenine yakın: K2'de yıldız yoğunluğu/insolasyon çoğunlukla boş,
+#  TOI'de ror / srho / SNR sütunu hiç yok)
+MISSION_LAYOUT = {
+    "KOI": {
+        "id": "kepoi_name",
+        "label": "koi_disposition",
+        "labels": {"CONFIRMED": 0.29, "CANDIDATE": 0.20, "FALSE POSITIVE": 0.51},
+        "columns": {
+            "period": ("koi_period", 0.00), "duration": ("koi_duration", 0.00), "depth": ("koi_depth", 0.04),
+            "ror": ("koi_ror", 0.04), "prad": ("koi_prad", 0.04), "srad": ("koi_srad", 0.04),
+            "srho": ("koi_srho", 0.04), "kepmag": ("koi_kepmag", 0.00), "model_snr": ("koi_model_snr", 0.04),
+            "insol": ("koi_insol", 0.04), "teq": ("koi_teq", 0.04),
+        },
+    },
+    "TOI": {
+        "id": "toi",
+        "label": "tfopwg_disp",
+        "labels": {"PC": 0.60, "FP": 0.16, "CP": 0.09, "KP": 0.08, "FA": 0.02, "APC": 0.05},
+        "columns": {
+            "period": ("pl_orbper", 0.01), "duration": ("pl_trandurh", 0.00), "depth": ("pl_trandep", 0.00),
+            "prad": ("pl_rade", 0.07), "srad": ("st_rad", 0.07), "kepmag": ("st_tmag", 0.00),
+            "insol": ("pl_insol", 0.02), "teq": ("pl_eqt", 0.04),
+        },
+    },
+    "K2": {
+        "id": "pl_name",
+        "label": "disposition",
+        "labels": {"CONFIRMED": 0.50, "CANDIDATE": 0.36, "FALSE POSITIVE": 0.14},
+        "columns": {
+            "period": ("pl_orbper", 0.02), "duration": ("pl_trandur", 0.40), "depth": ("pl_trandep", 0.40),
+            "ror": ("pl_ratror", 0.45), "prad": ("pl_rade", 0.10), "srad": ("st_rad", 0.08),
+            "srho": ("st_dens", 0.60), "kepmag": ("st_kepmag", 0.05), "insol": ("pl_insol", 0.60),
+            "teq": ("pl_eqt", 0.55),
+        },
+    },
+}
+
+POSITIVE_SYNTHETIC_LABELS = {"CONFIRMED", "CANDIDATE", "PC", "CP", "KP", "APC"}
+
+
+# ---------------------------
+# Sentetik katalog üretimi
+# ---------------------------
+def _synthetic_features(rng, n, positive):
+    """Kavram başına fiziksel olarak makul dağılımlar; gezegenler ile yanlış pozitifler kısmen ayrışır"""
+    period = np.exp(rng.normal(2.3, 1.2, n))
+    srad = np.exp(rng.normal(0.0, 0.3, n))
+    ror = np.where(positive, np.exp(rng.normal(-3.7, 0.6, n)), np.exp(rng.normal(-2.6, 1.0, n)))
+    depth = ror ** 2 * 1e6 * rng.uniform(0.8, 1.2, n)
+    teq = 280 * (period / 365.25) ** (-1 / 3) * srad ** 0.5 * rng.uniform(0.9, 1.1, n)
+    return {
+        "period": period,
+        "duration": 13 * (period / 365.25) ** (1 / 3) * srad * rng.uniform(0.5, 1.2, n),
+        "depth": depth,
+        "ror": ror,
+        "prad": ror * srad * 109.1,
+        "srad": srad,
+        "srho": np.exp(rng.normal(0.3, 0.8, n)),
+        "kepmag": rng.normal(14.3, 1.4, n),
+        "model_snr": np.where(positive, np.exp(rng.normal(3.3, 0.9, n)), np.exp(rng.normal(3.0, 1.4, n))),
+        "insol": (teq / 255.0) ** 4,
+        "teq": teq,
+    }
+
+
+def _mission_chunk(rng, mission, start, n):
+    layout = MISSION_LAYOUT[mission]
+    names = list(layout["labels"])
+    labels = rng.choice(names, size=n, p=list(layout["labels"].values()))
+    positive = np.isin(labels, list(POSITIVE_SYNTHETIC_LABELS))
+    values = _synthetic_features(rng, n, positive)
+
+    chunk = {layout["id"]: [f"{mission}-{i:08d}.01" for i in range(start, start + n)]}
+    for concept, (column, missing_rate) in layout["columns"].items():
+        col = values[concept].astype(np.float32)
+        col[rng.random(n) < missing_rate] = np.nan
+        chunk[column] = col
+    chunk[layout["label"]] = labels
+    chunk["ra"] = rng.uniform(0, 360, n)
+    chunk["dec"] = np.degrees(np.arcsin(rng.uniform(-1, 1, n)))
+    return pd.DataFrame(chunk)
+
+
+def generate_synthetic_catalogs(n_rows, out_dir, random_state=42):
+    """
+    Toplam n_rows satırı görev paylarına göre bölüp NASA arşiv biçiminde ('#' önsözlü) CSV'ler yaz.
+    Büyük boyutlar parça parça yazılır; bellek kullanımı GENERATE_CHUNK_ROWS ile sınırlıdır.
+    {görev: dosya yolu} döndürür.
+    """
+    rng = np.random.default_rng(random_state)
+    paths = {}
+    for mission, share in MISSION_SHARES.items():
+        n_mission = max(1, int(round(n_rows * share)))
+        path = os.path.join(out_dir, f"synthetic_{mission.lower()}_{n_rows}.csv")
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(f"# This file was produced by benchmark_pipeline.py ({mission}, {n_mission} rows)\n")
+            for column, _ in MISSION_LAYOUT[mission]["columns"].values():
+                f.write(f"# COLUMN {column}: synthetic\n")
+            for start in range(0, n_mission, GENERATE_CHUNK_ROWS):
+                chunk = _mission_chunk(rng, mission, start, min(GENERATE_CHUNK_ROWS, n_mission - start))
+                chunk.to_csv(f, index=False, header=(start == 0))
+        paths[mission] = path
+    return paths
+
+
+# ---------------------------
+# Ölçüm
+# ---------------------------
+@contextlib.contextmanager
+def _quiet(enabled):
+    """Hattın ayrıntılı çıktısını (sınıflandırma raporları vb.) bastır"""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+# ---------------------------
+# Benchmark
+# ---------------------------
+def benchmark_size(n_rows, work_dir, fit_sample=None, n_jobs=-1, use_xgb=None, verbose=False,
+                   random_state=42):
+    """Tek bir katalog boyutu için tüm aşamaları ölç"""
+    print(f"\n⏱️ BENCHMARK: {n_rows:,} rows")
+    stages = {}
+
+    with StageMeter() as meter:
+        paths = generate_synthetic_catalogs(n_rows, work_dir, random_state)
+    stages["generate"] = meter.result
+    stages["generate"]["csv_mb"] = sum(os.path.getsize(p) for p in paths.values()) / 1024 ** 2
+
+    with StageMeter() as meter, _quiet(not verbose):
+        X_all, y_all = build_combined_dataset(koi_path=paths["KOI"], toi_path=paths["TOI"], k2_path=paths["K2"],
+                                              n_jobs=n_jobs)
+    stages["build_combined_dataset"] = meter.result
+
+    with StageMeter() as meter, _quiet(not verbose):
+        X_all = add_derived_features(X_all, cache_dir=None)
+    stages["add_derived_features"] = meter.result
+
+    with StageMeter() as meter, _quiet(not verbose):
+        X_train, X_test, y_train, y_test = preprocess_and_split(X_all, y_all, test_size=0.2,
+                                                                random_state=random_state)
+    stages["preprocess_and_split"] = meter.result
+
+    # Çok büyük boyutlarda model eğitimi isteğe bağlı olarak alt örneklemde ölçülür
+    if fit_sample and len(X_train) > fit_sample:
+        X_train = X_train.sample(n=fit_sample, random_state=random_state)
+        y_train = y_train.loc[X_train.index]
+
+    eval_kwargs = {} if use_xgb is None else {"use_xgb": use_xgb}
+    with StageMeter() as meter, _quiet(not verbose):
+        results, _ = evaluate_models(X_train, y_train, X_test, y_test, **eval_kwargs)
+    stages["evaluate_models"] = meter.result
+    for name in ("build_combined_dataset", "add_derived_features", "preprocess_and_split"):
+        stages[name]["rows_per_second"] = len(X_all) / max(stages[name]["wall_seconds"], 1e-9)
+
+    models = {}
+    for name, info in results.items():
+        if info.get("model") is None:
+            models[name] = {"status": info["status"]}
+            continue
+        X_test_pp = info["preproc"].transform(X_test)
+        start = time.perf_counter()
+        info["model"].predict_proba(X_test_pp)
+        predict_seconds = time.perf_counter() - start
+        models[name] = {
+            "status": info["status"],
+            "n_jobs": info["n_jobs"],
+            "fit_rows": len(X_train),
+            "fit_seconds": info["fit_seconds"],
+            "fit_rows_per_second": len(X_train) / max(info["fit_seconds"], 1e-9),
+            "predict_rows": len(X_test),
+            "predict_seconds": predict_seconds,
+            "predict_rows_per_second": len(X_test) / max(predict_seconds, 1e-9),
+            "roc_auc": info["metrics"].get("roc_auc"),
+        }
+
+    for stage, values in stages.items():
+        print(f"   {stage:<24} {values['wall_seconds']:8.2f}s  peak RSS {values['peak_rss_mb']:8.1f} MB")
+    for name, values in models.items():
+        if "fit_rows_per_second" in values:
+            print(f"   {name:<24} fit {values['fit_rows_per_second']:>12,.0f} rows/s  "
+                  f"predict {values['predict_rows_per_second']:>12,.0f} rows/s")
+
+    return {"rows": n_rows, "combined_rows": len(X_all), "stages": stages, "models": models}
+
+
+def run_benchmark(sizes=SIZES, fit_sample=None, n_jobs=-1, use_xgb=None, verbose=False, random_state=42,
+                  work_dir=None):
+    """
+    Tüm boyutları sırayla ölç. Sentetik CSV'ler ve arşiv önbelleği geçici bir dizinde tutulur
+    (çalışma dizinindeki .archive_cache kirlenmez).
+    """
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "rss_source": "psutil" if has_psutil else "procfs+getrusage",
+            "fit_sample": fit_sample,
+            "n_jobs": n_jobs,
+        },
+        "results": [],
+    }
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp:
+        os.chdir(tmp)
+        try:
+            for n_rows in sizes:
+                report["results"].append(benchmark_size(n_rows, tmp, fit_sample, n_jobs, use_xgb, verbose,
+                                                        random_state))
+                # Sonraki boyuttan önce bu boyutun dosyalarını sil (disk kullanımı sınırlı kalsın)
+                for name in os.listdir(tmp):
+                    if name.startswith("synthetic_"):
+                        os.remove(os.path.join(tmp, name))
+        finally:
+            os.chdir(cwd)
+    return report
+
+
+# ---------------------------
+# Karşılaştırma: kayıtlı taban çizgisine göre regresyonlar
+# ---------------------------
+# Metrik -> daha düşük mü iyi
+COMPARED_METRICS = {
+    "wall_seconds": True,
+    "peak_rss_mb": True,
+    "rows_per_second": False,
+    "fit_rows_per_second": False,
+    "predict_rows_per_second": False,
+}
+
+
+def _flatten(report):
+    flat = {}
+    for entry in report["results"]:
+        for group in ("stages", "models"):
+            for name, values in entry.get(group, {}).items():
+                for metric, value in values.items():
+                    if metric in COMPARED_METRICS and isinstance(value, (int, float)):
+                        flat[(entry["rows"], name, metric)] = value
+    return flat
+
+
+def compare_reports(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Ortak (boyut, aşama/model, metrik) üçlülerini karşılaştır.
+    Süre/bellek threshold oranından fazla artarsa, verim threshold oranından fazla düşerse regresyon.
+    Sadece regresyonların listesini döndürür.
+    """
+    current_flat, baseline_flat = _flatten(current), _flatten(baseline)
+    regressions = []
+    print(f"\n📊 COMPARISON vs baseline ({baseline['meta'].get('timestamp', '?')}), threshold {threshold:.0%}")
+    for key in sorted(set(current_flat) & set(baseline_flat)):
+        rows, name, metric = key
+        new, old = current_flat[key], baseline_flat[key]
+        if old <= 0:
+            continue
+        change = new / old - 1
+        lower_is_better = COMPARED_METRICS[metric]
+        regressed = change > threshold if lower_is_better else change < -threshold / (1 + threshold)
+        marker = "❌" if regressed else "  "
+        print(f" {marker} {rows:>10,} {name:<24} {metric:<24} {old:>14.3f} -> {new:>14.3f} ({change:+.1%})")
+        if regressed:
+            regressions.append({"rows": rows, "name": name, "metric": metric, "baseline": old,
+                                "current": new, "change": change})
+    print(f"{'❌' if regressions else '✅'} {len(regressions)} regression(s)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exoplanet training pipeline scalability benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="total catalog rows per run")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON results path")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="relative slowdown / memory growth counted as a regression")
+    parser.add_argument("--fit-sample", type=int, default=None,
+                        help="cap training rows passed to evaluate_models (for the largest sizes)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="build_combined_dataset ingestion processes")
+    parser.add_argument("--no-xgb", action="store_true", help="exclude XGBoost even if installed")
+    parser.add_argument("--work-dir", default=None, help="where synthetic catalogs are written")
+    parser.add_argument("--verbose", action="store_true", help="show pipeline output")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(args.sizes, fit_sample=args.fit_sample, n_jobs=args.n_jobs,
+                           use_xgb=False if args.no_xgb else None, verbose=args.verbose,
+                           work_dir=args.work_dir)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.threshold)
+        report["comparison"] = {"baseline": args.compare, "threshold": args.threshold,
+                                "regressions": regressions}
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Benchmark results saved: {args.output}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,8 @@
 # combine_data.py
 import pandas as pd
 import os
+from archive_cache import load_archive_table
+from cross_match import find_cross_mission_duplicates
 
 print("🚀 VERİ SETLERİ BİRLEŞTİRİLİYOR...")
 
@@ -11,7 +13,7 @@ dfs = []
 print("📂 cumulative_2025.10.04_02.11.48.csv yükleniyor...")
 try:
     # Önce hatanın olduğu satırı bulalım
-    df1 = pd.read_csv('cumulative_2025.10.04_02.11.48.csv', on_bad_lines='skip')
+    df1 = load_archive_table('cumulative_2025.10.04_02.11.48.csv', on_bad_lines='skip')[0]
     print(f"   ✅ {len(df1):,} kayıt yüklendi")
     dfs.append(df1)
 except Exception as e:
@@ -27,7 +29,7 @@ except Exception as e:
 # 2. K2 veri seti  
 print("📂 k2pandc_2025.10.04_02.12.05.csv yükleniyor...")
 try:
-    df2 = pd.read_csv('k2pandc_2025.10.04_02.12.05.csv', on_bad_lines='skip')
+    df2 = load_archive_table('k2pandc_2025.10.04_02.12.05.csv', on_bad_lines='skip')[0]
     print(f"   ✅ {len(df2):,} kayıt yüklendi")
     dfs.append(df2)
 except Exception as e:
@@ -36,7 +38,7 @@ except Exception as e:
 # 3. TOI veri seti
 print("📂 TOI_2025.10.04_02.11.58.csv yükleniyor...")
 try:
-    df3 = pd.read_csv('TOI_2025.10.04_02.11.58.csv', on_bad_lines='skip')
+    df3 = load_archive_table('TOI_2025.10.04_02.11.58.csv', on_bad_lines='skip')[0]
     print(f"   ✅ {len(df3):,} kayıt yüklendi")
     dfs.append(df3)
 except Exception as e:
@@ -58,10 +60,18 @@ for col in sorted(list(common_columns))[:15]:  # İlk 15'i göster
 
 # Sadece ortak sütunları seçerek birleştir
 combined_dfs = []
+missions = []
+periods = []
 for i, df in enumerate(dfs):
     df_common = df[list(common_columns)].copy()
     combined_dfs.append(df_common)
     print(f"   📊 DataFrame {i+1}: {len(df_common):,} kayıt")
+    
+    # Çapraz eşleştirme için görev adı ve periyot (periyot sütun adı kataloğa göre değişir)
+    mission = "KOI" if "kepoi_name" in df.columns else ("TOI" if "toi" in df.columns else "K2")
+    period_col = next((c for c in ['koi_period', 'pl_orbper'] if c in df.columns), None)
+    missions.extend([mission] * len(df))
+    periods.append(pd.to_numeric(df[period_col], errors='coerce') if period_col else pd.Series(float('nan'), index=df.index))
 
 # Tümünü birleştir
 print("\n🔄 VERİ SETLERİ BİRLEŞTİRİLİYOR...")
@@ -69,6 +79,24 @@ final_df = pd.concat(combined_dfs, ignore_index=True)
 print(f"   ✅ TOPLAM: {len(final_df):,} kayıt")
 print(f"   📈 SÜTUN: {final_df.shape[1]}")
 
+# Aynı yıldız/gezegen birden çok katalogda olabilir: ra/dec + periyot ile tekilleştir
+if {'ra', 'dec'} <= set(final_df.columns):
+    print("\n🔭 KATALOGLAR ARASI KOPYALAR ARANIYOR...")
+    keep_mask, dedup_report = find_cross_mission_duplicates(
+        pd.to_numeric(final_df['ra'], errors='coerce'),
+        pd.to_numeric(final_df['dec'], errors='coerce'),
+        pd.concat(periods, ignore_index=True),
+        missions
+    )
+    for _, row in dedup_report.head(10).iterrows():
+        print(f"   {row['duplicate_mission']}#{row['duplicate_index']} -> tutulan {row['kept_mission']}#{row['kept_index']} "
+              f"({row['separation_arcsec']:.2f}\")")
+    final_df = final_df.loc[keep_mask].reset_index(drop=True)
+    print(f"   🗑️  {len(dedup_report):,} kopya kayıt atıldı, kalan: {len(final_df):,}")
+    if len(dedup_report):
+        dedup_report.to_csv('dedup_report.csv', index=False)
+        print("   ✅ dedup_report.csv kaydedildi")
+
 # Gezegen sütununu bul
 print("\n🪐 GEZEGEN SÜTUNU ARA...")
 planet_columns = [col for col in final_df.columns 
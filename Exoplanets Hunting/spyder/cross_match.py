@@ -0,0 +1,112 @@
+# cross_match.py
+# KOI / K2 / TOI katalogları arasında aynı yıldız-gezegen kayıtlarını bulma
+# (gökyüzü koordinatları üzerinde BallTree + periyot toleransı, O(n log n))
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import BallTree
+
+# Varsayılan eşleşme toleransları
+SKY_TOLERANCE_ARCSEC = 3.0
+PERIOD_RELATIVE_TOLERANCE = 0.01   # |P1 - P2| / max(P1, P2)
+
+# Bir eşleşme grubunda hangi kaydın tutulacağı (önce gelen kazanır)
+MISSION_PRIORITY = ("KOI", "K2", "TOI")
+
+REPORT_COLUMNS = ["group", "kept_index", "kept_mission", "duplicate_index", "duplicate_mission",
+                  "separation_arcsec", "kept_period", "duplicate_period"]
+
+
+def _angular_separation_arcsec(dec1, ra1, dec2, ra2):
+    """Haversine açısal mesafe (girdiler radyan), ark-saniye döner"""
+    sin_ddec = np.sin((dec2 - dec1) / 2)
+    sin_dra = np.sin((ra2 - ra1) / 2)
+    a = sin_ddec ** 2 + np.cos(dec1) * np.cos(dec2) * sin_dra ** 2
+    return np.degrees(2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))) * 3600
+
+
+def find_cross_mission_duplicates(ra, dec, period, missions,
+                                  sky_tol_arcsec=SKY_TOLERANCE_ARCSEC,
+                                  period_rel_tol=PERIOD_RELATIVE_TOLERANCE,
+                                  priority=MISSION_PRIORITY):
+    """
+    Farklı görevlerden gelen ve hem gökyüzünde hem periyotta tolerans içinde olan kayıtları eşleştir.
+    Eşleşme zincirleri (A~B, B~C) tek grupta toplanır (rapordaki group). Kayıtlar görev önceliği sırasıyla
+    işlenir: tutulan bir kayıtla doğrudan eşleşen (başka görevden) kayıt atılır, diğerleri tutulur.
+    (keep_mask, report) döndürür; report her atılan/işaretlenen kayıt için hangi kaydın tutulduğunu gösterir.
+    """
+    ra = np.asarray(ra, dtype=np.float64)
+    dec = np.asarray(dec, dtype=np.float64)
+    period = np.asarray(period, dtype=np.float64)
+    missions = np.asarray(missions).astype(str)
+    n = len(ra)
+    keep_mask = np.ones(n, dtype=bool)
+
+    valid = np.flatnonzero(~np.isnan(ra) & ~np.isnan(dec) & ~np.isnan(period))
+    if len(valid) < 2:
+        return keep_mask, pd.DataFrame(columns=REPORT_COLUMNS)
+
+    # BallTree haversine metriği (enlem, boylam) sırasıyla radyan bekler
+    points = np.radians(np.column_stack([dec[valid], ra[valid]]))
+    tree = BallTree(points, metric='haversine')
+    neighbors = tree.query_radius(points, r=np.radians(sky_tol_arcsec / 3600.0))
+
+    counts = np.fromiter((len(nb) for nb in neighbors), dtype=np.int64, count=len(neighbors))
+    left = valid[np.repeat(np.arange(len(valid)), counts)]
+    right = valid[np.concatenate(neighbors)]
+
+    # Her çifti bir kez say, sadece farklı görevler arası ve periyodu uyumlu olanlar
+    pair = (left < right) & (missions[left] != missions[right])
+    left, right = left[pair], right[pair]
+    period_gap = np.abs(period[left] - period[right]) / np.maximum(np.abs(period[left]), np.abs(period[right]))
+    pair = period_gap <= period_rel_tol
+    left, right = left[pair], right[pair]
+
+    if len(left) == 0:
+        return keep_mask, pd.DataFrame(columns=REPORT_COLUMNS)
+
+    graph = coo_matrix((np.ones(len(left)), (left, right)), shape=(n, n)).tocsr()
+    graph = (graph + graph.T).tocsr()
+    _, group_of = connected_components(graph, directed=False)
+
+    # Gruplar bağlantılı bileşendir (geçişli): aynı görevden iki farklı nesne üçüncü bir katalogdaki kayıt
+    # üzerinden aynı gruba düşebilir. Bu yüzden bir kayıt sadece tutulan bir kayıtla DOĞRUDAN eşleşiyorsa atılır;
+    # aynı görevden kayıtlar arasında kenar olmadığı için birbirlerini asla elemezler.
+    matched = np.unique(np.concatenate([left, right]))
+    rank = {m: i for i, m in enumerate(priority)}
+    order = pd.DataFrame({
+        "index": matched,
+        "group": group_of[matched],
+        "rank": [rank.get(m, len(rank)) for m in missions[matched]],
+    }).sort_values(["group", "rank", "index"])
+
+    kept_by = {}    # atılan kayıt -> eşleştiği tutulan kayıt
+    kept = set()
+    for idx in order["index"].to_numpy():
+        # Öncelik sırasıyla işlendiği için tutulan komşular zaten karar verilmiş kayıtlardır
+        kept_neighbors = [j for j in graph.indices[graph.indptr[idx]:graph.indptr[idx + 1]] if j in kept]
+        if kept_neighbors:
+            kept_by[idx] = min(kept_neighbors, key=lambda j: (rank.get(missions[j], len(rank)), j))
+        else:
+            kept.add(idx)
+
+    duplicates = order[order["index"].isin(list(kept_by))]
+    dup_idx = duplicates["index"].to_numpy()
+    kept_idx = np.array([kept_by[i] for i in dup_idx], dtype=np.int64)
+    keep_mask[dup_idx] = False
+
+    rad = np.radians
+    report = pd.DataFrame({
+        "group": duplicates["group"].to_numpy(),
+        "kept_index": kept_idx,
+        "kept_mission": missions[kept_idx],
+        "duplicate_index": dup_idx,
+        "duplicate_mission": missions[dup_idx],
+        "separation_arcsec": _angular_separation_arcsec(rad(dec[kept_idx]), rad(ra[kept_idx]),
+                                                        rad(dec[dup_idx]), rad(ra[dup_idx])),
+        "kept_period": period[kept_idx],
+        "duplicate_period": period[dup_idx],
+    }, columns=REPORT_COLUMNS)
+    return keep_mask, report.reset_index(drop=True)
@@ -0,0 +1,115 @@
+# derived_features.py
+# Fiziksel türetilmiş özellikler: sütunlar üzerinde vektörel NumPy ile hesaplanır.
+# Eğitim (add_derived_features), servis (fused_scoring.FusedScorer) ve mobil API'deki gösterim
+# (calculate_derived_features) aynı compute_derived fonksiyonunu kullanır.
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+# Formüller değişince artır: önbellekteki eski sonuçlar otomatik geçersiz olur
+DERIVED_VERSION = 1
+DERIVED_CACHE_DIR = ".derived_cache"
+
+SUN_TEFF = 5778.0
+HZ_INNER_FLUX = 1.1    # yaşanabilir bölge iç sınırı (Güneş akısı cinsinden)
+HZ_OUTER_FLUX = 0.53   # yaşanabilir bölge dış sınırı
+
+# Hesaplamada kullanılan temel özellikler (FEATURE_NAME_MAP anahtarları)
+DERIVED_INPUTS = ["period", "duration", "depth", "ror", "prad", "srad", "model_snr", "teq"]
+
+DERIVED_FEATURES = [
+    "star_luminosity",          # srad² · (teq / 5778)⁴
+    "habitable_zone_inner",     # sqrt(L / 1.1)
+    "habitable_zone_outer",     # sqrt(L / 0.53)
+    "planet_semi_major_axis",   # period^(2/3) · srad^(-1/3)
+    "in_habitable_zone",        # 1.0 / 0.0 (girdi eksikse NaN)
+    "estimated_density",        # yarıçap sınıfına göre kaba yoğunluk
+    "orbital_velocity",         # 30 · sqrt(srad / period)
+    "transit_signal_strength",  # (depth / 1e4) · (model_snr / 10)
+    "depth_ror2_ratio",         # depth (ppm) / (ror² · 1e6): gerçek geçişte ~1
+    "duty_cycle",               # duration (saat) / (period · 24)
+]
+
+
+def compute_derived(columns, n_rows=None):
+    """
+    columns: {temel özellik: 1-B dizi} (eksik anahtar = tamamen NaN; hiç anahtar yoksa n_rows gerekir).
+    {türetilmiş özellik: float32 dizi} döndürür; geçersiz işlemler (sıfıra bölme, negatif kök) NaN olur.
+    """
+    n = len(next(iter(columns.values()))) if columns else n_rows
+    c = {name: np.asarray(columns[name], dtype=np.float32).astype(np.float64) if name in columns
+         else np.full(n, np.nan) for name in DERIVED_INPUTS}
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        luminosity = c["srad"] ** 2 * (c["teq"] / SUN_TEFF) ** 4
+        hz_inner = np.sqrt(luminosity / HZ_INNER_FLUX)
+        hz_outer = np.sqrt(luminosity / HZ_OUTER_FLUX)
+        semi_major_axis = np.cbrt(c["period"] ** 2 / c["srad"])
+        in_hz = np.where(np.isnan(hz_inner) | np.isnan(semi_major_axis), np.nan,
+                         ((hz_inner <= semi_major_axis) & (semi_major_axis <= hz_outer)).astype(np.float64))
+        prad = c["prad"]
+        density = np.select([np.isnan(prad), prad <= 0, prad < 1.5, prad < 4], [np.nan, 0.0, 5.5, 2.0], 1.3)
+        derived = {
+            "star_luminosity": luminosity,
+            "habitable_zone_inner": hz_inner,
+            "habitable_zone_outer": hz_outer,
+            "planet_semi_major_axis": semi_major_axis,
+            "in_habitable_zone": in_hz,
+            "estimated_density": density,
+            "orbital_velocity": 30.0 * np.sqrt(c["srad"] / c["period"]),
+            "transit_signal_strength": (c["depth"] / 10000.0) * (c["model_snr"] / 10.0),
+            "depth_ror2_ratio": c["depth"] / (c["ror"] ** 2 * 1e6),
+            "duty_cycle": c["duration"] / (c["period"] * 24.0),
+        }
+
+    out = {}
+    for name in DERIVED_FEATURES:
+        values = derived[name].astype(np.float32)
+        values[~np.isfinite(values)] = np.nan
+        out[name] = values
+    return out
+
+
+def _cache_key(X):
+    digest = hashlib.sha1(f"{DERIVED_VERSION}|{list(X.columns)}|{len(X)}".encode("utf-8"))
+    for name in DERIVED_INPUTS:
+        if name in X.columns:
+            digest.update(np.ascontiguousarray(X[name].to_numpy(dtype=np.float32)).tobytes())
+    return digest.hexdigest()
+
+
+def add_derived_features(X, cache_dir=DERIVED_CACHE_DIR):
+    """
+    X'e DERIVED_FEATURES sütunlarını ekle (float32). Hepsi zaten varsa X aynen döner.
+    cache_dir: aynı girdiler için sonuç .npy olarak saklanır ve sonraki çalıştırmada bellek eşlemeli okunur
+    (sadece son girdi tutulur); None -> önbellek yok.
+    """
+    if all(name in X.columns for name in DERIVED_FEATURES):
+        return X
+
+    derived = None
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = os.path.join(cache_dir, f"derived_{_cache_key(X)[:16]}.npy")
+        if os.path.exists(cache_path):
+            derived = np.load(cache_path, mmap_mode='r')
+            print(f"⚡ Derived features loaded from cache: {cache_path}")
+
+    if derived is None:
+        columns = {name: X[name].to_numpy() for name in DERIVED_INPUTS if name in X.columns}
+        values = compute_derived(columns, n_rows=len(X))
+        derived = np.column_stack([values[name] for name in DERIVED_FEATURES])
+        if cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            for name in os.listdir(cache_dir):
+                if name.startswith("derived_") and name.endswith(".npy"):
+                    os.remove(os.path.join(cache_dir, name))
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp.npy"
+            np.save(tmp_path, derived)
+            os.replace(tmp_path, cache_path)
+
+    print(f"🧪 Derived features added: {len(DERIVED_FEATURES)} columns")
+    derived_df = pd.DataFrame(np.asarray(derived, dtype=np.float32), index=X.index, columns=DERIVED_FEATURES)
+    return pd.concat([X.drop(columns=DERIVED_FEATURES, errors="ignore"), derived_df], axis=1)
@@ -2,15 +2,35 @@
 # GÜNCELLENDİ: Daha fazla veri, daha iyi feature eşleme, CANDIDATE'ler dahil
 
 import os
+import hashlib
+import shutil
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, StratifiedKFold, cross_val_score, cross_validate
+from sklearn.model_selection import train_test_split, StratifiedKFold
 from sklearn.impute import SimpleImputer
-from sklearn.preprocessing import StandardScaler
+from sklearn.preprocessing import StandardScaler, FunctionTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.linear_model import LogisticRegression
-from sklearn.ensemble import RandomForestClassifier
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
 import joblib
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from threadpoolctl import threadpool_limits
+from archive_cache import load_archive_table
+from nasa_archive import read_archive_header
+from cross_match import find_cross_mission_duplicates
+from hyperparameter_search import successive_halving_search
+from model_compression import compress_saved_model
+from tree_engine import export_flat_model, file_identity
+from model_bundle import write_model_bundle, data_fingerprint
+from feature_store import FEATURE_STORE_DIR, write_feature_store, load_feature_store
+from derived_features import add_derived_features
+from pipeline_profiler import (stage, activate, deactivate, active_profiler, profiler_from_env,
+                               collector_settings, call_collecting)
 from sklearn.metrics import classification_report, roc_auc_score, precision_recall_fscore_support, confusion_matrix
 import warnings
 warnings.filterwarnings("ignore")
@@ -72,36 +92,123 @@ NEGATIVE_LABEL_KEYWORDS = [
     "NOT PLANET", "FALSE", "NON PLANET", "NON-PLANET", "FA", "FALSE ALARM"
 ]
 
+# LABEL_CANDIDATES bulunamazsa etiket sütunu adında aranacak parçalar
+LABEL_FALLBACK_KEYWORDS = ['disposition', 'status', 'type', 'disp']
+
+def find_label_fallback_columns(columns):
+    return [col for col in columns if any(keyword in col.lower() for keyword in LABEL_FALLBACK_KEYWORDS)]
+
+# Listelerde birebir bulunmayan değerler için alt dizi kuralları
+POSITIVE_FALLBACK_KEYWORDS = ['CONFIRM', 'CANDIDATE', 'PLANET', 'CP', 'PC', 'KP']
+NEGATIVE_FALLBACK_KEYWORDS = ['FALSE', 'FP', 'NOT', 'NON', 'FA']
+
+LABEL_POSITIVE, LABEL_NEGATIVE, LABEL_UNKNOWN = 1, 0, -1
+
+class LabelNormalizer:
+    """
+    Ham etiket değerlerini {1: gezegen, 0: sahte pozitif, -1: sınıflandırılamadı} kodlarına eşler.
+    Her farklı değer sadece bir kez sınıflandırılır; öğrenilen eşleme `mapping` içinde
+    denetlenebilir ve yeni bir LabelNormalizer(mapping) ile yeniden kullanılabilir.
+    """
+
+    def __init__(self, mapping=None):
+        self.mapping = dict(mapping) if mapping else {}
+        self._positive = frozenset(POSITIVE_LABEL_KEYWORDS)
+        self._negative = frozenset(NEGATIVE_LABEL_KEYWORDS)
+
+    def classify(self, raw_value):
+        value = str(raw_value).upper().strip()
+        if value in self.mapping:
+            return self.mapping[value]
+
+        # Birebir eşleşmede NEGATIVE önceliklidir (eski maske sırasıyla aynı)
+        if value in self._negative:
+            code = LABEL_NEGATIVE
+        elif value in self._positive:
+            code = LABEL_POSITIVE
+        elif any(keyword in value for keyword in POSITIVE_FALLBACK_KEYWORDS):
+            print(f"    -> Auto-mapping '{value}' to POSITIVE")
+            code = LABEL_POSITIVE
+        elif any(keyword in value for keyword in NEGATIVE_FALLBACK_KEYWORDS):
+            print(f"    -> Auto-mapping '{value}' to NEGATIVE")
+            code = LABEL_NEGATIVE
+        else:
+            code = LABEL_UNKNOWN
+
+        self.mapping[value] = code
+        return code
+
+    def transform(self, labels):
+        """Etiket serisini tek geçişte int8 kod dizisine çevir: (codes, categories)"""
+        categorical = labels if isinstance(labels.dtype, pd.CategoricalDtype) else labels.astype("category")
+        categories = categorical.cat.categories
+        # Son eleman eksik değer (kod -1) içindir: str(NaN) eskisi gibi 'NAN' olarak sınıflandırılır
+        lookup = np.array([self.classify(c) for c in categories] + [self.classify(np.nan)], dtype=np.int8)
+        return lookup[categorical.cat.codes.to_numpy()], categories
+
+label_normalizer = LabelNormalizer()
+
 # ---------------------------
 # 3) Load function
 # ---------------------------
-def load_table(path):
+def resolve_needed_columns(header, extra_columns=()):
+    """
+    Başlıktan sadece FEATURE_NAME_MAP ve LABEL_CANDIDATES'in kullanacağı sütunları çöz.
+    extract_features_and_label ile aynı öncelik sırası kullanılır (ilk eşleşen aday).
+    (usecols, dtype) döndürür: özellikler float32, etiket categorical.
+    """
+    available = set(header)
+    feature_cols = []
+    for candidates in FEATURE_NAME_MAP.values():
+        col = next((c for c in candidates if c in available), None)
+        if col is not None and col not in feature_cols:
+            feature_cols.append(col)
+
+    label_col = next((c for c in LABEL_CANDIDATES if c in available), None)
+    if label_col is None:
+        fallback = find_label_fallback_columns(header)
+        label_col = fallback[0] if fallback else None
+
+    usecols = list(feature_cols)
+    dtype = {col: "float32" for col in feature_cols}
+    if label_col is not None:
+        usecols.append(label_col)
+        dtype[label_col] = "category"
+    for col in extra_columns:
+        if col in available and col not in usecols:
+            usecols.append(col)
+
+    return usecols, dtype
+
+
+def load_table(path, use_cache=True, project=True, extra_columns=()):
     print(f"Loading {path} ...")
     
+    # '#' önsözü tek geçişte atlanır, veri gövdesi doğrudan dosyadan okunur
+    # (comment='#' kullanılmaz: koi_comment gibi alanlardaki '#' satırları bozmaz)
+    # Dosya değişmediyse ayrıştırılmış tablo .archive_cache/ içinden yüklenir
+    if not project:
+        df, schema = load_archive_table(path, use_cache=use_cache, low_memory=False)
+        print(f"  ✅ Successfully loaded. Shape: {df.shape} (described columns: {len(schema.columns)})")
+        return df
+
+    # Projection pushdown: koi_comment, _err1/_err2 vb. hiç ayrıştırılmaz
+    header = read_archive_header(path).header
+    usecols, dtype = resolve_needed_columns(header, extra_columns)
     try:
-        # Yorum satırlarını atlayarak oku
-        df = pd.read_csv(path, comment='#', low_memory=False)
-        print(f"  ✅ Successfully loaded. Shape: {df.shape}")
-        
-    except Exception as e:
-        print(f"  ❌ Error with comment skipping: {e}")
-        print("  🔧 Trying manual parsing...")
-        
-        # Manuel parsing
-        lines = []
-        with open(path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    lines.append(line)
-        
-        # Geçici dosya oluştur
-        temp_path = "temp_data.csv"
-        with open(temp_path, 'w', encoding='utf-8') as f:
-            f.writelines(lines)
-        
-        df = pd.read_csv(temp_path, low_memory=False)
-        os.remove(temp_path)
-        print(f"  ✅ Manually loaded. Shape: {df.shape}")
+        df, schema = load_archive_table(path, use_cache=use_cache, usecols=usecols, dtype=dtype, low_memory=False)
+    except ValueError as e:
+        # Sayısal olmayan değer içeren özellik sütunu: tipsiz oku, sonra zorla float32'ye çevir
+        print(f"  ⚠️ Compact dtype parse failed ({e}), coercing features...")
+        df, schema = load_archive_table(path, use_cache=use_cache, usecols=usecols, low_memory=False)
+        for col, col_dtype in dtype.items():
+            if col_dtype == "float32":
+                df[col] = pd.to_numeric(df[col], errors="coerce").astype("float32")
+            else:
+                df[col] = df[col].astype(col_dtype)
+
+    print(f"  ✅ Successfully loaded. Shape: {df.shape} "
+          f"({len(usecols)}/{len(header)} columns parsed, described columns: {len(schema.columns)})")
     
     return df
 
@@ -129,7 +236,7 @@ def check_data_quality(X, y, dataset_name):
 # ---------------------------
 # 5) Extract features from a single dataframe
 # ---------------------------
-def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
+def extract_features_and_label(df, drop_candidates=False, normalizer=None, keep_index=False):  # FALSE YAPILDI
     # find label column
     label_col = find_first_column(df, LABEL_CANDIDATES)
     if label_col is None:
@@ -138,7 +245,7 @@ def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
             print(f"  {i+1:2d}. {col}")
         
         # Otomatik olarak disposition veya status içeren sütunları ara
-        possible_label_cols = [col for col in df.columns if 'disposition' in col.lower() or 'status' in col.lower() or 'type' in col.lower() or 'disp' in col.lower()]
+        possible_label_cols = find_label_fallback_columns(df.columns)
         if possible_label_cols:
             print(f"\nPossible label columns found: {possible_label_cols}")
             label_col = possible_label_cols[0]
@@ -148,39 +255,24 @@ def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
 
     print(" -> Using label column:", label_col)
     
-    # Label sütunundaki benzersiz değerleri göster
-    unique_labels = df[label_col].astype(str).unique()
-    print(f" -> Unique values in label column: {list(unique_labels)}")
-
-    # Map raw label strings to uniform values
-    labels_raw = df[label_col].astype(str).str.upper().str.strip()
+    # Her farklı ham değer bir kez sınıflandırılır, kodlar categorical codes üzerinden yayılır
+    normalizer = normalizer if normalizer is not None else label_normalizer
+    codes, categories = normalizer.transform(df[label_col])
+    print(f" -> Unique values in label column: {[str(c) for c in categories]}")
 
     # Build binary label: CONFIRMED/CANDIDATE -> 1, FALSE POSITIVE -> 0
-    positive_mask = labels_raw.isin(POSITIVE_LABEL_KEYWORDS)
-    negative_mask = labels_raw.isin(NEGATIVE_LABEL_KEYWORDS)
-    
-    # Eşleşmeyen değerleri otomatik sınıflandır
-    for val in labels_raw.unique():
-        if val not in POSITIVE_LABEL_KEYWORDS and val not in NEGATIVE_LABEL_KEYWORDS:
-            if any(keyword in val for keyword in ['CONFIRM', 'CANDIDATE', 'PLANET', 'CP', 'PC', 'KP']):
-                print(f"    -> Auto-mapping '{val}' to POSITIVE")
-                positive_mask = positive_mask | (labels_raw == val)
-            elif any(keyword in val for keyword in ['FALSE', 'FP', 'NOT', 'NON', 'FA']):
-                print(f"    -> Auto-mapping '{val}' to NEGATIVE")
-                negative_mask = negative_mask | (labels_raw == val)
-
-    y = pd.Series(index=df.index, dtype="float64")
-    y[positive_mask] = 1.0
-    y[negative_mask] = 0.0
+    positive_mask = codes == LABEL_POSITIVE
+    negative_mask = codes == LABEL_NEGATIVE
+    keep_mask = positive_mask | negative_mask
 
     if drop_candidates:
-        keep_mask = positive_mask | negative_mask
         print(f" -> Keeping {keep_mask.sum()} labeled rows (dropping unclassified)")
     else:
         # Tüm kayıtları tut (CANDIDATE'ler dahil)
-        keep_mask = ~y.isna()
         print(f" -> Keeping all {keep_mask.sum()} rows (CANDIDATEs included)")
 
+    y = pd.Series(codes, index=df.index)
+
     # Now features: loop FEATURE_NAME_MAP and pick first existing column
     features = {}
     available_features = []
@@ -193,7 +285,7 @@ def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
             available_features.append(feat_key)
         else:
             # mark missing by NaN series
-            features[feat_key] = pd.Series(index=df.index, dtype=float)
+            features[feat_key] = pd.Series(index=df.index, dtype="float32")
             missing_features.append(feat_key)
 
     X = pd.DataFrame(features)
@@ -202,8 +294,12 @@ def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
         print(f" -> Missing features: {missing_features}")
 
     # Subset to rows with labels available
-    X = X.loc[keep_mask].reset_index(drop=True)
-    y = y.loc[keep_mask].reset_index(drop=True).astype(int)
+    # (keep_index=True: kaynak satır indeksleri korunur, kimlik/koordinat eşlemesi için)
+    X = X.loc[keep_mask]
+    y = y.loc[keep_mask].astype(int)
+    if not keep_index:
+        X = X.reset_index(drop=True)
+        y = y.reset_index(drop=True)
 
     print(" -> After filtering labeled rows:", X.shape, "labels:", y.value_counts().to_dict())
     return X, y
@@ -211,23 +307,248 @@ def extract_features_and_label(df, drop_candidates=False):  # FALSE YAPILDI
 # ---------------------------
 # 6) Load all three tables and combine (stack)
 # ---------------------------
-def build_combined_dataset(koi_path=None, toi_path=None, k2_path=None, drop_candidates=False):  # FALSE YAPILDI
+MISSION_NAMES = ["KOI", "TOI", "K2"]
+
+# Çapraz-katalog eşleştirme için gökyüzü koordinatları (üç arşivde de aynı isim)
+COORD_COLUMNS = ["ra", "dec"]
+
+def mission_coordinates(df, index=None):
+    """Verilen satırlar için (ra, dec) float64 dizisi; sütun yoksa NaN"""
+    rows = df.index if index is None else index
+    coords = np.full((len(rows), len(COORD_COLUMNS)), np.nan)
+    for i, col in enumerate(COORD_COLUMNS):
+        if col in df.columns:
+            coords[:, i] = pd.to_numeric(df.loc[rows, col], errors="coerce").to_numpy(dtype=np.float64)
+    return coords
+
+# ---------------------------
+# 6b) Incremental snapshot ingestion
+# ---------------------------
+# Görev başına kararlı nesne kimliği sütunları
+MISSION_ID_CANDIDATES = {
+    "KOI": ["kepoi_name"],
+    "TOI": ["toi", "toi_id", "TOI"],
+    "K2": ["pl_name"],
+}
+STATE_COLUMNS = ["label", "mission", "object_id", "row_hash"] + COORD_COLUMNS
+STATE_VERSION = 2
+
+def _pipeline_signature():
+    """Özellik/etiket eşlemesi değişirse önceki materyalize veri geçersiz sayılır"""
+    text = repr((STATE_VERSION, FEATURE_NAME_MAP, LABEL_CANDIDATES, POSITIVE_LABEL_KEYWORDS, NEGATIVE_LABEL_KEYWORDS,
+                 POSITIVE_FALLBACK_KEYWORDS, NEGATIVE_FALLBACK_KEYWORDS))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def mission_object_ids(df, mission):
+    """
+    Kararlı nesne kimlikleri (kepoi_name, TOI no, K2 pl_name).
+    k2pandc aynı gezegen için birden çok satır içerebilir: tekrarlar '#<sıra>' ile ayrılır.
+    """
+    id_col = find_first_column(df, MISSION_ID_CANDIDATES.get(mission, []))
+    if id_col is None:
+        # Kimlik sütunu yoksa satır sırası kimlik olarak kullanılır
+        return pd.Series(np.arange(len(df)).astype(str), index=df.index)
+    ids = df[id_col].astype(str)
+    occurrence = ids.groupby(ids).cumcount()
+    return ids.where(occurrence == 0, ids + "#" + occurrence.astype(str))
+
+def load_incremental_state(path):
+    if path is None or not os.path.exists(path):
+        return None
+    state = pd.read_pickle(path)
+    if state.attrs.get("signature") != _pipeline_signature():
+        print("  ⚠️ Previous materialized dataset was built with a different feature/label map - full rebuild")
+        return None
+    return state
+
+def save_incremental_state(state, path):
+    state.attrs["signature"] = _pipeline_signature()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    state.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+def _ingest_mission_incremental(name, path, previous_state, drop_candidates=False):
+    """
+    Yeni dökümü önceki materyalize veriyle kimlik + satır özeti üzerinden karşılaştır;
+    sadece eklenen/güncellenen satırlar için özellik çıkarımı yap.
+    """
+    with stage("load_table", mission=name) as record:
+        df = load_table(path, extra_columns=MISSION_ID_CANDIDATES.get(name, []) + COORD_COLUMNS)
+        record["rows"] = len(df)
+    object_ids = mission_object_ids(df, name)
+    row_hash = pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    feature_cols = list(FEATURE_NAME_MAP)
+    state = pd.DataFrame({"object_id": object_ids.to_numpy(), "row_hash": row_hash})
+    state["mission"] = name
+
+    previous = None
+    if previous_state is not None:
+        previous = previous_state[previous_state["mission"] == name].set_index("object_id")
+
+    ids = object_ids.to_numpy()
+    if previous is None or previous.empty:
+        known = np.zeros(len(df), dtype=bool)
+        removed = 0
+    else:
+        known = object_ids.isin(previous.index).to_numpy()
+        removed = int((~previous.index.isin(ids)).sum())
+    changed = ~known
+    if known.any():
+        changed[known] = previous.loc[ids[known], "row_hash"].to_numpy() != row_hash[known]
+    inserted = int((~known).sum())
+    updated = int((changed & known).sum())
+
+    print(f" -> Delta ({name}): {inserted} inserted, {updated} updated, {removed} removed, "
+          f"{len(df) - int(changed.sum())} unchanged")
+
+    # Değişmeyen satırlar: özellik + etiket önceki veriden aynen alınır
+    features = pd.DataFrame(np.nan, index=state.index, columns=feature_cols, dtype="float32")
+    labels = np.full(len(state), LABEL_UNKNOWN, dtype=np.int8)
+    if (~changed).any():
+        unchanged_ids = ids[~changed]
+        features.loc[~changed, feature_cols] = previous.loc[unchanged_ids, feature_cols].to_numpy()
+        labels[~changed] = previous.loc[unchanged_ids, "label"].to_numpy()
+
+    # Sadece delta için özellik çıkarımı
+    if changed.any():
+        delta = df.loc[changed]
+        with stage("extract_features_and_label", rows=len(delta), mission=name):
+            X_delta, y_delta = extract_features_and_label(delta, drop_candidates=drop_candidates, keep_index=True)
+        positions = df.index.get_indexer(X_delta.index)
+        features.iloc[positions] = X_delta[feature_cols].to_numpy()
+        labels[positions] = y_delta.to_numpy()
+
+    state = pd.concat([features, state], axis=1)
+    state["label"] = labels
+    coords = mission_coordinates(df)
+    for i, col in enumerate(COORD_COLUMNS):
+        state[col] = coords[:, i]
+
+    keep = labels != LABEL_UNKNOWN
+    X = features.loc[keep].reset_index(drop=True)
+    y = pd.Series(labels[keep], dtype=int)
+    return state[feature_cols + STATE_COLUMNS], X, y, coords[keep]
+
+def _merge_stage_records(records):
+    """İşçi süreçlerde kaydedilen aşamaları etkin profilleyiciye ekle"""
+    if records and active_profiler() is not None:
+        active_profiler().merge(records)
+
+def _ingest_mission(path, drop_candidates=False, with_coords=False):
+    """Tek görev tablosunu yükle + özellik çıkar (alt süreçte çalışabilir), kompakt diziler döndür"""
+    mission = os.path.basename(path)
+    with stage("load_table", mission=mission) as record:
+        df = load_table(path, extra_columns=COORD_COLUMNS if with_coords else ())
+        record["rows"] = len(df)
+    with stage("extract_features_and_label", rows=len(df), mission=mission):
+        X, y = extract_features_and_label(df, drop_candidates=drop_candidates, keep_index=True)
+    coords = mission_coordinates(df, X.index) if with_coords else None
+    return (X.to_numpy(dtype=np.float32), y.to_numpy(dtype=np.int8), list(X.columns),
+            label_normalizer.mapping, coords)
+
+# ---------------------------
+# 6c) Cross-mission duplicate detection
+# ---------------------------
+# Eğitim ve warm start aynı ayarı kullanır (holdout nesnelerinin başka katalogdaki kopyaları eğitime girmesin)
+DEDUP_MODE = "drop"
+# Son build_combined_dataset çağrısının eşleşme raporu (hangi kayıt tutuldu, hangisi atıldı/işaretlendi)
+last_dedup_report = None
+
+def deduplicate_missions(X_all, y_all, missions_all, coords_all, mode="drop", **match_options):
+    """
+    KOI/K2/TOI arasında aynı nesneyi (ra/dec + periyot toleransı) BallTree ile bul.
+    mode="drop": kopyalar atılır, mode="flag": sadece raporlanır.
+    """
+    global last_dedup_report
+    keep_mask, report = find_cross_mission_duplicates(
+        coords_all[:, 0], coords_all[:, 1], X_all["period"].to_numpy(), missions_all.to_numpy(),
+        **match_options
+    )
+    last_dedup_report = report
+
+    print(f"\n🔭 CROSS-MISSION DUPLICATES: {len(report)} rows matched an object already in another catalog")
+    if len(report):
+        pairs = report.groupby(["duplicate_mission", "kept_mission"]).size()
+        for (dup_mission, kept_mission), count in pairs.items():
+            print(f"   {dup_mission} -> kept {kept_mission}: {count}")
+
+    if mode != "drop" or keep_mask.all():
+        return X_all, y_all, missions_all
+
+    print(f"   🗑️  Dropping {int((~keep_mask).sum())} duplicate rows")
+    return (X_all.loc[keep_mask].reset_index(drop=True),
+            y_all.loc[keep_mask].reset_index(drop=True),
+            missions_all.loc[keep_mask].reset_index(drop=True))
+
+def build_combined_dataset(koi_path=None, toi_path=None, k2_path=None, drop_candidates=False, n_jobs=1,
+                           incremental_state=None, return_missions=False, dedup=None, dedup_options=None):  # FALSE YAPILDI
+    """
+    n_jobs != 1 ise her görev (KOI/TOI/K2) ayrı bir süreçte yüklenir ve işlenir;
+    sonuçlar ve kalite raporu yine KOI -> TOI -> K2 sırasıyla birleştirilir.
+    incremental_state verilirse (örn. "models/materialized_dataset.pkl") önceki snapshot'a göre
+    sadece eklenen/güncellenen satırlar işlenir, silinenler düşürülür ve durum dosyası güncellenir.
+    return_missions=True ise her satırın görev kökeni (KOI/TOI/K2) üçüncü değer olarak döner.
+    dedup="drop" / "flag": görevler arası aynı nesneler bulunur (bkz. deduplicate_missions);
+    dedup_options ile toleranslar ve görev önceliği ayarlanır.
+    """
     data_frames = []
     labels = []
+    coordinates = []
+    with_coords = dedup is not None
 
-    for p in [koi_path, toi_path, k2_path]:
+    missions = []
+    for name, p in zip(MISSION_NAMES, [koi_path, toi_path, k2_path]):
         if p is None:
             continue
         if not os.path.exists(p):
             print("  WARNING: file not found:", p)
             continue
-        print(f"\n{'='*50}")
-        print(f"Processing: {p}")
-        print(f"{'='*50}")
-        df = load_table(p)
-        X, y = extract_features_and_label(df, drop_candidates=drop_candidates)
-        data_frames.append(X)
-        labels.append(y)
+        missions.append((name, p))
+
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+
+    if incremental_state is not None:
+        previous_state = load_incremental_state(incremental_state)
+        states = []
+        for name, p in missions:
+            print(f"\n{'='*50}")
+            print(f"Processing (incremental): {p} ({name})")
+            print(f"{'='*50}")
+            state, X, y, coords = _ingest_mission_incremental(name, p, previous_state, drop_candidates=drop_candidates)
+            states.append(state)
+            data_frames.append(X)
+            labels.append(y)
+            coordinates.append(coords)
+        if states:
+            save_incremental_state(pd.concat(states, ignore_index=True), incremental_state)
+            print(f"💾 Materialized dataset updated: {incremental_state}")
+    elif n_jobs > 1 and len(missions) > 1:
+        print(f"\n⚡ Parallel ingestion: {len(missions)} missions on {min(n_jobs, len(missions))} processes")
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(missions))) as executor:
+            # Profil açıksa işçilerdeki aşama kayıtları sonuçla birlikte döner
+            settings = collector_settings()
+            futures = [executor.submit(call_collecting, settings, _ingest_mission, p, drop_candidates, with_coords)
+                       for _, p in missions]
+            # Gönderim sırasıyla topla: rapor sırası tamamlanma sırasına bağlı değil
+            for future in futures:
+                (X_arr, y_arr, columns, label_mapping, coords), records = future.result()
+                _merge_stage_records(records)
+                label_normalizer.mapping.update(label_mapping)
+                data_frames.append(pd.DataFrame(X_arr, columns=columns))
+                labels.append(pd.Series(y_arr, dtype=int))
+                coordinates.append(coords)
+    else:
+        for name, p in missions:
+            print(f"\n{'='*50}")
+            print(f"Processing: {p} ({name})")
+            print(f"{'='*50}")
+            X_arr, y_arr, columns, _, coords = _ingest_mission(p, drop_candidates, with_coords)
+            data_frames.append(pd.DataFrame(X_arr, columns=columns))
+            labels.append(pd.Series(y_arr, dtype=int))
+            coordinates.append(coords)
 
     if not data_frames:
         raise ValueError("No valid datasets loaded. Check paths.")
@@ -242,8 +563,7 @@ def build_combined_dataset(koi_path=None, toi_path=None, k2_path=None, drop_cand
     print("="*60)
     
     total_records = 0
-    for i, (X, y) in enumerate(zip(data_frames, labels)):
-        dataset_name = ["KOI", "TOI", "K2"][i]
+    for (dataset_name, _), X, y in zip(missions, data_frames, labels):
         high_missing = check_data_quality(X, y, dataset_name)
         total_records += len(X)
 
@@ -253,14 +573,22 @@ def build_combined_dataset(koi_path=None, toi_path=None, k2_path=None, drop_cand
     print("Labels distribution:", y_all.value_counts().to_dict())
     print("Label ratio (Planet/Non-Planet):", f"{y_all.mean():.1%}")
     
+    missions_all = pd.Series(np.repeat([name for name, _ in missions], [len(X) for X in data_frames]),
+                             dtype="category")
+    if dedup is not None:
+        X_all, y_all, missions_all = deduplicate_missions(
+            X_all, y_all, missions_all, np.concatenate(coordinates), mode=dedup, **(dedup_options or {})
+        )
+        print("Final dataset shape after dedup:", X_all.shape)
+
+    if return_missions:
+        return X_all, y_all, missions_all
     return X_all, y_all
 
 
 # ---------------------------
 # 7) Preprocessing and train/test split
 # ---------------------------
-from sklearn.pipeline import make_pipeline
-
 def preprocess_and_split(X, y, test_size=0.2, random_state=42):
     print("\n🔧 PREPROCESSING AND SPLITTING...")
     
@@ -287,83 +615,364 @@ def preprocess_and_split(X, y, test_size=0.2, random_state=42):
 # ---------------------------
 from sklearn.metrics import roc_auc_score, accuracy_score, precision_score, recall_score, f1_score
 
-def evaluate_models(X_train, y_train, X_test, y_test, use_xgb=has_xgb):
-    print("\n🤖 TRAINING MODELS...")
-    
-    # Preprocessing pipeline: impute median + scale
-    preproc = Pipeline([
+def make_preprocessor():
+    return Pipeline([
         ("imputer", SimpleImputer(strategy="median")),
         ("scaler", StandardScaler())
     ])
 
-    X_train_pp = pd.DataFrame(preproc.fit_transform(X_train), columns=X_train.columns, index=X_train.index)
-    X_test_pp = pd.DataFrame(preproc.transform(X_test), columns=X_test.columns, index=X_test.index)
+def make_passthrough_preprocessor():
+    """
+    NaN'ı kendisi işleyen modeller için: imputasyon/ölçekleme yok, sadece float32 dizi.
+    preprocessor.pkl olarak kaydedildiğinde tahmin kodu (preprocessor.transform) aynen çalışır.
+    """
+    return Pipeline([
+        ("to_float32", FunctionTransformer(np.asarray, kw_args={"dtype": np.float32}))
+    ])
 
+# Eksik değerleri yerel olarak işleyen modeller: medyan imputasyonu atlanır, ham özellikleri alır
+NAN_NATIVE_MODELS = (HistGradientBoostingClassifier,)
+
+def _handles_nan(model):
+    return isinstance(model, NAN_NATIVE_MODELS)
+
+def search_preprocessors(models):
+    """
+    Hiperparametre araması için model başına ön işleyici: evaluate_models / cross_validate_models ile aynı
+    (NaN'ı yerel işleyenler passthrough, diğerleri ortak imputer+scaler nesnesi -> bir kez dönüştürülür)
+    """
+    shared, raw = make_preprocessor(), make_passthrough_preprocessor()
+    return {name: raw if _handles_nan(model) else shared for name, model in models.items()}
+
+# Modellerin göreli eğitim maliyeti: ortak CPU bütçesi bu ağırlıklarla paylaştırılır
+MODEL_COST_WEIGHTS = {"LogisticRegression": 1, "RandomForest": 8, "XGBoost": 6, "HistGradientBoosting": 3}
+
+def build_candidate_models(use_xgb=has_xgb, model_params=None):
+    """
+    Aday modeller (thread sayıları allocate_threads ile ayrıca atanır).
+    model_params: {model_adı: {parametre: değer}} - örn. best_params.json'daki ayarlanmış değerler
+    """
     models = {
         "LogisticRegression": LogisticRegression(max_iter=1000, solver='liblinear', random_state=42),
-        "RandomForest": RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1)
+        "RandomForest": RandomForestClassifier(n_estimators=200, random_state=42, n_jobs=-1),
+        # Histogram tabanlı boosting: NaN'ı yerel işler, doğrulama kaybı durunca erken durur
+        "HistGradientBoosting": HistGradientBoostingClassifier(
+            max_iter=500, learning_rate=0.1, early_stopping=True, validation_fraction=0.1,
+            n_iter_no_change=20, random_state=42
+        ),
     }
     if use_xgb:
         models["XGBoost"] = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42, n_jobs=4)
+    for name, params in (model_params or {}).items():
+        if name in models:
+            models[name].set_params(**params)
+    return models
 
-    results = {}
+def _uses_threads(model):
+    """
+    Çok thread'li modeller: n_jobs ile paralelleşenler ve OpenMP kullanan HistGradientBoosting
+    (liblinear LogisticRegression tek thread'lidir)
+    """
+    if isinstance(model, HistGradientBoostingClassifier):
+        return True
+    return "n_jobs" in model.get_params() and not isinstance(model, LogisticRegression)
+
+def allocate_threads(models, cpu_budget=None):
+    """
+    Toplam CPU bütçesini modellere maliyetleriyle orantılı dağıt.
+    n_jobs parametresi olmayan (veya liblinear gibi tek thread'li) modeller 1 çekirdek alır.
+    """
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    threaded = [name for name, model in models.items() if _uses_threads(model)]
+    allocation = {name: 1 for name in models if name not in threaded}
+
+    remaining = max(cpu_budget - len(allocation), len(threaded))
+    total_weight = sum(MODEL_COST_WEIGHTS.get(name, 1) for name in threaded) or 1
+    for name in threaded:
+        allocation[name] = max(1, int(remaining * MODEL_COST_WEIGHTS.get(name, 1) / total_weight))
+    return allocation
+
+def _fit_candidate(name, model, X_train_pp, y_train, X_test_pp, n_threads=None):
+    """
+    Tek modeli eğit ve test tahminlerini üret (işçi süreçte çalışır).
+    n_threads: n_jobs parametresi olmayan (OpenMP) modellerin thread sınırı
+    """
+    limits = n_threads if n_threads and n_threads > 0 else None
+    with threadpool_limits(limits=limits, user_api="openmp"):
+        with stage(f"fit:{name}", rows=len(X_train_pp), n_threads=n_threads):
+            start = time.perf_counter()
+            model.fit(X_train_pp, y_train)
+            fit_seconds = time.perf_counter() - start
+        with stage(f"predict:{name}", rows=len(X_test_pp)):
+            y_pred = model.predict(X_test_pp)
+            y_proba = model.predict_proba(X_test_pp)[:,1] if hasattr(model, "predict_proba") else model.decision_function(X_test_pp)
+    return model, y_pred, y_proba, fit_seconds
+
+def _fit_candidate_mapped(name, model, X_train_path, y_train_path, X_test_path, n_threads=None):
+    """_fit_candidate'in işçi karşılığı: matrisler .npy dosyalarından bellek eşlemeli (sıfır kopya) açılır"""
+    X_train_pp, y_train, X_test_pp = (np.load(path, mmap_mode='r') for path in (X_train_path, y_train_path,
+                                                                               X_test_path))
+    return _fit_candidate(name, model, X_train_pp, y_train, X_test_pp, n_threads)
+
+def _share_arrays(arrays, work_dir):
+    """
+    Dizileri work_dir'e .npy olarak bir kez yaz: {id(dizi): yol}. İşçilere dizinin kendisi yerine yolu verilir,
+    np.load(mmap_mode='r') ile açan tüm süreçler tek bir page-cache kopyasını paylaşır (feature store gibi).
+    """
+    paths = {}
+    for array in arrays:
+        if id(array) not in paths:
+            paths[id(array)] = os.path.join(work_dir, f"matrix_{len(paths)}.npy")
+            np.save(paths[id(array)], np.ascontiguousarray(array))
+    return paths
+
+def _report_metrics(y_test, y_pred, y_proba):
+    # Calculate metrics
+    metrics = {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, zero_division=0),
+        "recall": recall_score(y_test, y_pred, zero_division=0),
+        "f1": f1_score(y_test, y_pred, zero_division=0),
+        "roc_auc": roc_auc_score(y_test, y_proba)
+    }
+    
+    print("  📈 Metrics:", {k: f"{v:.3f}" for k, v in metrics.items()})
+    print("  📊 Classification Report:")
+    print(classification_report(y_test, y_pred, zero_division=0))
+    
+    # Confusion matrix
+    cm = confusion_matrix(y_test, y_pred)
+    print(f"  🎯 Confusion Matrix:\n{cm}")
+    return metrics
+
+def evaluate_models(X_train, y_train, X_test, y_test, use_xgb=has_xgb, parallel=True, cpu_budget=None,
+                    time_budgets=None, model_params=None):
+    """
+    parallel=True: aday modeller ayrı süreçlerde aynı anda eğitilir, ortak cpu_budget
+    (varsayılan: tüm çekirdekler) MODEL_COST_WEIGHTS'e göre paylaştırılır.
+    time_budgets: saniye cinsinden süre sınırı; tek sayı (tüm modeller) veya {model_adı: saniye}.
+    Süresi dolan model bırakılır ve results'ta status="timed_out" olarak işaretlenir.
+    model_params: build_candidate_models'a aktarılır (hiperparametre araması sonuçları).
+    NaN'ı yerel işleyen modeller (NAN_NATIVE_MODELS) imputasyonsuz ham özelliklerle eğitilir;
+    bunların ön işleyicisi results[ad]["preproc"] içinde döner.
+    """
+    print("\n🤖 TRAINING MODELS...")
+    
+    # Preprocessing pipeline: impute median + scale
+    preproc = make_preprocessor()
+
+    # Dönüştürülmüş matrisler yeni DataFrame'lere kopyalanmaz, doğrudan float32 dizi olarak kullanılır
+    X_train_pp = preproc.fit_transform(X_train)
+    X_test_pp = preproc.transform(X_test)
+
+    models = build_candidate_models(use_xgb, model_params)
+
+    # Ham (NaN içeren) matrisler sadece onları kullanacak bir model varsa hazırlanır
+    matrices = {name: (preproc, X_train_pp, X_test_pp) for name in models}
+    native = [name for name, model in models.items() if _handles_nan(model)]
+    if native:
+        raw_preproc = make_passthrough_preprocessor()
+        X_train_raw = raw_preproc.fit_transform(X_train)
+        X_test_raw = raw_preproc.transform(X_test)
+        for name in native:
+            matrices[name] = (raw_preproc, X_train_raw, X_test_raw)
+    if not parallel:
+        # Sıralı modda her model bütçenin tamamını kullanır
+        allocation = {name: (cpu_budget or -1) if _uses_threads(m) else 1 for name, m in models.items()}
+    else:
+        allocation = allocate_threads(models, cpu_budget)
     for name, model in models.items():
-        print(f"\n🔍 Training & evaluating: {name}")
-        model.fit(X_train_pp, y_train)
-        y_pred = model.predict(X_test_pp)
-        y_proba = model.predict_proba(X_test_pp)[:,1] if hasattr(model, "predict_proba") else model.decision_function(X_test_pp)
-        
-        # Calculate metrics
-        metrics = {
-            "accuracy": accuracy_score(y_test, y_pred),
-            "precision": precision_score(y_test, y_pred, zero_division=0),
-            "recall": recall_score(y_test, y_pred, zero_division=0),
-            "f1": f1_score(y_test, y_pred, zero_division=0),
-            "roc_auc": roc_auc_score(y_test, y_proba)
-        }
-        
-        print("  📈 Metrics:", {k: f"{v:.3f}" for k, v in metrics.items()})
-        print("  📊 Classification Report:")
-        print(classification_report(y_test, y_pred, zero_division=0))
-        
-        # Confusion matrix
-        cm = confusion_matrix(y_test, y_pred)
-        print(f"  🎯 Confusion Matrix:\n{cm}")
-        
-        results[name] = {"model": model, "metrics": metrics}
+        if "n_jobs" in model.get_params():
+            model.set_params(n_jobs=allocation[name])
+    print("🧮 Thread allocation:", allocation)
+
+    if not isinstance(time_budgets, dict):
+        time_budgets = {name: time_budgets for name in models}
+
+    results = {}
+    if not parallel:
+        for name, model in models.items():
+            print(f"\n🔍 Training & evaluating: {name}")
+            model_preproc, X_fit, X_eval = matrices[name]
+            model, y_pred, y_proba, fit_seconds = _fit_candidate(name, model, X_fit, y_train, X_eval,
+                                                                 allocation[name])
+            metrics = _report_metrics(y_test, y_pred, y_proba)
+            results[name] = {"model": model, "metrics": metrics, "status": "ok", "preproc": model_preproc,
+                             "fit_seconds": fit_seconds, "n_jobs": allocation[name]}
+        return results, preproc
+
+    # Paralel mod: her model bir işçi süreçte; sonuçlar model sırasıyla toplanır ve raporlanır.
+    # Matrisler işçilere kopyalanmaz (pickle): geçici .npy dosyalarından bellek eşlemeli açılır,
+    # bellek kullanımı işçi sayısıyla büyümez.
+    work_dir = tempfile.mkdtemp(prefix="exoplanet_eval_")
+    y_train = np.asarray(y_train)
+    shared = _share_arrays([y_train] + [array for _, X_fit, X_eval in matrices.values() for array in (X_fit, X_eval)],
+                           work_dir)
+    pool = multiprocessing.Pool(processes=len(models))
+    timed_out = False
+    try:
+        start = time.monotonic()
+        settings = collector_settings()
+        pending = {name: pool.apply_async(call_collecting, (settings, _fit_candidate_mapped, name, model,
+                                                            shared[id(matrices[name][1])], shared[id(y_train)],
+                                                            shared[id(matrices[name][2])], allocation[name]))
+                   for name, model in models.items()}
+        for name, async_result in pending.items():
+            print(f"\n🔍 Training & evaluating: {name} (n_jobs={allocation[name]})")
+            budget = time_budgets.get(name)
+            timeout = None if budget is None else max(0.0, budget - (time.monotonic() - start))
+            try:
+                (model, y_pred, y_proba, fit_seconds), records = async_result.get(timeout=timeout)
+                _merge_stage_records(records)
+            except multiprocessing.TimeoutError:
+                timed_out = True
+                print(f"  ⏰ {name} exceeded its {budget:g}s budget - abandoned")
+                results[name] = {"model": None, "metrics": {}, "status": "timed_out", "preproc": matrices[name][0],
+                                 "fit_seconds": budget, "n_jobs": allocation[name]}
+                continue
+            metrics = _report_metrics(y_test, y_pred, y_proba)
+            results[name] = {"model": model, "metrics": metrics, "status": "ok", "preproc": matrices[name][0],
+                             "fit_seconds": fit_seconds, "n_jobs": allocation[name]}
+    finally:
+        # Süresi dolan işler hâlâ çalışıyor olabilir: havuzu sonlandır
+        if timed_out:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+        shutil.rmtree(work_dir, ignore_errors=True)
     
     return results, preproc
 
+# ---------------------------
+# 8b) K-fold cross-validation with cached per-fold preprocessing
+# ---------------------------
+def _score_predictions(y_true, y_pred, y_proba):
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "f1": f1_score(y_true, y_pred, zero_division=0),
+        "roc_auc": roc_auc_score(y_true, y_proba)
+    }
+
+def _prepare_fold(train_idx, test_idx, X, y):
+    """Kat başına imputer+scaler bir kez fit edilir; dönüştürülmüş matrisler tüm modellerce paylaşılır"""
+    preproc = make_preprocessor()
+    X_train_pp = preproc.fit_transform(X[train_idx]).astype(np.float32, copy=False)
+    X_test_pp = preproc.transform(X[test_idx]).astype(np.float32, copy=False)
+    return X_train_pp, y[train_idx], X_test_pp, y[test_idx]
+
+def _fit_fold(name, model, fold, X_train_pp, y_train, X_test_pp, y_test):
+    _, y_pred, y_proba, fit_seconds = _fit_candidate(name, model, X_train_pp, y_train, X_test_pp, n_threads=1)
+    metrics = _score_predictions(y_test, y_pred, y_proba)
+    metrics["fit_seconds"] = fit_seconds
+    return name, fold, metrics
+
+def cross_validate_models(X, y, n_splits=5, use_xgb=has_xgb, n_jobs=-1, random_state=42, models=None,
+                          model_params=None):
+    """
+    Stratified k-fold değerlendirme.
+      1) Her kat için ön işleme bir kez yapılır (katlar paralel), dönüştürülmüş matrisler önbellekte tutulur
+      2) Tüm (model, kat) işleri aynı önbelleklenmiş matrisleri kullanarak paralel çalışır
+         (joblib büyük dizileri işçilere memmap ile paylaştırır, kopyalamaz)
+    Dönen sözlük: {model: {"metrics": ortalama, "metrics_std": std, "fold_metrics": [...]}}
+    """
+    print(f"\n🔁 {n_splits}-FOLD CROSS-VALIDATION...")
+    X_arr = np.ascontiguousarray(np.asarray(X, dtype=np.float32))
+    y_arr = np.asarray(y)
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    splits = list(skf.split(X_arr, y_arr))
+
+    with Parallel(n_jobs=n_jobs) as parallel:
+        folds = parallel(
+            delayed(_prepare_fold)(train_idx, test_idx, X_arr, y_arr)
+            for train_idx, test_idx in splits
+        )
+        print(f"  ✅ Preprocessed {len(folds)} folds once (shared by every model)")
+
+        models = models if models is not None else build_candidate_models(use_xgb, model_params)
+        # Dış paralellik katlar üzerinde: modeller içeride tek thread ile çalışır (aşırı abonelik yok)
+        for model in models.values():
+            if "n_jobs" in model.get_params():
+                model.set_params(n_jobs=1)
+
+        def fold_inputs(model, fold):
+            # NaN'ı yerel işleyen modeller imputasyonsuz ham kat dilimlerini alır
+            if _handles_nan(model):
+                train_idx, test_idx = splits[fold]
+                return X_arr[train_idx], y_arr[train_idx], X_arr[test_idx], y_arr[test_idx]
+            return folds[fold]
+
+        fold_results = parallel(
+            delayed(_fit_fold)(name, clone(model), fold, *fold_inputs(model, fold))
+            for name, model in models.items()
+            for fold in range(len(folds))
+        )
+
+    cv_results = {}
+    for name in models:
+        fold_metrics = [m for n, _, m in sorted(fold_results, key=lambda r: r[1]) if n == name]
+        frame = pd.DataFrame(fold_metrics)
+        cv_results[name] = {
+            "metrics": frame.mean().to_dict(),
+            "metrics_std": frame.std(ddof=1).to_dict(),
+            "fold_metrics": fold_metrics,
+        }
+        mean, std = cv_results[name]["metrics"], cv_results[name]["metrics_std"]
+        print(f"  📈 {name}: ROC-AUC {mean['roc_auc']:.3f} ± {std['roc_auc']:.3f}, "
+              f"F1 {mean['f1']:.3f} ± {std['f1']:.3f}")
+    return cv_results
+
 # ---------------------------
 # 9) Choose best model by roc_auc and save it
 # ---------------------------
-def select_and_save_best(results, preproc, X_columns, out_dir="models", metric="roc_auc"):
+def select_and_save_best(results, preproc, X_columns, out_dir="models", metric="roc_auc", cv_results=None,
+                         data_hash=None):
     print(f"\n💾 SELECTING AND SAVING BEST MODEL...")
     os.makedirs(out_dir, exist_ok=True)
     
-    # select best
+    # select best (cv_results verilirse k-fold ortalamasına göre; kaydedilen model yine results'takidir)
     best_name = None
     best_score = -np.inf
     for name, info in results.items():
-        s = info["metrics"].get(metric, -np.inf)
+        if info.get("model") is None:
+            continue
+        scores = cv_results[name]["metrics"] if cv_results and name in cv_results else info["metrics"]
+        s = scores.get(metric, -np.inf)
         if s is None:
             s = -np.inf
         if s > best_score:
             best_score = s
             best_name = name
     
-    print("🎯 BEST MODEL:", best_name, "score:", f"{best_score:.3f}")
+    if best_name is None:
+        raise ValueError("No model finished training (all candidates timed out?)")
+    print("🎯 BEST MODEL:", best_name, "score:", f"{best_score:.3f}", "(cv mean)" if cv_results else "")
     best_model = results[best_name]["model"]
+    # NaN'ı yerel işleyen model kazandıysa kendi (imputasyonsuz) ön işleyicisi kaydedilir
+    best_preproc = results[best_name].get("preproc", preproc)
 
     # Save pipeline components: preproc, model, feature list
     joblib.dump(best_model, os.path.join(out_dir, "best_model.pkl"))
-    joblib.dump(preproc, os.path.join(out_dir, "preprocessor.pkl"))
+    joblib.dump(best_preproc, os.path.join(out_dir, "preprocessor.pkl"))
     joblib.dump(list(X_columns), os.path.join(out_dir, "feature_list.pkl"))
     
     print("✅ Saved to models/ directory:")
     print("   - best_model.pkl")
     print("   - preprocessor.pkl") 
     print("   - feature_list.pkl")
+
+    # Ağaç modelleri servis için düz dizilere derlenir (bkz. tree_engine.py)
+    export_flat_model(best_model, out_dir)
+    # Tek dosyalık, manifestli paket (bkz. model_bundle.py)
+    write_model_bundle(
+        out_dir, keep_manifest=False, model_name=best_name, metric=metric, score=float(best_score),
+        metrics={k: float(v) for k, v in results[best_name]["metrics"].items()},
+        cv_metrics=({k: float(v) for k, v in cv_results[best_name]["metrics"].items()}
+                    if cv_results and best_name in cv_results else None),
+        data_hash=data_hash,
+    )
     
     # Show feature importance if available
     if hasattr(best_model, "feature_importances_"):
@@ -378,42 +987,156 @@ def select_and_save_best(results, preproc, X_columns, out_dir="models", metric="
     
     return best_name, best_score
 
+# Modelin hiç görmediği test satırları: warm start güncellemeleri bunlarla karşılaştırılır (in-sample olmasın)
+HOLDOUT_FILE = "holdout_set.pkl"
+
+def row_fingerprints(X):
+    """Satır başına özellik değerlerinin özeti (float32): aynı satırı farklı tablolarda tanımak için"""
+    return pd.util.hash_pandas_object(X.astype(np.float32), index=False).to_numpy()
+
+def save_holdout_set(X_test, y_test, out_dir="models"):
+    holdout = pd.DataFrame(np.asarray(X_test, dtype=np.float32), columns=list(X_test.columns))
+    holdout["label"] = np.asarray(y_test, dtype=np.int8)
+    path = os.path.join(out_dir, HOLDOUT_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    holdout.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+    print(f"   - {HOLDOUT_FILE} ({len(holdout):,} held-out rows)")
+    return path
+
+def load_holdout_set(out_dir="models"):
+    path = os.path.join(out_dir, HOLDOUT_FILE)
+    return pd.read_pickle(path) if os.path.exists(path) else None
+
+# Warm start'ın delta referansı: kaydedilmiş modelin gördüğü katalogların materyalize hali
+MATERIALIZED_STATE = "models/materialized_dataset.pkl"
+
+def catalog_identity(*paths):
+    """Katalog dosyalarının [boyut, mtime_ns] kimliği (eğitim sırasında değişip değişmediğini anlamak için)"""
+    return {p: file_identity(p) for p in paths if p is not None and os.path.exists(p)}
+
+def stage_snapshot(koi_path, toi_path, k2_path, state_path=MATERIALIZED_STATE):
+    """
+    Katalogların yeni materyalize halini state_path'in yanına (<state_path>.staged) yaz ve yolunu döndür.
+    Mevcut durum kopyalanıp artımlı güncellenir (sadece değişen satırlar işlenir). Yayın commit_snapshot ile,
+    ancak bu satırları görmüş model best_model.pkl olarak kaydedildikten sonra yapılır.
+    """
+    staged_path = state_path + ".staged"
+    if os.path.exists(state_path):
+        shutil.copyfile(state_path, staged_path)
+    elif os.path.exists(staged_path):
+        os.remove(staged_path)
+    build_combined_dataset(koi_path=koi_path, toi_path=toi_path, k2_path=k2_path, incremental_state=staged_path)
+    return staged_path
+
+def commit_snapshot(staged_path, state_path=MATERIALIZED_STATE):
+    os.replace(staged_path, state_path)
+    print(f"📌 Snapshot recorded: {state_path}")
+
+def save_training_snapshot(koi_path, toi_path, k2_path, loaded_identity, state_path=MATERIALIZED_STATE):
+    """
+    best_model.pkl kaydedilirken eğitimde kullanılan katalogların snapshot'ını yaz: eğitimden sonra gelen satırlar
+    ilk warm start'ta da delta sayılır. Kataloglar eğitim sırasında değiştiyse snapshot yazılmaz ve eskisi silinir
+    (hangi satırları modelin gördüğü bilinmez; warm start tam eğitim ister).
+    """
+    if catalog_identity(koi_path, toi_path, k2_path) != loaded_identity:
+        print("⚠️ Catalogs changed during training - no warm-start snapshot, retrain to enable warm start")
+        if os.path.exists(state_path):
+            os.remove(state_path)
+        return None
+    commit_snapshot(stage_snapshot(koi_path, toi_path, k2_path, state_path), state_path)
+    return state_path
+
 # ---------------------------
 # 10) Workflow main
 # ---------------------------
+# Hiperparametre araması için toplam CPU saniyesi
+SEARCH_CPU_BUDGET_SECONDS = 600
+
 if __name__ == "__main__":
+    # Aşama ölçümü (süre, tepe RSS, satır) -> profiles/run_report.json
+    # EXOPLANET_PROFILE_STAGES="fit:*" ve EXOPLANET_PROFILER=cprofile|sampling ile aşama profili
+    profiler = activate(profiler_from_env())
+    status = "ok"
     try:
         print("🚀 EXOPLANET DETECTION PIPELINE - GÜNCELLENMİŞ")
         print("=" * 60)
         
         # 1-2) build dataset - CANDIDATE'ler DAHIL
-        X_all, y_all = build_combined_dataset(
-            koi_path=koi_path, 
-            toi_path=toi_path, 
-            k2_path=k2_path, 
-            drop_candidates=False  # CANDIDATE'ler DAHIL
-        )
+        with stage("build_combined_dataset") as record:
+            loaded_catalogs = catalog_identity(koi_path, toi_path, k2_path)
+            X_all, y_all, missions_all = build_combined_dataset(
+                koi_path=koi_path, 
+                toi_path=toi_path, 
+                k2_path=k2_path, 
+                drop_candidates=False,  # CANDIDATE'ler DAHIL
+                n_jobs=-1,              # KOI/TOI/K2 paralel yüklenir
+                return_missions=True,
+                dedup=DEDUP_MODE        # aynı nesne birden çok katalogda ise KOI > K2 > TOI önceliğiyle tek kayıt
+            )
+            record["rows"] = len(X_all)
+
+        # Fiziksel türetilmiş özellikler (vektörel; aynı girdiler için .derived_cache/'den okunur)
+        with stage("add_derived_features", rows=len(X_all)):
+            X_all = add_derived_features(X_all)
+
+        # Feature store: float32 memmap bir kez yazılır, eğitim sıfır kopya ile okur
+        with stage("feature_store", rows=len(X_all)):
+            write_feature_store(X_all, y_all, missions=missions_all, store_dir=FEATURE_STORE_DIR)
+            X_all, y_all, store_schema = load_feature_store(FEATURE_STORE_DIR)
 
         # 3) split + preprocessing
-        X_train, X_test, y_train, y_test = preprocess_and_split(X_all, y_all, test_size=0.2)
+        with stage("preprocess_and_split", rows=len(X_all)):
+            X_train, X_test, y_train, y_test = preprocess_and_split(X_all, y_all, test_size=0.2)
 
-        # 4) train & evaluate
-        results, preproc = evaluate_models(X_train, y_train, X_test, y_test)
+        # 3b) successive halving ile hiperparametre araması (sadece eğitim verisi, CPU bütçeli)
+        with stage("hyperparameter_search", rows=len(X_train)):
+            search_models = build_candidate_models()
+            search = successive_halving_search(
+                search_models, X_train, y_train, preprocessors=search_preprocessors(search_models),
+                cpu_budget_seconds=SEARCH_CPU_BUDGET_SECONDS, out_dir="models"
+            )
+
+        # 4) train & evaluate (model başına fit:<ad> / predict:<ad> aşamaları işçilerden toplanır)
+        with stage("evaluate_models", rows=len(X_train)):
+            results, preproc = evaluate_models(X_train, y_train, X_test, y_test,
+                                               model_params=search["model_params"])
+
+        # 4b) model seçimi için 5-fold CV (ön işleme kat başına bir kez)
+        with stage("cross_validate_models", rows=len(X_train)):
+            cv_results = cross_validate_models(X_train, y_train, n_splits=5, model_params=search["model_params"])
 
         # 5) select & save best
-        best_name, best_score = select_and_save_best(results, preproc, X_train.columns, out_dir="models")
+        with stage("save"):
+            best_name, best_score = select_and_save_best(results, preproc, X_train.columns, out_dir="models",
+                                                          cv_results=cv_results,
+                                                          data_hash=data_fingerprint(X_train, y_train))
+            save_holdout_set(X_test, y_test, out_dir="models")
+            # Warm start'ın delta referansı modelle birlikte (sonra gelen satırlar ilk warm start'ta yeni sayılır)
+            save_training_snapshot(koi_path, toi_path, k2_path, loaded_catalogs)
+
+        # 5b) sıkıştırma: ROC-AUC toleransı içindeki en küçük varyant best_model.pkl olarak kalır
+        with stage("compress", rows=len(X_test)):
+            compressed_variant, compression_report = compress_saved_model(X_train, y_train, X_test, y_test,
+                                                                           out_dir="models")
 
         print("\n🎉 PIPELINE COMPLETED SUCCESSFULLY!")
         print("=" * 50)
         print(f"📊 FINAL RESULTS:")
         print(f"   • Total Records: {len(X_all):,}")
-        print(f"   • Best Model: {best_name}")
+        print(f"   • Best Model: {best_name} ({compressed_variant})")
         print(f"   • ROC-AUC Score: {best_score:.3f}")
         print(f"   • Features Used: {X_train.shape[1]}")
         print(f"   • Planet/Non-Planet Ratio: {y_all.mean():.1%}")
         print("\n✅ Model ready for mobile app integration!")
     
     except Exception as e:
+        status = f"error: {e}"
         print(f"❌ Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+
+    finally:
+        deactivate()
+        profiler.print_summary()
+        profiler.write_report(status=status)
@@ -0,0 +1,112 @@
+# feature_store.py
+# Birleşik eğitim verisi için bellek eşlemeli (memory-mapped), bitişik float32 özellik deposu
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+FEATURE_STORE_DIR = "feature_store"
+STORE_VERSION = 1
+
+X_FILE = "X.npy"
+Y_FILE = "y.npy"
+MISSION_FILE = "mission.npy"
+NAN_MASK_FILE = "nan_mask.npy"
+SCHEMA_FILE = "schema.json"
+
+
+def _replace_npy(path, array):
+    tmp_path = f"{path}.{os.getpid()}.tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def write_feature_store(X, y, missions=None, store_dir=FEATURE_STORE_DIR):
+    """
+    X_all / y_all'ı bir kez diske yaz:
+      X.npy        (satır, özellik) float32, C-bitişik -> np.load(mmap_mode='r') ile sıfır kopya okunur
+      y.npy        int8 etiketler
+      mission.npy  int8 görev kodu (schema'daki mission_names sırasıyla)
+      nan_mask.npy satır başına paketlenmiş NaN bitleri (özellik sırasıyla)
+      schema.json  özellik sırası, satır sayısı, eksik değer sayıları, görev dağılımı
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    features = list(X.columns)
+    n_rows = len(X)
+
+    # Önce geçici dosyaya yaz, sonra atomik olarak yerine koy (okuyan süreçler yarım dosya görmez)
+    x_path = os.path.join(store_dir, X_FILE)
+    tmp_path = f"{x_path}.{os.getpid()}.tmp.npy"
+    X_mm = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32, shape=(n_rows, len(features)))
+    X_mm[:] = X.to_numpy(dtype=np.float32)
+    X_mm.flush()
+    nan_mask = np.isnan(X_mm)
+    del X_mm
+    os.replace(tmp_path, x_path)
+
+    _replace_npy(os.path.join(store_dir, Y_FILE), np.asarray(y, dtype=np.int8))
+    _replace_npy(os.path.join(store_dir, NAN_MASK_FILE), np.packbits(nan_mask, axis=1, bitorder='little'))
+
+    mission_names = []
+    if missions is not None:
+        missions = pd.Series(missions, dtype="category")
+        mission_names = [str(m) for m in missions.cat.categories]
+        _replace_npy(os.path.join(store_dir, MISSION_FILE), missions.cat.codes.to_numpy(dtype=np.int8))
+
+    schema = {
+        "version": STORE_VERSION,
+        "features": features,
+        "rows": n_rows,
+        "dtype": "float32",
+        "missing_counts": dict(zip(features, nan_mask.sum(axis=0).astype(int).tolist())),
+        "mission_names": mission_names,
+        "mission_counts": (missions.value_counts().astype(int).to_dict() if missions is not None else {}),
+        "label_counts": {str(k): int(v) for k, v in pd.Series(np.asarray(y)).value_counts().items()},
+    }
+    schema_path = os.path.join(store_dir, SCHEMA_FILE)
+    with open(f"{schema_path}.{os.getpid()}.tmp", 'w', encoding='utf-8') as f:
+        json.dump(schema, f, indent=2)
+    os.replace(f"{schema_path}.{os.getpid()}.tmp", schema_path)
+
+    print(f"💾 Feature store written: {store_dir}/ ({n_rows:,} x {len(features)} float32, "
+          f"{os.path.getsize(x_path) / 1024**2:.1f} MB)")
+    return schema
+
+
+def read_store_schema(store_dir=FEATURE_STORE_DIR):
+    with open(os.path.join(store_dir, SCHEMA_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_feature_store(store_dir=FEATURE_STORE_DIR, as_frame=True):
+    """
+    Depoyu sıfır kopya ile aç. Aynı dosyayı açan tüm süreçler tek bir page-cache kopyasını paylaşır.
+    as_frame=True: X salt-okunur memmap üzerinde bir DataFrame görünümü olarak döner.
+    (X, y, schema) döndürür.
+    """
+    schema = read_store_schema(store_dir)
+    X = np.load(os.path.join(store_dir, X_FILE), mmap_mode='r')
+    y = np.load(os.path.join(store_dir, Y_FILE), mmap_mode='r')
+
+    if as_frame:
+        X = pd.DataFrame(X, columns=schema["features"], copy=False)
+        y = pd.Series(y, name="label", copy=False)
+    return X, y, schema
+
+
+def load_missions(store_dir=FEATURE_STORE_DIR):
+    """Görev kökenini isim dizisi olarak döndür (depo görevsiz yazıldıysa None)"""
+    schema = read_store_schema(store_dir)
+    path = os.path.join(store_dir, MISSION_FILE)
+    if not schema["mission_names"] or not os.path.exists(path):
+        return None
+    codes = np.load(path, mmap_mode='r')
+    return pd.Categorical.from_codes(codes, categories=schema["mission_names"])
+
+
+def load_nan_mask(store_dir=FEATURE_STORE_DIR):
+    """Paketlenmiş NaN maskesini (satır, özellik) bool dizisine aç"""
+    schema = read_store_schema(store_dir)
+    packed = np.load(os.path.join(store_dir, NAN_MASK_FILE), mmap_mode='r')
+    return np.unpackbits(packed, axis=1, count=len(schema["features"]), bitorder='little').astype(bool)
@@ -0,0 +1,114 @@
+# fused_scoring.py
+# Servis için birleşik skorlama yolu: girdi doğrudan kayıtlı özellik sırasında bitişik bir float diziye yazılır,
+# imputasyon + ölçekleme yerinde uygulanır, etiket ve olasılık tek predict_proba çağrısından alınır
+# (DataFrame kurma / sütun ekleme / reindex ve modelin iki kez değerlendirilmesi yok)
+
+import numpy as np
+import pandas as pd
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+from derived_features import DERIVED_FEATURES, DERIVED_INPUTS, compute_derived
+
+
+def _to_float(value):
+    if value is None:
+        return np.nan
+    return float(value)
+
+
+class FusedScorer:
+    """
+    preprocessor.pkl'deki adımları (SimpleImputer -> StandardScaler veya float32 geçişi) sabit dizilere indirger.
+    Bilinmeyen bir ön işleyicide preprocessor.transform'a düşer; skorlama yine tek predict_proba çağrısıdır.
+    """
+
+    def __init__(self, preprocessor, scorer, features):
+        self.preprocessor = preprocessor
+        self.scorer = scorer
+        self.features = list(features)
+        # Modelin beklediği türetilmiş özellikler eğitimdeki compute_derived ile hesaplanır (girdiden okunmaz)
+        self.derived = [(i, name) for i, name in enumerate(self.features) if name in DERIVED_FEATURES]
+        self.classes_ = np.asarray(getattr(scorer, "classes_", [0, 1]))
+        self.dtype = np.float64
+        self.steps = self._compile(preprocessor)
+
+    def _compile(self, preprocessor):
+        """[(işlem, dizi), ...] veya desteklenmeyen adım varsa None"""
+        steps = preprocessor.steps if isinstance(preprocessor, Pipeline) else [(None, preprocessor)]
+        compiled = []
+        for _, step in steps:
+            if isinstance(step, SimpleImputer):
+                fill = np.asarray(step.statistics_, dtype=np.float64)
+                # Eğitimde tamamen boş sütunlar imputer tarafından atılır: sütun sayısı değişir
+                if step.strategy not in ("mean", "median", "constant") or step.add_indicator or np.isnan(fill).any():
+                    return None
+                compiled.append(("impute", fill))
+            elif isinstance(step, StandardScaler):
+                if step.with_mean:
+                    compiled.append(("center", np.asarray(step.mean_, dtype=np.float64)))
+                if step.with_std:
+                    compiled.append(("scale", np.asarray(step.scale_, dtype=np.float64)))
+            elif isinstance(step, FunctionTransformer) and step.func is np.asarray:
+                # make_passthrough_preprocessor: sadece float32'ye çevirme
+                self.dtype = np.dtype((step.kw_args or {}).get("dtype", np.float64))
+            else:
+                return None
+        return compiled
+
+    @property
+    def fused(self):
+        return self.steps is not None
+
+    # ---------------------------
+    # Girdi
+    # ---------------------------
+    @staticmethod
+    def _columns(data, names):
+        if isinstance(data, pd.DataFrame):
+            return data.reindex(columns=names).to_numpy(dtype=np.float64, copy=True)
+        X = np.empty((len(data), len(names)), dtype=np.float64)
+        for i, record in enumerate(data):
+            X[i] = [_to_float(record.get(name)) for name in names]
+        return X
+
+    def to_array(self, data):
+        """Tek kayıt (dict), kayıt listesi veya DataFrame -> (satır, özellik) float dizi; eksik özellikler NaN"""
+        if isinstance(data, dict):
+            data = [data]
+        X = self._columns(data, self.features)
+        if self.derived:
+            inputs = self._columns(data, DERIVED_INPUTS)
+            derived = compute_derived(dict(zip(DERIVED_INPUTS, inputs.T)))
+            for i, name in self.derived:
+                X[:, i] = derived[name]
+        return X
+
+    def transform(self, X):
+        """Ön işlemeyi X üzerinde yerinde uygula (X bu sınıfın ürettiği bir kopya olmalı)"""
+        if self.steps is None:
+            return self.preprocessor.transform(pd.DataFrame(X, columns=self.features))
+        for op, values in self.steps:
+            if op == "impute":
+                np.copyto(X, values, where=np.isnan(X))
+            elif op == "center":
+                X -= values
+            else:
+                X /= values
+        return X if X.dtype == self.dtype else X.astype(self.dtype)
+
+    # ---------------------------
+    # Skorlama
+    # ---------------------------
+    def score_array(self, X):
+        """Ön işlenmemiş dizi -> (etiketler, pozitif sınıf olasılıkları); model tek kez değerlendirilir"""
+        proba = self.scorer.predict_proba(self.transform(X))
+        return self.classes_[np.argmax(proba, axis=1)], proba[:, 1]
+
+    def score(self, data):
+        return self.score_array(self.to_array(data))
+
+    def score_one(self, record):
+        """Tek kayıt -> (etiket, pozitif sınıf olasılığı)"""
+        labels, probabilities = self.score(record)
+        return labels[0], float(probabilities[0])
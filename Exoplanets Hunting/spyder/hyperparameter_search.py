@@ -0,0 +1,210 @@
+# hyperparameter_search.py
+# Successive halving ile bütçeli hiperparametre araması
+# (ucuz konfigürasyonlar küçük veri alt kümelerinde elenir, sadece iyiler tüm veriye terfi eder)
+
+import json
+import math
+import os
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+# Model başına arama uzayları (build_candidate_models'taki isimlerle aynı)
+SEARCH_SPACES = {
+    "LogisticRegression": {
+        "C": [0.01, 0.03, 0.1, 0.3, 1.0, 3.0, 10.0, 30.0],
+        "penalty": ["l1", "l2"],
+        "class_weight": [None, "balanced"],
+    },
+    "RandomForest": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 8, 12, 16, 24],
+        "min_samples_leaf": [1, 2, 4, 8],
+        "max_features": ["sqrt", 0.5, 0.8],
+    },
+    "HistGradientBoosting": {
+        "learning_rate": [0.03, 0.05, 0.1, 0.2],
+        "max_leaf_nodes": [15, 31, 63, 127],
+        "min_samples_leaf": [10, 20, 50, 100],
+        "l2_regularization": [0.0, 0.1, 1.0],
+    },
+    "XGBoost": {
+        "n_estimators": [100, 200, 400, 800],
+        "max_depth": [3, 4, 6, 8],
+        "learning_rate": [0.03, 0.1, 0.3],
+        "subsample": [0.7, 0.85, 1.0],
+        "colsample_bytree": [0.7, 0.85, 1.0],
+    },
+}
+
+BEST_PARAMS_FILE = "best_params.json"
+
+
+def sample_configurations(base_models, n_candidates, spaces=SEARCH_SPACES, random_state=42):
+    """Her model için arama uzayından n_candidates farklı konfigürasyon çek"""
+    rng = np.random.default_rng(random_state)
+    configs = []
+    for name in base_models:
+        space = spaces.get(name)
+        if not space:
+            configs.append((name, {}))
+            continue
+        seen = set()
+        grid_size = math.prod(len(values) for values in space.values())
+        while len(seen) < min(n_candidates, grid_size):
+            params = {key: values[rng.integers(len(values))] for key, values in space.items()}
+            key = tuple(sorted((k, repr(v)) for k, v in params.items()))
+            if key not in seen:
+                seen.add(key)
+                configs.append((name, params))
+    return configs
+
+
+def successive_halving_search(base_models, X_train, y_train, X_val=None, y_val=None,
+                              n_candidates=9, eta=3, min_samples=1000, cpu_budget_seconds=600,
+                              spaces=SEARCH_SPACES, random_state=42, out_dir=None, preprocessors=None):
+    """
+    Tüm modellerin konfigürasyonları tek bir successive halving yarışında:
+      rung 0: her konfigürasyon min_samples satırlık katmanlı alt kümede eğitilir
+      her rung'da ROC-AUC'ye göre en iyi 1/eta terfi eder, veri eta katına çıkar
+      son rung tüm eğitim verisini kullanır.
+    cpu_budget_seconds: toplam süreç CPU süresi (tüm thread'ler dahil). Her fit'ten önce maliyeti tahmin edilir
+    (konfigürasyonun önceki rung'daki CPU süresi x veri büyüme oranı; ilk rung'da aynı modelin satır başı
+    maliyeti); kalan bütçeyi aşacaksa fit başlatılmaz, arama durur ve en yüksek rung'daki en iyi
+    konfigürasyon kazanır.
+    preprocessors: {model_adı: fit edilmemiş ön işleyici} - her model eğitimde/serviste kullanacağı ön işleyiciyle
+    aranır (örn. NaN'ı yerel işleyen modeller için passthrough). Aynı nesneyi paylaşan modeller aynı matrisleri
+    kullanır; ön işleyiciler sadece aramanın eğitim kısmında fit edilir. Verilmezse X_train/X_val önceden
+    ön işlenmiş matrisler olmalıdır.
+    out_dir verilirse sonuç best_params.json olarak (best_model.pkl'nin yanına) yazılır.
+    """
+    X_train = np.asarray(X_train)
+    y_train = np.asarray(y_train)
+    if X_val is None:
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_train, y_train, test_size=0.2, random_state=random_state, stratify=y_train)
+    y_val = np.asarray(y_val)
+
+    # Model adı -> (eğitim, doğrulama) matrisleri; ön işleyici başına bir kez dönüştürülür
+    matrices = {}
+    if preprocessors is None:
+        matrices = {name: (X_train, X_val) for name in base_models}
+    else:
+        transformed = {}
+        for name in base_models:
+            preproc = preprocessors[name]
+            if id(preproc) not in transformed:
+                transformed[id(preproc)] = (np.asarray(preproc.fit_transform(X_train)),
+                                            np.asarray(preproc.transform(np.asarray(X_val))))
+            matrices[name] = transformed[id(preproc)]
+
+    configs = sample_configurations(base_models, n_candidates, spaces, random_state)
+    n_rows = len(X_train)
+    n_rungs = max(1, 1 + int(math.floor(math.log(max(n_rows / min_samples, 1), eta))))
+    print(f"\n🎛️ SUCCESSIVE HALVING: {len(configs)} configs, {n_rungs} rungs, "
+          f"eta={eta}, CPU budget {cpu_budget_seconds:.0f}s")
+
+    # Alt kümeler iç içe: küçük rung'ın satırları büyüğünün içinde.
+    # Her sınıf sıralamaya eşit aralıklarla yayılır, böylece her önek katmanlı bir örneklemdir.
+    rng = np.random.default_rng(random_state)
+    keys = np.empty(n_rows)
+    for c in np.unique(y_train):
+        members = np.flatnonzero(y_train == c)
+        keys[rng.permutation(members)] = (np.arange(len(members)) + rng.random()) / len(members)
+    order = np.argsort(keys, kind="stable")
+
+    cpu_start = time.process_time()
+    history = []
+    survivors = list(range(len(configs)))
+    best = None
+    budget_exhausted = False
+    last_cost = {}   # konfigürasyon -> (CPU saniyesi, satır sayısı) son fit'inde
+
+    def estimated_cost(idx, n_samples, rung):
+        if idx in last_cost:
+            seconds, rows = last_cost[idx]
+            return seconds * n_samples / rows
+        # İlk fit: aynı modelin bu rung'da ölçülen satır başı maliyeti (yoksa bilinmiyor)
+        costs = [e["cpu_seconds"] / e["n_samples"] for e in history
+                 if e["rung"] == rung and e["model"] == configs[idx][0]]
+        return float(np.mean(costs)) * n_samples if costs else 0.0
+
+    for rung in range(n_rungs):
+        n_samples = n_rows if rung == n_rungs - 1 else min(n_rows, int(min_samples * eta ** rung))
+        subset = order[:n_samples]
+        # Alt küme tek sınıflıysa (çok küçük veri) tamamını kullan
+        if len(np.unique(y_train[subset])) < 2:
+            subset = order
+        rung_scores = []
+        for idx in survivors:
+            spent = time.process_time() - cpu_start
+            estimate = estimated_cost(idx, len(subset), rung)
+            if spent + estimate > cpu_budget_seconds:
+                budget_exhausted = True
+                print(f"   ⏰ next fit needs ~{estimate:.1f} CPU-s, "
+                      f"{max(cpu_budget_seconds - spent, 0):.1f} left")
+                break
+            name, params = configs[idx]
+            model = clone(base_models[name]).set_params(**params)
+            X_fit, X_eval = matrices[name]
+            fit_start = time.process_time()
+            try:
+                model.fit(X_fit[subset], y_train[subset])
+                proba = model.predict_proba(X_eval)[:, 1]
+                score = roc_auc_score(y_val, proba)
+            except Exception as e:
+                print(f"   ⚠️ {name} {params}: {e}")
+                score = -np.inf
+            entry = {"rung": rung, "n_samples": int(len(subset)), "model": name, "params": params,
+                     "roc_auc": float(score), "cpu_seconds": time.process_time() - fit_start}
+            history.append(entry)
+            last_cost[idx] = (max(entry["cpu_seconds"], 1e-6), len(subset))
+            rung_scores.append((score, idx, model))
+
+        if not rung_scores:
+            print("   ⏰ CPU budget exhausted - stopping search")
+            break
+        rung_scores.sort(key=lambda item: item[0], reverse=True)
+        top_score, top_idx, top_model = rung_scores[0]
+        best = {"rung": rung, "n_samples": int(len(subset)), "model": configs[top_idx][0],
+                "params": configs[top_idx][1], "roc_auc": float(top_score), "estimator": top_model}
+        print(f"   rung {rung}: {len(rung_scores)} configs on {len(subset):,} rows, "
+              f"best {best['model']} ROC-AUC {top_score:.3f}")
+
+        if budget_exhausted:
+            print("   ⏰ CPU budget exhausted - stopping search")
+            break
+        survivors = [idx for _, idx, _ in rung_scores[:max(1, math.ceil(len(rung_scores) / eta))]]
+
+    if best is None:
+        raise ValueError("CPU budget too small: no configuration was evaluated")
+
+    # Model başına en iyi konfigürasyon (evaluate_models'a model_params olarak verilebilir)
+    per_model = {}
+    for entry in sorted(history, key=lambda e: (e["rung"], e["roc_auc"]), reverse=True):
+        per_model.setdefault(entry["model"], entry)
+
+    result = {
+        "best_model": best["model"],
+        "best_params": best["params"],
+        "best_roc_auc": best["roc_auc"],
+        "best_rung": best["rung"],
+        "best_n_samples": best["n_samples"],
+        "model_params": {name: entry["params"] for name, entry in per_model.items()},
+        "cpu_seconds": time.process_time() - cpu_start,
+        "budget_exhausted": budget_exhausted,
+        "history": history,
+    }
+    print(f"🏆 Search winner: {best['model']} {best['params']} (ROC-AUC {best['roc_auc']:.3f}, "
+          f"{result['cpu_seconds']:.1f} CPU-s)")
+
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, BEST_PARAMS_FILE), 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, default=str)
+        print(f"   ✅ Saved: {os.path.join(out_dir, BEST_PARAMS_FILE)}")
+
+    result["estimator"] = best["estimator"]
+    return result
@@ -7,7 +7,10 @@ import numpy as np
 import os
 import logging
 from datetime import datetime
-import math
+from model_bundle import BUNDLE_FILE, load_serving_artifacts
+from fused_scoring import FusedScorer
+from derived_features import DERIVED_FEATURES, DERIVED_INPUTS, compute_derived
+from prediction_cache import cache_from_env, model_version
 
 # Logging ayarı
 logging.basicConfig(level=logging.INFO)
@@ -20,24 +23,42 @@ CORS(app)
 model = None
 preprocessor = None
 features = None
+manifest = None        # model_bundle.joblib'den yüklendiyse paket manifesti
+scorer = None          # tahminler bunun üzerinden: düz dizi motoru (varsa) veya sklearn modeli
+scorer_backend = None
+fused_scorer = None    # girdi dizisi + yerinde ön işleme + tek predict_proba
+# Tekrarlanan istekler için LRU + TTL tahmin önbelleği (model yeniden yüklenince boşaltılır)
+prediction_cache = cache_from_env()
+
+# "auto": models/flat_model.npz varsa ve güncelse onu kullan, "sklearn": her zaman sklearn modeli
+MODEL_BACKEND = os.environ.get("EXOPLANET_MODEL_BACKEND", "auto")
 
 def load_model():
     """Modeli yükle"""
-    global model, preprocessor, features
+    global model, preprocessor, features, manifest, scorer, scorer_backend, fused_scorer
     try:
         model_path = "models/best_model.pkl"
         preprocessor_path = "models/preprocessor.pkl"
         feature_path = "models/feature_list.pkl"
         
-        if not all(os.path.exists(p) for p in [model_path, preprocessor_path, feature_path]):
+        bundle_path = os.path.join("models", BUNDLE_FILE)
+        
+        if not os.path.exists(bundle_path) and not all(os.path.exists(p) for p in [model_path, preprocessor_path, feature_path]):
             logger.error("❌ Model dosyaları bulunamadı!")
             return False
-            
-        model = joblib.load(model_path)
-        preprocessor = joblib.load(preprocessor_path)
-        features = joblib.load(feature_path)
-        
-        logger.info("✅ Model API için başarıyla yüklendi!")
+
+        # Önce tek dosyalık paket (bellek eşlemeli, doğrulanmış), yoksa üç ayrı pkl
+        artifacts = load_serving_artifacts("models", backend=MODEL_BACKEND)
+        model = artifacts["model"]
+        preprocessor = artifacts["preprocessor"]
+        features = artifacts["features"]
+        manifest = artifacts["manifest"]
+        scorer = artifacts["scorer"]
+        scorer_backend = artifacts["backend"]
+        fused_scorer = FusedScorer(preprocessor, scorer, features)
+        prediction_cache.invalidate(model_version(manifest, model_path))
+        
+        logger.info(f"✅ Model API için başarıyla yüklendi! (backend: {scorer_backend}, kaynak: {artifacts['source']})")
         logger.info(f"📊 Yüklenen özellikler: {features}")
         return True
     except Exception as e:
@@ -49,46 +70,26 @@ print("🔄 Model yükleniyor...")
 load_model()
 
 def calculate_derived_features(data):
-    """YENİ: Türetilmiş özellikler hesapla"""
+    """YENİ: Türetilmiş özellikler hesapla (modelin eğitimde gördüğü derived_features.compute_derived ile aynı)"""
     try:
-        derived = {}
-        
-        # 1. Yaşanabilir bölge mesafesi
-        star_luminosity = (data.get('srad', 1) ** 2) * ((data.get('teq', 288) / 5778) ** 4)
-        habitable_zone_inner = math.sqrt(star_luminosity / 1.1)
-        habitable_zone_outer = math.sqrt(star_luminosity / 0.53)
-        
-        # 2. Gezegenin yaşanabilir bölgede olup olmadığı
-        planet_au = (data.get('period', 365) ** (2/3)) * (data.get('srad', 1) ** (-1/3))
-        in_habitable_zone = habitable_zone_inner <= planet_au <= habitable_zone_outer
-        
-        # 3. Gezegen yoğunluğu tahmini
-        if data.get('prad', 0) > 0:
-            if data.get('prad', 0) < 1.5:
-                density = 5.5  # Kayalık gezegen
-            elif data.get('prad', 0) < 4:
-                density = 2.0  # Mini-Neptün
-            else:
-                density = 1.3  # Gaz devi
-        else:
-            density = 0
-            
-        # 4. Yörünge hızı (km/s)
-        orbital_velocity = 30 * math.sqrt(1/data.get('period', 365)) * math.sqrt(data.get('srad', 1))
-        
-        # 5. Geçiş sinyal gücü
-        transit_signal_strength = (data.get('depth', 0) / 10000) * (data.get('model_snr', 1) / 10)
-        
-        derived.update({
-            'habitable_zone_inner': round(habitable_zone_inner, 3),
-            'habitable_zone_outer': round(habitable_zone_outer, 3),
-            'planet_semi_major_axis': round(planet_au, 3),
-            'in_habitable_zone': in_habitable_zone,
-            'estimated_density': round(density, 2),
-            'orbital_velocity': round(orbital_velocity, 2),
-            'transit_signal_strength': round(transit_signal_strength, 3),
-            'star_luminosity': round(star_luminosity, 3)
-        })
+        # Gösterim için eksik girdilerde varsayılanlar (Güneş benzeri yıldız, 1 yıllık yörünge)
+        defaults = {'srad': 1, 'teq': 288, 'period': 365, 'prad': 0, 'depth': 0, 'model_snr': 1}
+        row = {name: [data.get(name, defaults.get(name, np.nan))] for name in DERIVED_INPUTS}
+        values = {name: float(v[0]) for name, v in compute_derived(row).items()}
+        shown = [name for name in DERIVED_FEATURES if name not in ('in_habitable_zone', 'depth_ror2_ratio', 'duty_cycle')]
+        if not all(np.isfinite(values[name]) for name in shown):
+            raise ValueError("Türetilmiş özellik için geçersiz girdi (sıfır / negatif / eksik değer)")
+        
+        derived = {
+            'habitable_zone_inner': round(values['habitable_zone_inner'], 3),
+            'habitable_zone_outer': round(values['habitable_zone_outer'], 3),
+            'planet_semi_major_axis': round(values['planet_semi_major_axis'], 3),
+            'in_habitable_zone': values['in_habitable_zone'] == 1.0,
+            'estimated_density': round(values['estimated_density'], 2),
+            'orbital_velocity': round(values['orbital_velocity'], 2),
+            'transit_signal_strength': round(values['transit_signal_strength'], 3),
+            'star_luminosity': round(values['star_luminosity'], 3)
+        }
         
         logger.info(f"📈 Türetilmiş özellikler: {derived}")
         return derived
@@ -233,17 +234,8 @@ def predict_exoplanet():
         # YENİ: Türetilmiş özellikler
         derived_features = calculate_derived_features(data)
         
-        # Girdiyi işle
-        input_df = pd.DataFrame([data])
-        for feature in features:
-            if feature not in input_df.columns:
-                input_df[feature] = np.nan
-        input_df = input_df[features]
-        
-        # Tahmin yap
-        processed_data = preprocessor.transform(input_df)
-        prediction = model.predict(processed_data)[0]
-        probability = model.predict_proba(processed_data)[0][1]
+        # Girdiyi işle ve tahmin yap (eksik özellikler NaN, tek predict_proba çağrısı; aynı girdi önbellekten)
+        prediction, probability = prediction_cache.score_one(fused_scorer, data)
         
         is_planet = prediction == 1
         confidence = float(probability)
@@ -406,6 +398,10 @@ def health_check():
     return jsonify({
         'status': 'healthy' if model_status else 'degraded',
         'model_loaded': model_status,
+        'model_backend': scorer_backend,
+        'model_version': prediction_cache.version,   # tahmin önbelleğinin anahtarındaki kimlik
+        'model_created_at': manifest.get('created_at') if manifest else None,
+        'prediction_cache': prediction_cache.stats(),
         'timestamp': datetime.now().isoformat(),
         'message': 'Exoplanet Detection API' if model_status else 'API çalışıyor ama model yüklenemedi',
         'endpoints': {
@@ -453,17 +449,7 @@ def batch_predict():
         for idx, row in df.iterrows():
             try:
                 # Her satır için tahmin yap
-                input_df = pd.DataFrame([row.to_dict()])
-                
-                for feature in features:
-                    if feature not in input_df.columns:
-                        input_df[feature] = np.nan
-                
-                input_df = input_df[features]
-                processed_data = preprocessor.transform(input_df)
-                
-                prediction = model.predict(processed_data)[0]
-                probability = model.predict_proba(processed_data)[0][1]
+                prediction, probability = fused_scorer.score_one(row.to_dict())
                 
                 results.append({
                     'id': idx,
@@ -0,0 +1,157 @@
+# model_bundle.py
+# Model + ön işleyici + özellik listesi + düz dizi motoru tek, sürümlü bir dosyada
+# (manifest ile birbirine ait oldukları doğrulanır; büyük diziler bellek eşlemeli yüklenir)
+
+import hashlib
+import os
+import time
+import joblib
+import numpy as np
+import sklearn
+from tree_engine import FlatForest, load_flat_model, file_sha1, file_identity, source_matches
+
+BUNDLE_FILE = "model_bundle.joblib"
+BUNDLE_VERSION = 1
+
+
+def data_fingerprint(X, y=None, block_rows=100_000):
+    """Eğitim verisinin SHA-1 özeti (float32 değerler + etiketler, satır blokları halinde)"""
+    digest = hashlib.sha1()
+    X = np.asarray(X, dtype=np.float32)
+    digest.update(repr(X.shape).encode("utf-8"))
+    for start in range(0, len(X), block_rows):
+        digest.update(np.ascontiguousarray(X[start:start + block_rows]).tobytes())
+    if y is not None:
+        digest.update(np.ascontiguousarray(np.asarray(y, dtype=np.int8)).tobytes())
+    return digest.hexdigest()
+
+
+def _n_features_in(estimator):
+    if hasattr(estimator, "n_features_in_"):
+        return estimator.n_features_in_
+    # DistilledClassifier gibi sarmalayıcılar
+    inner = getattr(estimator, "regressor", None)
+    return getattr(inner, "n_features_in_", None)
+
+
+def validate_bundle(bundle):
+    """Bileşenlerin birbirine ait olduğunu kontrol et; uyumsuzlukta ValueError"""
+    manifest = bundle["manifest"]
+    features = list(bundle["features"])
+    if manifest.get("bundle_version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported bundle version: {manifest.get('bundle_version')}")
+    if list(manifest["features"]) != features:
+        raise ValueError("Manifest feature order does not match the bundled feature list")
+
+    preproc_names = getattr(bundle["preprocessor"], "feature_names_in_", None)
+    if preproc_names is not None and list(preproc_names) != features:
+        raise ValueError("Preprocessor was fitted on a different feature order")
+    for name in ("preprocessor", "model"):
+        n_in = _n_features_in(bundle[name])
+        if n_in is not None and n_in != len(features):
+            raise ValueError(f"{name} expects {n_in} features, bundle lists {len(features)}")
+
+    flat = bundle.get("flat")
+    if flat is not None and len(flat.feature) and int(flat.feature.max()) >= len(features):
+        raise ValueError("Flat engine references a feature outside the bundled feature list")
+    return True
+
+
+def write_model_bundle(out_dir="models", keep_manifest=True, **manifest_updates):
+    """
+    out_dir'deki best_model.pkl / preprocessor.pkl / feature_list.pkl'den model_bundle.joblib üret.
+    keep_manifest=True: önceki paketin manifesti korunur ve manifest_updates ile güncellenir
+    (sıkıştırma / warm start gibi sonraki adımlar için); yeni eğitimde False.
+    Dosya sıkıştırılmadan yazılır: numpy dizileri yüklemede mmap_mode='r' ile eşlenebilir.
+    """
+    model_path = os.path.join(out_dir, "best_model.pkl")
+    model = joblib.load(model_path)
+    preproc = joblib.load(os.path.join(out_dir, "preprocessor.pkl"))
+    features = list(joblib.load(os.path.join(out_dir, "feature_list.pkl")))
+
+    bundle_path = os.path.join(out_dir, BUNDLE_FILE)
+    manifest = {}
+    if keep_manifest and os.path.exists(bundle_path):
+        try:
+            manifest = dict(joblib.load(bundle_path, mmap_mode='r')["manifest"])
+        except Exception:
+            manifest = {}
+
+    try:
+        flat = FlatForest.from_model(model)
+    except ValueError:
+        flat = None
+
+    manifest.update(manifest_updates)
+    manifest.update({
+        "bundle_version": BUNDLE_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model_class": type(model).__name__,
+        "features": features,
+        "n_features": len(features),
+        "model_sha1": file_sha1(model_path),
+        "model_file": file_identity(model_path),   # [boyut, mtime_ns]: yüklemede hızlı güncellik kontrolü
+        "flat_engine": flat is not None,
+        "sklearn_version": sklearn.__version__,
+    })
+    bundle = {"manifest": manifest, "model": model, "preprocessor": preproc, "features": features, "flat": flat}
+    validate_bundle(bundle)
+
+    tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    joblib.dump(bundle, tmp_path)
+    os.replace(tmp_path, bundle_path)
+    print(f"   ✅ Saved: {bundle_path} ({os.path.getsize(bundle_path) / 1024 ** 2:.1f} MB)")
+    return manifest
+
+
+def load_model_bundle(path, mmap_mode='r', verify_source=True):
+    """
+    Paketi yükle ve doğrula. mmap_mode='r': düz motor dizileri (ve diğer numpy dizileri) sayfa önbelleğinden
+    eşlenir; aynı makinedeki süreçler tek fiziksel kopyayı paylaşır.
+    verify_source: yanında best_model.pkl varsa ve paket ondan üretilmemişse (eski paket) ValueError.
+    Boyut + mtime paketteki kayıtla aynıysa best_model.pkl okunmaz; sadece farklıysa SHA-1 ile karşılaştırılır.
+    """
+    bundle = joblib.load(path, mmap_mode=mmap_mode)
+    validate_bundle(bundle)
+    if verify_source:
+        model_path = os.path.join(os.path.dirname(path) or ".", "best_model.pkl")
+        manifest = bundle["manifest"]
+        if os.path.exists(model_path) and not source_matches(model_path, manifest["model_sha1"],
+                                                             manifest.get("model_file")):
+            raise ValueError(f"{path} is stale (best_model.pkl changed since it was bundled)")
+    return bundle
+
+
+def load_serving_artifacts(model_dir="models", backend="auto"):
+    """
+    Servis için ortak yükleyici: önce model_bundle.joblib, yoksa / geçersizse üç ayrı pkl.
+    backend: "auto" (düz motor varsa o), "flat" (yoksa hata) veya "sklearn".
+    Sözlük döndürür: model, preprocessor, features, scorer, backend, manifest, source.
+    """
+    artifacts = None
+    bundle_path = os.path.join(model_dir, BUNDLE_FILE)
+    if os.path.exists(bundle_path):
+        try:
+            bundle = load_model_bundle(bundle_path)
+            artifacts = {"model": bundle["model"], "preprocessor": bundle["preprocessor"],
+                         "features": list(bundle["features"]), "flat": bundle["flat"],
+                         "manifest": bundle["manifest"], "source": bundle_path}
+        except Exception as e:
+            print(f"⚠️ Model bundle not usable ({e}) - falling back to separate files")
+
+    if artifacts is None:
+        paths = [os.path.join(model_dir, name) for name in ("best_model.pkl", "preprocessor.pkl", "feature_list.pkl")]
+        if not all(os.path.exists(p) for p in paths):
+            raise FileNotFoundError("Model dosyaları eksik")
+        artifacts = {"model": joblib.load(paths[0]), "preprocessor": joblib.load(paths[1]),
+                     "features": joblib.load(paths[2]),
+                     "flat": load_flat_model(model_dir) if backend != "sklearn" else None,
+                     "manifest": None, "source": model_dir}
+
+    flat = artifacts.pop("flat") if backend != "sklearn" else None
+    if backend == "flat" and flat is None:
+        raise FileNotFoundError("Düz dizi motoru (flat engine) bu model için mevcut değil")
+    artifacts["scorer"] = flat if flat is not None else artifacts["model"]
+    artifacts["backend"] = "flat" if flat is not None else "sklearn"
+    artifacts.pop("flat", None)
+    return artifacts
@@ -0,0 +1,296 @@
+# model_compression.py
+# select_and_save_best sonrası sıkıştırma aşaması: ağaç sayısı azaltma, derinlik sınırlama,
+# yaprak değeri nicemleme ve damıtma (distillation) varyantları denenir; ROC-AUC toleransı içindeki
+# en küçük varyant tutulur. Varyant seçimi eğitim verisinden ayrılan doğrulama kümesinde, aynı modelin
+# eğitimin geri kalanıyla fit edilmiş bir kopyası üzerinde yapılır; test kümesi sadece son rapor içindir.
+
+import copy
+import io
+import json
+import os
+import time
+import joblib
+import numpy as np
+import sklearn
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.ensemble import (RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier,
+                              HistGradientBoostingRegressor)
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+from tree_engine import export_flat_model
+from model_bundle import write_model_bundle
+
+AUC_TOLERANCE = 0.005           # orijinale göre izin verilen en fazla ROC-AUC kaybı
+TREE_COUNTS = (100, 50, 25, 10)  # ağaç sayısı azaltma adayları (orijinalden küçük olanlar denenir)
+DEPTH_CAPS = (12, 8)             # derinlik sınırı adayları (yeniden eğitim)
+BOOSTING_FRACTIONS = (0.5, 0.25)  # boosting: ilk turların oranı
+LEAF_QUANTIZATION_LEVELS = 255   # 8 bit yaprak olasılıkları
+COMPRESS_LEVEL = 3               # joblib sıkıştırma seviyesi (boyut ölçümü ve kayıt)
+LATENCY_REPEATS = 200
+COMPRESSION_REPORT_FILE = "compression_report.json"
+SELECTION_FRACTION = 0.2          # varyant seçimi için eğitim verisinden ayrılan oran
+
+FOREST_MODELS = (RandomForestClassifier, ExtraTreesClassifier)
+
+
+class DistilledClassifier(ClassifierMixin, BaseEstimator):
+    """
+    Öğretmen modelin olasılıklarını taklit eden küçük regresör.
+    fit(X, y) regresörü y'ye (öğretmenin pozitif sınıf olasılıkları veya 0/1 etiketler) fit eder.
+    sklearn tahmincisi olduğundan get_params / clone / classes_ arayüzü tahmin kodunda
+    (prediction.py, mobile_api.py) diğer modellerle aynı çalışır.
+    """
+
+    def __init__(self, regressor=None, classes=(0, 1)):
+        self.regressor = regressor
+        self.classes = classes
+
+    def fit(self, X, y):
+        self.regressor = self.regressor if self.regressor is not None else HistGradientBoostingRegressor()
+        self.regressor.fit(X, y)
+        self.classes_ = np.asarray(self.classes)
+        return self
+
+    def predict_proba(self, X):
+        p = np.clip(self.regressor.predict(X), 0.0, 1.0)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] >= 0.5).astype(int)]
+
+
+def model_size_bytes(model, compress=COMPRESS_LEVEL):
+    """joblib ile (sıkıştırılmış) serileştirilmiş boyut"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer, compress=compress)
+    return buffer.getbuffer().nbytes
+
+
+def per_row_latency_ms(model, X, repeats=LATENCY_REPEATS):
+    """Tek satırlık istek yolu: tek satır predict_proba çağrısının medyan süresi (ms)"""
+    row = X[:1]
+    model.predict_proba(row)  # ısınma
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _auc(model, X, y):
+    return roc_auc_score(y, model.predict_proba(X)[:, 1])
+
+
+# ---------------------------
+# Varyantlar
+# ---------------------------
+def rank_trees(forest, X_rank, y_rank):
+    """Ağaçları seçim kümesindeki tekil ROC-AUC katkısına göre (büyükten küçüğe) sırala"""
+    scores = np.array([roc_auc_score(y_rank, tree.predict_proba(X_rank)[:, 1]) for tree in forest.estimators_])
+    return np.argsort(-scores, kind="stable")
+
+
+def keep_trees(forest, indices):
+    reduced = copy.deepcopy(forest)
+    reduced.estimators_ = [reduced.estimators_[i] for i in indices]
+    reduced.n_estimators = len(reduced.estimators_)
+    return reduced
+
+
+def truncate_boosting(model, n_iter, X_check=None):
+    """
+    HistGradientBoosting: sadece ilk n_iter turu tut (turlar sırayla eklenir, önek geçerli bir modeldir).
+    sklearn'ün özel _predictors listesi kısaltılır: öznitelik yoksa veya X_check verildiğinde sonuç
+    staged_predict_proba'nın n_iter. adımıyla uyuşmazsa (sklearn sürümü değişmiş) hata verilir.
+    """
+    if not hasattr(model, "_predictors"):
+        raise AttributeError(f"HistGradientBoosting internals changed in sklearn {sklearn.__version__}: "
+                             "no _predictors - cannot truncate boosting rounds")
+    reduced = copy.deepcopy(model)
+    reduced._predictors = reduced._predictors[:n_iter]  # n_iter_ len(_predictors)'dan türetilir
+    reduced.set_params(max_iter=n_iter)
+    if X_check is not None:
+        expected = None
+        for step, proba in enumerate(model.staged_predict_proba(X_check), start=1):
+            if step == n_iter:
+                expected = proba
+                break
+        if reduced.n_iter_ != n_iter or not np.allclose(reduced.predict_proba(X_check), expected):
+            raise RuntimeError(f"Truncated boosting model does not match staged predictions "
+                               f"(sklearn {sklearn.__version__})")
+    return reduced
+
+
+def quantize_leaf_values(forest, levels=LEAF_QUANTIZATION_LEVELS):
+    """
+    Yaprak sınıf olasılıklarını `levels` adımlı ızgaraya yuvarla (8 bit).
+    Ağaç yapısı aynı kalır; az sayıda farklı değer sıkıştırılmış boyutu belirgin biçimde küçültür.
+    """
+    quantized = copy.deepcopy(forest)
+    for tree in quantized.estimators_:
+        value = tree.tree_.value
+        totals = value.sum(axis=2, keepdims=True)
+        totals[totals == 0] = 1
+        # Oranlar nicemlenir (yerinde yazma ağaç yapısına işlenir)
+        value[:] = np.round(value / totals * levels) / levels
+    return quantized
+
+
+def distill(teacher, X_transfer, max_iter=100, max_leaf_nodes=31, random_state=42):
+    """Öğretmenin olasılıklarını transfer kümesinde hedef alan küçük bir gradient boosting regresörü"""
+    soft_labels = teacher.predict_proba(X_transfer)[:, 1]
+    student = HistGradientBoostingRegressor(max_iter=max_iter, max_leaf_nodes=max_leaf_nodes,
+                                            early_stopping=True, random_state=random_state)
+    return DistilledClassifier(student, tuple(teacher.classes_)).fit(X_transfer, soft_labels)
+
+
+def build_variants(model, X_rank, y_rank, X_train=None, y_train=None, names=None):
+    """
+    Modele uygun sıkıştırma varyantlarını üret: {ad: model}.
+    Derinlik sınırlama ve damıtma eğitim verisi gerektirir (X_train verilmezse atlanır).
+    names verilirse sadece o varyantlar (ve onlar için gerekenler) üretilir.
+    """
+    def wanted(name):
+        return names is None or name in names
+
+    variants = {}
+    if isinstance(model, FOREST_MODELS):
+        order = None
+        for k in TREE_COUNTS:
+            name = f"top_{k}_trees"
+            if k < len(model.estimators_) and (wanted(name) or wanted(name + "+q8")):
+                order = rank_trees(model, X_rank, y_rank) if order is None else order
+                variants[name] = keep_trees(model, order[:k])
+        # Nicemleme tek başına ve ağaç azaltmayla birlikte
+        for name, variant in [("original", model)] + list(variants.items()):
+            quantized_name = f"{name}+q8" if name != "original" else "quantized_leaves"
+            if wanted(quantized_name):
+                variants[quantized_name] = quantize_leaf_values(variant)
+    elif isinstance(model, HistGradientBoostingClassifier):
+        # Ad tariften gelir (tur oranı): erken durdurma gölge ve kaydedilmiş modelde farklı tur sayısı verir
+        for fraction in BOOSTING_FRACTIONS:
+            name = f"first_{round(fraction * 100)}pct_rounds"
+            n_iter = max(1, int(model.n_iter_ * fraction))
+            if n_iter < model.n_iter_ and wanted(name):
+                variants[name] = truncate_boosting(model, n_iter, X_check=X_rank)
+
+    if X_train is not None:
+        if "max_depth" in model.get_params():
+            for depth in DEPTH_CAPS:
+                current = model.get_params()["max_depth"]
+                if (current is None or depth < current) and wanted(f"max_depth_{depth}"):
+                    variants[f"max_depth_{depth}"] = clone(model).set_params(max_depth=depth).fit(X_train, y_train)
+        if wanted("distilled"):
+            variants["distilled"] = distill(model, X_train)
+    return {name: variant for name, variant in variants.items() if wanted(name)}
+
+
+# ---------------------------
+# Seçim ve kayıt
+# ---------------------------
+def compress_model(model, X_val, y_val, X_train=None, y_train=None, tolerance=AUC_TOLERANCE, random_state=42):
+    """
+    Varyantları üret, boyut / tek satır gecikmesi / ROC-AUC ölç ve toleransı aşmayan en küçüğünü seç.
+    X_val ikiye bölünür: ağaç sıralaması bir yarıda yapılır, ROC-AUC diğer yarıda ölçülür.
+    X_val modelin eğitiminde görülmemiş, test kümesinden ayrı satırlar olmalıdır (bkz. compress_saved_model).
+    Matrisler kaydedilmiş ön işleyiciden geçmiş olmalıdır. (seçilen_ad, seçilen_model, rapor) döndürür.
+    """
+    print("\n🗜️ MODEL COMPRESSION...")
+    X_val = np.asarray(X_val)
+    y_val = np.asarray(y_val)
+    X_rank, X_eval, y_rank, y_eval = train_test_split(X_val, y_val, test_size=0.5, random_state=random_state,
+                                                      stratify=y_val)
+
+    variants = {"original": model}
+    variants.update(build_variants(model, X_rank, y_rank, X_train, y_train))
+
+    report = {}
+    for name, variant in variants.items():
+        report[name] = {
+            "roc_auc": float(_auc(variant, X_eval, y_eval)),
+            "size_bytes": model_size_bytes(variant),
+            "latency_ms_per_row": per_row_latency_ms(variant, X_eval),
+        }
+
+    baseline_auc = report["original"]["roc_auc"]
+    eligible = [name for name, r in report.items() if r["roc_auc"] >= baseline_auc - tolerance]
+    chosen = min(eligible, key=lambda name: report[name]["size_bytes"])
+
+    print(f"   {'variant':<26} {'ROC-AUC':>8} {'size (KB)':>11} {'latency (ms)':>13}")
+    for name, r in report.items():
+        marker = "🏆" if name == chosen else ("  " if name in eligible else "✗ ")
+        print(f" {marker} {name:<25} {r['roc_auc']:8.4f} {r['size_bytes'] / 1024:11.1f} "
+              f"{r['latency_ms_per_row']:13.3f}")
+    print(f"   Chosen: {chosen} (tolerance {tolerance}, "
+          f"{report['original']['size_bytes'] / report[chosen]['size_bytes']:.1f}x smaller)")
+    return chosen, variants[chosen], report
+
+
+def compress_saved_model(X_train, y_train, X_test, y_test, out_dir="models", tolerance=AUC_TOLERANCE,
+                         selection_fraction=SELECTION_FRACTION, random_state=42):
+    """
+    models/best_model.pkl'yi sıkıştır: seçilen varyant best_model.pkl olarak (sıkıştırılmış joblib) yazılır,
+    orijinal best_model_uncompressed.pkl olarak saklanır, ölçümler compression_report.json'a yazılır.
+      1) Eğitim verisinden selection_fraction'lık bir seçim kümesi ayrılır; modelin bir kopyası geri kalanla fit
+         edilir ve varyantlar bu kopyada, görmediği seçim kümesinde karşılaştırılır
+      2) Seçilen varyant kaydedilmiş modele (tüm eğitim verisiyle eğitilmiş) uygulanır; ağaç sıralamasına dayanan
+         top_k varyantlarında ise gölge modelin (seçim kümesi dışında eğitilmiş) varyantı tutulur
+      3) Orijinal ve sıkıştırılmış model X_test'te raporlanır (seçimde kullanılmaz)
+    """
+    model_path = os.path.join(out_dir, "best_model.pkl")
+    model = joblib.load(model_path)
+    preproc = joblib.load(os.path.join(out_dir, "preprocessor.pkl"))
+    features = joblib.load(os.path.join(out_dir, "feature_list.pkl"))
+
+    X_train_pp = np.asarray(preproc.transform(X_train[features]))
+    y_train = np.asarray(y_train)
+    X_test_pp = np.asarray(preproc.transform(X_test[features]))
+    y_test = np.asarray(y_test)
+
+    X_fit, X_select, y_fit, y_select = train_test_split(X_train_pp, y_train, test_size=selection_fraction,
+                                                        random_state=random_state, stratify=y_train)
+    print(f"   Selecting on {len(X_select):,} held-out training rows (shadow model fit on {len(X_fit):,})")
+    shadow = clone(model).fit(X_fit, y_fit)
+    chosen, shadow_variant, selection_report = compress_model(shadow, X_select, y_select, X_fit, y_fit, tolerance,
+                                                              random_state)
+
+    if chosen == "original":
+        compressed = model
+    elif chosen.startswith("top_"):
+        # Ağaç seçimi sıralamaya bağlı: kaydedilmiş model seçim kümesini eğitimde gördüğü için sıralama orada
+        # örneklem içi olurdu. Seçim satırlarını görmemiş gölge modelin varyantı kaydedilir.
+        compressed = shadow_variant
+    else:
+        # Sıralama gerektirmeyen tarif kaydedilmiş modele uygulanır (test kümesi hiç kullanılmaz)
+        compressed = build_variants(model, X_select, y_select, X_train_pp, y_train, names={chosen}).get(chosen)
+        if compressed is None:
+            # Tarif bu modele uygulanamıyor (ör. kaydedilmiş model 1 turda durmuş): orijinal korunur
+            print(f"   ⚠️ {chosen} does not apply to the saved model - keeping the original")
+            chosen, compressed = "original", model
+    test_report = {}
+    for name, variant in (("original", model), (chosen, compressed)):
+        test_report[name] = {"roc_auc": float(_auc(variant, X_test_pp, y_test)),
+                             "size_bytes": model_size_bytes(variant)}
+    print(f"   Test ROC-AUC: original {test_report['original']['roc_auc']:.4f} -> "
+          f"{chosen} {test_report[chosen]['roc_auc']:.4f}")
+
+    report = {"chosen": chosen, "tolerance": tolerance, "selection_rows": int(len(X_select)),
+              "variants": selection_report, "test": test_report}
+    report_path = os.path.join(out_dir, COMPRESSION_REPORT_FILE)
+    tmp_path = f"{report_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, report_path)
+
+    if chosen != "original":
+        joblib.dump(model, os.path.join(out_dir, "best_model_uncompressed.pkl"))
+        tmp_path = f"{model_path}.{os.getpid()}.tmp"
+        joblib.dump(compressed, tmp_path, compress=COMPRESS_LEVEL)
+        os.replace(tmp_path, model_path)
+        print(f"   ✅ Saved: {model_path} (original kept as best_model_uncompressed.pkl)")
+        export_flat_model(compressed, out_dir)
+    write_model_bundle(out_dir, compression={"variant": chosen, "tolerance": tolerance,
+                                             "test_roc_auc": test_report[chosen]["roc_auc"],
+                                             "size_bytes": test_report[chosen]["size_bytes"]})
+    return chosen, report
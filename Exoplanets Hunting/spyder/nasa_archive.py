@@ -0,0 +1,104 @@
+# nasa_archive.py
+# NASA Exoplanet Archive CSV'leri için ortak, tek geçişli okuyucu
+# (geçici dosya yazmaz, satırları belleğe toplamaz)
+
+import csv
+import pandas as pd
+
+COLUMN_PREFIX = "COLUMN"
+
+
+class ArchiveSchema:
+    """Arşiv dosyasının '#' önsözünden çıkarılan şema bilgisi"""
+
+    def __init__(self, path):
+        self.path = path
+        self.columns = {}             # '# COLUMN ad: açıklama' satırları (dosya sırasıyla)
+        self.header = []              # veri gövdesinin başlık satırı
+        self.preamble_lines = 0
+        self.commented_header = False  # başlık '#' ile yorumlanmış bir satırdaysa True
+
+    def description(self, column):
+        return self.columns.get(column)
+
+    def to_dict(self):
+        return {
+            "path": self.path,
+            "columns": self.columns,
+            "header": self.header,
+            "preamble_lines": self.preamble_lines,
+            "commented_header": self.commented_header,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        schema = cls(data["path"])
+        schema.columns = dict(data["columns"])
+        schema.header = list(data["header"])
+        schema.preamble_lines = data["preamble_lines"]
+        schema.commented_header = data["commented_header"]
+        return schema
+
+    def __repr__(self):
+        return (f"ArchiveSchema(path={self.path!r}, columns={len(self.header)}, "
+                f"described={len(self.columns)}, preamble_lines={self.preamble_lines})")
+
+
+def _scan_preamble(f, schema):
+    """'#' önsözünü bir kez tara, dosya imlecini veri başlangıcına bırak"""
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            return
+
+        stripped = line.strip()
+        if not stripped:
+            schema.preamble_lines += 1
+            continue
+
+        if not stripped.startswith('#'):
+            # Gerçek başlık satırı: pandas'ın okuması için imleci geri al
+            f.seek(pos)
+            schema.header = next(csv.reader([stripped]))
+            return
+
+        schema.preamble_lines += 1
+        body = stripped[1:].strip()
+        if body.startswith(COLUMN_PREFIX):
+            name, _, description = body[len(COLUMN_PREFIX):].partition(':')
+            schema.columns[name.strip()] = description.strip()
+        elif body and not body.startswith('This file') and len(body.split(',')) > 5:
+            # Bazı dışa aktarımlarda sütun isimleri '#' ile yorumlanmış olur
+            schema.header = next(csv.reader([body]))
+            schema.commented_header = True
+            return
+
+
+def read_archive_header(path):
+    """Sadece önsözü ve başlığı oku (veri gövdesine dokunmadan)"""
+    schema = ArchiveSchema(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        _scan_preamble(f, schema)
+    return schema
+
+
+def read_nasa_archive(path, **read_csv_kwargs):
+    """
+    NASA arşiv CSV'sini tek geçişte oku.
+    Önsöz bir kez taranır, veri gövdesi açık dosyadan doğrudan pandas'a akıtılır.
+    (df, ArchiveSchema) döndürür.
+    """
+    schema = ArchiveSchema(path)
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        _scan_preamble(f, schema)
+        if not schema.header:
+            raise ValueError(f"Başlık satırı bulunamadı: {path}")
+
+        if schema.commented_header:
+            read_csv_kwargs.setdefault('names', schema.header)
+            read_csv_kwargs.setdefault('header', None)
+
+        df = pd.read_csv(f, **read_csv_kwargs)
+
+    return df, schema
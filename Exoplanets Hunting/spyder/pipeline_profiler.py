@@ -0,0 +1,334 @@
+# pipeline_profiler.py
+# Eğitim hattı için aşama bazlı ölçüm: süre, tepe RSS, satır sayısı -> yapılandırılmış JSON çalışma raporu.
+# İstenen aşamalar için cProfile veya örnekleyici (sampling) profil çıktısı da üretilir.
+#
+# Kullanım (exoplanet_tabular_pipeline.py __main__):
+#   EXOPLANET_PROFILE_STAGES="fit:RandomForest,load_table" EXOPLANET_PROFILER=sampling \
+#       python exoplanet_tabular_pipeline.py
+
+import cProfile
+import collections
+import contextlib
+import fnmatch
+import io
+import json
+import os
+import pstats
+import re
+import resource
+import sys
+import threading
+import time
+
+# Optional psutil import (alt süreçlerin RSS'i için; yoksa /proc ve getrusage kullanılır)
+try:
+    import psutil
+    has_psutil = True
+except Exception:
+    has_psutil = False
+
+PROFILE_DIR = "profiles"
+RUN_REPORT_FILE = "run_report.json"
+PROFILE_MODES = ("cprofile", "sampling")
+SAMPLING_INTERVAL = 0.005   # örnekleyici profil: yığın örnekleme aralığı (saniye)
+TOP_FUNCTIONS = 25          # metin özetindeki fonksiyon sayısı
+
+
+# ---------------------------
+# Ölçüm: duvar saati ve tepe RSS
+# ---------------------------
+def _current_rss_bytes():
+    if has_psutil:
+        proc = psutil.Process()
+        total = proc.memory_info().rss
+        for child in proc.children(recursive=True):
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+    try:
+        with open("/proc/self/statm", 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def _maxrss_bytes(who):
+    # Linux'ta KB, macOS'ta bayt
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(who).ru_maxrss * scale
+
+
+class StageMeter:
+    """
+    Bir aşamanın duvar saati süresini ve tepe RSS'ini ölç.
+    RSS arka plan thread'iyle örneklenir; süreç ömrü boyunca tepe (getrusage) bu aşamada
+    yükseldiyse kesin değer o olur. Alt süreçlerin tepe RSS'i ayrıca raporlanır.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.result = {}
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, _current_rss_bytes())
+
+    def __enter__(self):
+        self._stop = threading.Event()
+        self._start_rss = _current_rss_bytes()
+        self._peak = self._start_rss
+        self._maxrss_before = _maxrss_bytes(resource.RUSAGE_SELF)
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        self._start = time.perf_counter()
+        self._start_cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self._start
+        cpu = time.process_time() - self._start_cpu
+        self._stop.set()
+        self._thread.join()
+        peak = max(self._peak, _current_rss_bytes())
+        maxrss_after = _maxrss_bytes(resource.RUSAGE_SELF)
+        if maxrss_after > self._maxrss_before:
+            peak = max(peak, maxrss_after)
+        self.result = {
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "peak_rss_mb": peak / 1024 ** 2,
+            "rss_delta_mb": (peak - self._start_rss) / 1024 ** 2,
+            "children_peak_rss_mb": _maxrss_bytes(resource.RUSAGE_CHILDREN) / 1024 ** 2,
+        }
+        return False
+
+
+# ---------------------------
+# Profil çıktıları
+# ---------------------------
+class StackSampler:
+    """
+    Tek bir thread'in yığınını düzenli aralıklarla örnekleyen basit profil aracı (stdlib).
+    Çıktı flamegraph.pl / speedscope ile açılabilen "collapsed stack" biçimindedir.
+    """
+
+    def __init__(self, thread_id=None, interval=SAMPLING_INTERVAL):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.stacks = collections.Counter()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    # cProfile.Profile ile aynı arayüz
+    def enable(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disable(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top=TOP_FUNCTIONS):
+        """En çok örneklenen (kendi süresi en uzun) çerçeveler"""
+        leaves = collections.Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return "\n".join(f"{count / total:7.1%} {count:8d}  {frame}" for frame, count in leaves.most_common(top))
+
+
+def _safe_name(stage_name):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", stage_name)
+
+
+# ---------------------------
+# Aşama profilleyici
+# ---------------------------
+class StageProfiler:
+    """
+    Aşamaları sırayla kaydeder: süre, CPU süresi, tepe RSS, satır sayısı (ve satır/saniye).
+    profile: profil çıkarılacak aşama adları (fnmatch desenleri, örn. "fit:*"); mode: "cprofile" / "sampling".
+    """
+
+    def __init__(self, profile=(), mode="cprofile", out_dir=PROFILE_DIR, memory_interval=0.05):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profiler mode: {mode!r} (expected one of {PROFILE_MODES})")
+        self.profile = [p for p in profile if p]
+        self.mode = mode
+        self.out_dir = out_dir
+        self.memory_interval = memory_interval
+        self.records = []
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    def settings(self):
+        """Alt süreçte aynı ayarlarla profilleyici kurmak için"""
+        return {"profile": list(self.profile), "mode": self.mode, "out_dir": self.out_dir,
+                "memory_interval": self.memory_interval}
+
+    def _wants_profile(self, name):
+        return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.profile)
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=None, **info):
+        """
+        with profiler.stage("load_table", path=p) as record:
+            df = load_table(p)
+            record["rows"] = len(df)   # satır sayısı gövdede de verilebilir
+        """
+        record = {"stage": name, "pid": os.getpid(), "rows": rows, **info}
+        profiler = None
+        if self._wants_profile(name):
+            profiler = cProfile.Profile() if self.mode == "cprofile" else StackSampler()
+        meter = StageMeter(self.memory_interval)
+        try:
+            with meter:
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError:
+                        # Başka bir profil zaten etkin (iç içe profillenen aşama): sadece dıştaki tutulur
+                        profiler = None
+                try:
+                    yield record
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        except BaseException as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.update(meter.result)
+            if record.get("rows") and record.get("wall_seconds"):
+                record["rows_per_second"] = record["rows"] / max(record["wall_seconds"], 1e-9)
+            if profiler is not None:
+                record["profile"] = self._write_profile(name, profiler)
+            self.records.append(record)
+
+    def _write_profile(self, name, profiler):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{_safe_name(name)}.{os.getpid()}")
+        if self.mode == "cprofile":
+            profiler.dump_stats(stem + ".prof")
+            buffer = io.StringIO()
+            pstats.Stats(profiler, stream=buffer).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            summary, path = buffer.getvalue(), stem + ".prof"
+        else:
+            profiler.write(stem + ".collapsed")
+            summary, path = profiler.summary(), stem + ".collapsed"
+        with open(stem + ".txt", 'w', encoding='utf-8') as f:
+            f.write(summary)
+        print(f"   🔬 Profile ({self.mode}) for {name}: {path}")
+        return path
+
+    def merge(self, records):
+        """Alt süreçlerde kaydedilen aşamaları ekle (bkz. call_collecting)"""
+        self.records.extend(records)
+
+    def report(self, **meta):
+        return {
+            "meta": {
+                "started_at": self.started_at,
+                "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "pid": os.getpid(),
+                "python": sys.version.split()[0],
+                "rss_source": "psutil" if has_psutil else "procfs+getrusage",
+                "profile_mode": self.mode if self.profile else None,
+                **meta,
+            },
+            "stages": self.records,
+        }
+
+    def print_summary(self):
+        print(f"\n⏱️ STAGE SUMMARY")
+        print(f"   {'stage':<36} {'wall (s)':>9} {'cpu (s)':>9} {'peak RSS (MB)':>14} {'rows':>11}")
+        for r in self.records:
+            rows = f"{r['rows']:,}" if r.get("rows") is not None else "-"
+            print(f"   {r['stage']:<36} {r.get('wall_seconds', 0):9.2f} {r.get('cpu_seconds', 0):9.2f} "
+                  f"{r.get('peak_rss_mb', 0):14.1f} {rows:>11}")
+
+    def write_report(self, path=None, **meta):
+        path = path or os.path.join(self.out_dir, RUN_REPORT_FILE)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(**meta), f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        print(f"📝 Run report written: {path}")
+        return path
+
+
+# ---------------------------
+# Süreç genelinde etkin profilleyici
+# ---------------------------
+# Hat fonksiyonları stage(...) çağırır; etkin profilleyici yoksa ölçüm yapılmaz (ek yük yok)
+_active = None
+
+
+def activate(profiler):
+    global _active
+    _active = profiler
+    return profiler
+
+
+def deactivate():
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active_profiler():
+    return _active
+
+
+def profiler_from_env(environ=None):
+    """EXOPLANET_PROFILE_STAGES (virgülle ayrılmış desenler) ve EXOPLANET_PROFILER (cprofile / sampling)"""
+    environ = os.environ if environ is None else environ
+    stages = [s.strip() for s in environ.get("EXOPLANET_PROFILE_STAGES", "").split(",")]
+    return StageProfiler(profile=stages, mode=environ.get("EXOPLANET_PROFILER", "cprofile"),
+                         out_dir=environ.get("EXOPLANET_PROFILE_DIR", PROFILE_DIR))
+
+
+@contextlib.contextmanager
+def stage(name, rows=None, **info):
+    if _active is None:
+        yield {}
+        return
+    with _active.stage(name, rows=rows, **info) as record:
+        yield record
+
+
+def collector_settings():
+    """İşçi sürece aktarılacak ayarlar (profil kapalıysa None)"""
+    return _active.settings() if _active is not None else None
+
+
+def call_collecting(settings, fn, *args, **kwargs):
+    """
+    fn'i (işçi süreçte) çalıştır; bu çağrıda kaydedilen aşamaları sonuçla birlikte döndür: (sonuç, kayıtlar).
+    settings=None: profil kapalı, kayıt listesi boş döner. Fork ile devralınan profilleyici yoksa
+    (spawn / forkserver) aynı ayarlarla yeni bir tane kurulur.
+    """
+    if settings is None:
+        return fn(*args, **kwargs), []
+    if _active is None:
+        activate(StageProfiler(**settings))
+    start = len(_active.records)
+    result = fn(*args, **kwargs)
+    return result, _active.records[start:]
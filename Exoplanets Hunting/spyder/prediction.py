@@ -1,44 +1,83 @@
 # prediction.py
+import argparse
+import io
+import json
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import joblib
 import pandas as pd
 import numpy as np
 import os
+from threadpoolctl import threadpool_limits
+from model_bundle import BUNDLE_FILE, load_serving_artifacts
+from fused_scoring import FusedScorer
+from derived_features import DERIVED_INPUTS
+from prediction_cache import PredictionCache, model_version
+
+# Optional pyarrow import (predict_batch_streaming / predict_batch_parallel Parquet çıktısı için)
+try:
+    import pyarrow  # noqa: F401
+    has_pyarrow = True
+except Exception:
+    has_pyarrow = False
+
+# predict_batch: tek seferde ön işlenip skorlanan satır sayısı
+BATCH_CHUNK_ROWS = 50_000
+# predict_batch_streaming: diskten okunan parça boyutu (bellek kullanımı bununla sınırlı)
+STREAM_CHUNK_ROWS = 100_000
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+# predict_batch_parallel: bayt aralığı parçaları (işçi başına birden çok parça -> yük dengesi)
+SHARDS_PER_WORKER = 4
+MIN_SHARD_BYTES = 4 * 1024 ** 2
+MAX_SHARD_BYTES = 256 * 1024 ** 2   # işçi bir parçayı tek seferde belleğe okur
 
 class ExoplanetPredictor:
     def __init__(self, model_path="models/best_model.pkl", 
                  preprocessor_path="models/preprocessor.pkl",
-                 feature_path="models/feature_list.pkl"):
+                 feature_path="models/feature_list.pkl",
+                 backend="auto"):
+        """
+        Model dizinindeki model_bundle.joblib tercih edilir (tek dosya, doğrulanmış, bellek eşlemeli);
+        yoksa üç ayrı pkl yüklenir.
+        backend: "sklearn" - kaydedilmiş model doğrudan kullanılır
+                 "flat"    - düz dizi motoru (yoksa hata)
+                 "auto"    - düz dizi motoru varsa ve güncelse o, yoksa sklearn
+        """
+        model_dir = os.path.dirname(model_path) or "."
+        self.model_path = model_path
         
         # Dosya kontrolü
-        if not all(os.path.exists(p) for p in [model_path, preprocessor_path, feature_path]):
+        bundle_exists = os.path.exists(os.path.join(model_dir, BUNDLE_FILE))
+        if not bundle_exists and not all(os.path.exists(p) for p in [model_path, preprocessor_path, feature_path]):
             print("❌ Model dosyaları bulunamadı! Önce modeli eğitin.")
             raise FileNotFoundError("Model dosyaları eksik")
-            
-        self.model = joblib.load(model_path)
-        self.preprocessor = joblib.load(preprocessor_path)
-        self.features = joblib.load(feature_path)
-        print("✅ Tahmin edici başarıyla yüklendi!")
+
+        artifacts = load_serving_artifacts(model_dir, backend=backend)
+        self.model = artifacts["model"]
+        self.preprocessor = artifacts["preprocessor"]
+        self.features = artifacts["features"]
+        self.manifest = artifacts["manifest"]
+
+        # Tahminler self.scorer üzerinden: aynı predict / predict_proba arayüzü
+        self.scorer = artifacts["scorer"]
+        self.backend = artifacts["backend"]
+        # Girdi dizisi + yerinde ön işleme + tek predict_proba
+        self.fused = FusedScorer(self.preprocessor, self.scorer, self.features)
+        # Büyük bloklarda sklearn'ün derlenmiş ağaç gezintisi düz motordan hızlı: toplu tahmin her zaman modelle
+        self.batch_fused = FusedScorer(self.preprocessor, self.model, self.features)
+        # predict_single: aynı aday tekrar sorulursa önbellekten (anahtar model sürümünü içerir)
+        self.cache = PredictionCache(version=model_version(self.manifest, model_path))
+        print(f"✅ Tahmin edici başarıyla yüklendi! (backend: {self.backend}, kaynak: {artifacts['source']})")
     
     def predict_single(self, input_data):
         """
         Tek bir gezegen adayı için tahmin yap
         """
         try:
-            # Eksik özellikleri NaN ile doldur
-            features_df = pd.DataFrame([input_data])
-            for feature in self.features:
-                if feature not in features_df.columns:
-                    features_df[feature] = np.nan
-            
-            # Sadece gerekli özellikleri seç ve sırala
-            features_df = features_df[self.features]
-            
-            # Ön işleme
-            processed_data = self.preprocessor.transform(features_df)
-            
-            # Tahmin
-            prediction = self.model.predict(processed_data)[0]
-            probability = self.model.predict_proba(processed_data)[0][1]
+            # Eksik özellikler NaN; ön işleme ve tahmin tek geçişte (tekrarlanan girdi önbellekten)
+            prediction, probability = self.cache.score_one(self.fused, input_data)
             
             result = {
                 'prediction': 'CONFIRMED PLANET' if prediction == 1 else 'FALSE POSITIVE',
@@ -62,9 +101,43 @@ class ExoplanetPredictor:
                 'error': str(e)
             }
     
-    def predict_batch(self, csv_file_path):
+    def score_frame(self, df, chunk_rows=BATCH_CHUNK_ROWS, first_id=0):
+        """
+        Ham aday tablosunu skorla: modelin (ve türetilmiş özelliklerin) okuduğu sütunlar sayıya çevrilir,
+        ön işleme + skorlama chunk_rows'luk bloklar halinde (sklearn modeliyle) yapılır.
+        Sayısal olmayan değer içeren satırlar atlanır. (sonuç tablosu, atlanan satır sayısı) döndürür;
+        id = first_id + tablodaki satır sırası.
+        """
+        columns = [c for c in dict.fromkeys(self.features + DERIVED_INPUTS) if c in df.columns]
+        numeric = df[columns].apply(pd.to_numeric, errors="coerce")
+        invalid = (numeric.isna() & df[columns].notna()).any(axis=1).to_numpy()
+        if invalid.any():
+            numeric = numeric.loc[~invalid]
+        
+        n_rows = len(numeric)
+        labels = np.empty(n_rows, dtype=self.batch_fused.classes_.dtype)
+        probability = np.empty(n_rows, dtype=np.float64)
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            labels[start:stop], probability[start:stop] = self.batch_fused.score(numeric.iloc[start:stop])
+            if n_rows > chunk_rows:
+                print(f"   ⏳ {stop}/{n_rows} tamamlandı...")
+        
+        results_df = pd.DataFrame({
+            'prediction': np.where(labels == 1, 'CONFIRMED PLANET', 'FALSE POSITIVE'),
+            'confidence': probability,
+            'probability_planet': probability,
+            'probability_fp': 1 - probability,
+            'success': True,
+            'id': first_id + np.flatnonzero(~invalid),
+        })
+        return results_df, int(invalid.sum())
+
+    def predict_batch(self, csv_file_path, chunk_rows=BATCH_CHUNK_ROWS):
         """
-        CSV dosyasından toplu tahmin yap
+        CSV dosyasından toplu tahmin yap (sütunsal): CSV bir kez özellik sırasına hizalanır,
+        sonuç tablosu dizilerden kurulur. Bellekte tutulamayacak kadar büyük dosyalar için
+        predict_batch_streaming kullanın.
         """
         try:
             if not os.path.exists(csv_file_path):
@@ -72,26 +145,14 @@ class ExoplanetPredictor:
                 return None
                 
             df = pd.read_csv(csv_file_path)
-            results = []
-            
             print(f"📁 {len(df)} aday analiz ediliyor...")
             
-            for idx, row in df.iterrows():
-                try:
-                    result = self.predict_single(row.to_dict())
-                    result['id'] = idx
-                    results.append(result)
-                    
-                    if (idx + 1) % 10 == 0:
-                        print(f"   ⏳ {idx + 1}/{len(df)} tamamlandı...")
-                        
-                except Exception as e:
-                    print(f"   ❌ Satır {idx} hatası: {e}")
-            
-            results_df = pd.DataFrame(results)
+            results_df, n_invalid = self.score_frame(df, chunk_rows)
+            if n_invalid:
+                print(f"   ❌ {n_invalid} satır sayısal olmayan değer içeriyor, atlandı")
             
             # İstatistikleri yazdır
-            confirmed_count = (results_df['prediction'] == 'CONFIRMED PLANET').sum()
+            confirmed_count = int((results_df['prediction'] == 'CONFIRMED PLANET').sum())
             print(f"\n📊 TOPLU TAHMİN SONUÇLARI:")
             print(f"   ✅ Gezegen Tespit Edilen: {confirmed_count}")
             print(f"   ❌ Sahte Pozitif: {len(results_df) - confirmed_count}")
@@ -103,6 +164,365 @@ class ExoplanetPredictor:
             print(f"❌ Toplu tahmin hatası: {e}")
             return None
 
+    def predict_batch_parallel(self, csv_file_path, output_path="prediction_results.csv", n_workers=None,
+                               chunk_rows=BATCH_CHUNK_ROWS):
+        """
+        Çok çekirdekli toplu tahmin: CSV satır sınırlarına hizalı bayt aralıklarına bölünür, parçalar bir süreç
+        havuzunda skorlanır. Her işçi modeli bir kez yükler (paket bellek eşlemeli: sayfalar paylaşılır) ve
+        tek thread ile çalışır. Parçalar yerel id'lerle skorlanır (önceden satır sayma geçişi yok); birleştirmede
+        girdi sırasıyla parça ofsetleri eklenir, böylece id'ler predict_batch ile aynıdır.
+        output_path: ".csv" veya ".parquet" (parça başına bir dosya içeren dizin; pyarrow gerekir).
+        Girdide tırnak içinde satır sonu olmamalıdır (her kayıt tek satır). Özet sözlüğü döndürür.
+        """
+        if not os.path.exists(csv_file_path):
+            raise FileNotFoundError(f"CSV dosyası bulunamadı: {csv_file_path}")
+        parquet = output_path.endswith(".parquet")
+        if parquet and not has_pyarrow:
+            raise ImportError("Parquet çıktısı için pyarrow gerekli")
+        n_workers = n_workers or os.cpu_count() or 1
+
+        header, shards = plan_byte_shards(csv_file_path, n_workers * SHARDS_PER_WORKER)
+        print(f"📁 {csv_file_path}: {len(shards)} shards on {n_workers} worker processes")
+        work_dir = output_path + ".shards"
+        shutil.rmtree(work_dir, ignore_errors=True)
+        os.makedirs(work_dir)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_shard_worker,
+                                 initargs=(self.model_path,)) as executor:
+            futures = [executor.submit(_score_shard, csv_file_path, header, shard, i, work_dir, parquet, chunk_rows)
+                       for i, shard in enumerate(shards)]
+            shard_results = []
+            for future in as_completed(futures):
+                shard_results.append(future.result())
+                done = sum(r["rows"] for r in shard_results)
+                print(f"   ⏳ {len(shard_results)}/{len(shards)} shards, {done:,} rows")
+        shard_results.sort(key=lambda r: r["shard"])
+
+        # Girdi sırasıyla birleştir: parça ofseti = önceki parçaların kayıt sayısı
+        counts = [r["rows"] for r in shard_results]
+        offsets = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(int)
+        merge_shard_outputs([r["path"] for r in shard_results], offsets, output_path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        wall = time.perf_counter() - start
+
+        workers = {}
+        for r in shard_results:
+            w = workers.setdefault(r["pid"], {"shards": 0, "rows": 0, "busy_seconds": 0.0})
+            w["shards"] += 1
+            w["rows"] += r["rows"]
+            w["busy_seconds"] += r["seconds"]
+        for w in workers.values():
+            w["rows_per_second"] = w["rows"] / max(w["busy_seconds"], 1e-9)
+
+        rows = int(sum(counts))
+        scored = sum(r["scored"] for r in shard_results)
+        planets = sum(r["planets"] for r in shard_results)
+        summary = {
+            "output": output_path,
+            "shards": len(shards),
+            "workers": {str(pid): w for pid, w in workers.items()},
+            "wall_seconds": wall,
+            "rows_per_second": rows / max(wall, 1e-9),
+            "total_records": rows,
+            "successful_predictions": scored,
+            "planets_detected": planets,
+            "false_positives": scored - planets,
+            "planet_ratio": planets / scored if scored else 0,
+            "invalid_rows": sum(r["invalid"] for r in shard_results),
+        }
+
+        print(f"\n⚡ WORKER THROUGHPUT:")
+        for pid, w in workers.items():
+            print(f"   pid {pid}: {w['shards']} shards, {w['rows']:,} rows, {w['rows_per_second']:,.0f} rows/s")
+        print(f"   Total: {rows:,} rows in {wall:.1f}s ({summary['rows_per_second']:,.0f} rows/s)")
+        print(f"\n📊 TOPLU TAHMİN SONUÇLARI (parallel):")
+        print(f"   ✅ Gezegen Tespit Edilen: {planets:,}")
+        print(f"   ❌ Sahte Pozitif: {scored - planets:,}")
+        print(f"   📈 Gezegen Oranı: {summary['planet_ratio']:.2%}")
+        if summary["invalid_rows"]:
+            print(f"   ⚠️ Atlanan satır (sayısal olmayan değer): {summary['invalid_rows']:,}")
+        print(f"✅ Tahmin sonuçları kaydedildi: {output_path}")
+        return summary
+
+    def _model_id(self):
+        """
+        Devam ettirilen işin aynı modelle sürmesi için kimlik: paket SHA-1'i, paket yoksa model dosyasının
+        boyut + mtime'ı (aynı sınıftan yeniden eğitilmiş model de farklı kimlik alır)
+        """
+        return model_version(self.manifest, self.model_path)
+
+    def predict_batch_streaming(self, csv_file_path, output_path="prediction_results.csv",
+                                chunk_rows=STREAM_CHUNK_ROWS, resume=True):
+        """
+        Sabit bellekle toplu tahmin: CSV chunk_rows'luk parçalar halinde okunur, her parça skorlanıp
+        çıktıya eklenir (girdi ve sonuçlar hiçbir zaman tamamen bellekte tutulmaz).
+        output_path: ".csv" -> tek CSV dosyasına ekleme; ".parquet" -> parça başına bir dosya içeren
+        Parquet veri kümesi dizini (pd.read_parquet(output_path) ile okunur; pyarrow gerekir).
+        resume=True: <output_path>.checkpoint.json'daki son tamamlanan parçadan devam edilir
+        (yarım yazılmış parça geri alınır). Checkpoint girdideki bayt ofsetini tutar: devam ederken dosyada
+        oraya atlanır, baştaki satırlar hiç okunmaz. Özet sözlüğü döndürür.
+        """
+        if not os.path.exists(csv_file_path):
+            raise FileNotFoundError(f"CSV dosyası bulunamadı: {csv_file_path}")
+        parquet = output_path.endswith(".parquet")
+        if parquet and not has_pyarrow:
+            raise ImportError("Parquet çıktısı için pyarrow gerekli")
+
+        checkpoint_path = output_path + CHECKPOINT_SUFFIX
+        st = os.stat(csv_file_path)
+        job = {
+            "input": os.path.abspath(csv_file_path),
+            "input_size": st.st_size,
+            "input_mtime_ns": st.st_mtime_ns,
+            "chunk_rows": chunk_rows,
+            "model": self._model_id(),
+            "resume": "byte_offset",
+        }
+        fresh_state = {"chunks_done": 0, "rows_read": 0, "rows_scored": 0, "planets": 0, "invalid_rows": 0,
+                       "input_offset": None, "output_bytes": 0, "complete": False}
+        state = dict(fresh_state)
+
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get("job") != job:
+                print("⚠️ Checkpoint belongs to a different input/model/chunk size - starting over")
+            elif not self._stream_output_intact(output_path, parquet, saved["state"]):
+                print("⚠️ Output written before the checkpoint is missing - starting over")
+            else:
+                state = saved["state"]
+                print(f"♻️ Resuming after chunk {state['chunks_done']} ({state['rows_read']:,} rows already done)")
+        if state["complete"]:
+            print(f"✅ Already complete: {output_path}")
+            return self._stream_summary(state, output_path)
+
+        # Son checkpoint'ten sonra yazılmış (yarım) çıktıyı geri al
+        if parquet:
+            os.makedirs(output_path, exist_ok=True)
+            for name in os.listdir(output_path):
+                if name.startswith("part-") and int(name[5:10]) >= state["chunks_done"]:
+                    os.remove(os.path.join(output_path, name))
+        elif state["chunks_done"] == 0:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        else:
+            with open(output_path, 'r+b') as f:
+                f.truncate(state["output_bytes"])
+
+        print(f"📁 Streaming {csv_file_path} -> {output_path} ({chunk_rows:,} rows per chunk)")
+        with open(csv_file_path, 'rb') as f:
+            header = f.readline()
+            block_bytes = self._stream_block_bytes(f, chunk_rows)
+            # Tamamlanan kayıtlar okunmaz: checkpoint'teki bayt ofsetine atlanır
+            if state["input_offset"] is not None:
+                f.seek(state["input_offset"])
+            while True:
+                block = read_record_block(f, block_bytes)
+                if not block:
+                    break
+                chunk = pd.read_csv(io.BytesIO(header + block))
+                if len(chunk):
+                    results_df, n_invalid = self.score_frame(chunk, chunk_rows, first_id=state["rows_read"])
+                else:
+                    results_df, n_invalid = pd.DataFrame(columns=RESULT_COLUMNS), 0   # sadece boş satırlar
+                if parquet:
+                    part_path = os.path.join(output_path, f"part-{state['chunks_done']:05d}.parquet")
+                    results_df.to_parquet(part_path + ".tmp", index=False)
+                    os.replace(part_path + ".tmp", part_path)
+                else:
+                    with open(output_path, 'a', encoding='utf-8', newline='') as out:
+                        results_df.to_csv(out, index=False, header=(state["chunks_done"] == 0))
+                        out.flush()
+                        os.fsync(out.fileno())
+                    state["output_bytes"] = os.path.getsize(output_path)
+
+                state["input_offset"] = f.tell()
+                state["chunks_done"] += 1
+                state["rows_read"] += len(chunk)
+                state["rows_scored"] += len(results_df)
+                state["planets"] += int((results_df['prediction'] == 'CONFIRMED PLANET').sum())
+                state["invalid_rows"] += n_invalid
+                self._write_checkpoint(checkpoint_path, job, state)
+
+                ratio = state["planets"] / max(state["rows_scored"], 1)
+                print(f"   ⏳ chunk {state['chunks_done']}: {state['rows_read']:,} rows, "
+                      f"{state['planets']:,} planets ({ratio:.2%})")
+
+        state["complete"] = True
+        self._write_checkpoint(checkpoint_path, job, state)
+        summary = self._stream_summary(state, output_path)
+        print(f"\n📊 TOPLU TAHMİN SONUÇLARI (streaming):")
+        print(f"   ✅ Gezegen Tespit Edilen: {summary['planets_detected']:,}")
+        print(f"   ❌ Sahte Pozitif: {summary['false_positives']:,}")
+        print(f"   📈 Gezegen Oranı: {summary['planet_ratio']:.2%}")
+        if summary["invalid_rows"]:
+            print(f"   ⚠️ Atlanan satır (sayısal olmayan değer): {summary['invalid_rows']:,}")
+        print(f"✅ Tahmin sonuçları kaydedildi: {output_path}")
+        return summary
+
+    @staticmethod
+    def _stream_block_bytes(f, chunk_rows):
+        """chunk_rows kayda karşılık gelen yaklaşık blok boyutu (ilk 1 MB'taki satır uzunluğundan)"""
+        position = f.tell()
+        sample = f.read(1 << 20)
+        f.seek(position)
+        bytes_per_row = len(sample) / max(sample.count(b"\n"), 1)
+        return max(1 << 16, int(chunk_rows * bytes_per_row))
+
+    @staticmethod
+    def _stream_output_intact(output_path, parquet, state):
+        """Checkpoint'e kadar yazılmış çıktı hâlâ yerinde mi (silinmiş / kısalmışsa baştan başlanır)"""
+        if state["chunks_done"] == 0:
+            return True
+        if parquet:
+            return all(os.path.exists(os.path.join(output_path, f"part-{i:05d}.parquet"))
+                       for i in range(state["chunks_done"]))
+        return os.path.exists(output_path) and os.path.getsize(output_path) >= state["output_bytes"]
+
+    @staticmethod
+    def _write_checkpoint(path, job, state):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"job": job, "state": state}, f, indent=2)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _stream_summary(state, output_path):
+        return {
+            "output": output_path,
+            "chunks": state["chunks_done"],
+            "total_records": state["rows_read"],
+            "successful_predictions": state["rows_scored"],
+            "planets_detected": state["planets"],
+            "false_positives": state["rows_scored"] - state["planets"],
+            "planet_ratio": state["planets"] / state["rows_scored"] if state["rows_scored"] else 0,
+            "invalid_rows": state["invalid_rows"],
+        }
+
+# ---------------------------
+# Paralel toplu tahmin: bayt aralığı parçaları ve işçi fonksiyonları
+# ---------------------------
+RESULT_COLUMNS = ['prediction', 'confidence', 'probability_planet', 'probability_fp', 'success', 'id']
+
+def plan_byte_shards(csv_file_path, n_shards):
+    """
+    Başlık satırından sonrasını satır sınırlarına hizalı [başlangıç, bitiş) bayt aralıklarına böl
+    (en fazla n_shards; parçalar MIN_SHARD_BYTES'tan küçük, MAX_SHARD_BYTES'tan büyük olmaz).
+    (başlık baytları, parça listesi) döndürür.
+    """
+    size = os.path.getsize(csv_file_path)
+    with open(csv_file_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        n_shards = max(1, min(n_shards, (size - data_start) // MIN_SHARD_BYTES))
+        n_shards = max(n_shards, -(-(size - data_start) // MAX_SHARD_BYTES))
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            target = data_start + (size - data_start) * i // n_shards
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()   # bir önceki satır sonuna kadar ilerle
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+        bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+def read_record_block(f, block_bytes):
+    """
+    f'nin (bir kayıt başında konumlanmış, ikili mod) bulunduğu yerden yaklaşık block_bytes baytlık, son tam
+    kaydın sonunda biten bloğu oku; f bloğun sonuna konumlanır. Tırnak içindeki satır sonları kayıt sonu
+    sayılmaz (önündeki '"' sayısı tek). Dosya sonunda kalan her şey döner; boş bayt = bitti.
+    """
+    data = f.read(block_bytes)
+    while data:
+        arr = np.frombuffer(data, dtype=np.uint8)
+        newlines = np.flatnonzero(arr == 10)
+        if len(newlines):
+            quotes = np.flatnonzero(arr == 34)
+            if len(quotes):
+                newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+            if len(newlines):
+                cut = int(newlines[-1]) + 1
+                f.seek(cut - len(data), os.SEEK_CUR)
+                return data[:cut]
+        more = f.read(block_bytes)
+        if not more:
+            return data
+        data += more
+    return data
+
+def read_shard(csv_file_path, shard):
+    start, end = shard
+    with open(csv_file_path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
+
+# İşçi süreç başına bir kez yüklenen tahmin edici
+_shard_predictor = None
+
+def _init_shard_worker(model_path):
+    global _shard_predictor
+    # Paralellik süreçler arasında: işçi içinde BLAS/OpenMP ve ağaç thread'leri tek
+    threadpool_limits(limits=1)
+    _shard_predictor = ExoplanetPredictor(model_path=model_path, backend="sklearn")
+    get_params = getattr(_shard_predictor.model, "get_params", None)
+    if get_params is not None and "n_jobs" in get_params():
+        _shard_predictor.model.set_params(n_jobs=1)
+
+def merge_shard_outputs(paths, offsets, output_path, chunk_rows=BATCH_CHUNK_ROWS):
+    """
+    Yerel id'li parça çıktılarını (başlıksız CSV veya Parquet) verilen sırayla output_path'e birleştir;
+    her parçanın id'lerine ofseti eklenir. output_path ".parquet" ise parça başına bir dosyalı dizin yazılır.
+    """
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    if output_path.endswith(".parquet"):
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        for i, (path, offset) in enumerate(zip(paths, offsets)):
+            part = pd.read_parquet(path)
+            part["id"] = part["id"].astype(np.int64) + int(offset)
+            part.to_parquet(os.path.join(tmp_path, f"part-{i:05d}.parquet"), index=False)
+        shutil.rmtree(output_path, ignore_errors=True)
+        os.replace(tmp_path, output_path)
+        return output_path
+
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as out:
+        out.write(",".join(RESULT_COLUMNS) + "\n")
+        for path, offset in zip(paths, offsets):
+            if os.path.getsize(path) == 0:
+                continue   # tüm satırları geçersiz parça
+            for part in pd.read_csv(path, header=None, names=RESULT_COLUMNS, chunksize=chunk_rows,
+                                    float_precision="round_trip"):
+                part["id"] += int(offset)
+                part.to_csv(out, index=False, header=False)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+def count_shard_rows(csv_file_path, shard):
+    """pandas'ın okuyacağı kayıt sayısı (boş satırlar atlanır)"""
+    data = read_shard(csv_file_path, shard)
+    if b"\n\n" not in data and b"\n\r\n" not in data and not data.startswith((b"\n", b"\r\n")):
+        return data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+    return sum(1 for line in data.split(b"\n") if line.strip())
+
+def _score_shard(csv_file_path, header, shard, index, work_dir, parquet, chunk_rows):
+    """Parçayı yerel id'lerle (0'dan) skorla; global id'ler merge_shard_outputs'ta verilir"""
+    start_time = time.perf_counter()
+    frame = pd.read_csv(io.BytesIO(header + read_shard(csv_file_path, shard)))
+    results_df, n_invalid = _shard_predictor.score_frame(frame, chunk_rows)
+    if parquet:
+        path = os.path.join(work_dir, f"part-{index:05d}.parquet")
+        results_df.to_parquet(path, index=False)
+    else:
+        path = os.path.join(work_dir, f"shard-{index:05d}.csv")
+        results_df.to_csv(path, index=False, header=False)
+    return {"shard": index, "path": path, "pid": os.getpid(), "rows": len(frame), "scored": len(results_df),
+            "planets": int((results_df['prediction'] == 'CONFIRMED PLANET').sum()), "invalid": n_invalid,
+            "seconds": time.perf_counter() - start_time}
+
 # Demo fonksiyonları
 def demo_single_prediction():
     """Tek bir tahmin demo"""
@@ -181,6 +601,26 @@ def demo_batch_prediction():
 if __name__ == "__main__":
     print("🚀 EXOPLANET PREDICTION SYSTEM")
     
+    # python prediction.py --stream adaylar.csv sonuclar.csv|sonuclar.parquet [--chunk-rows N] [--restart]
+    # python prediction.py --parallel adaylar.csv sonuclar.csv|sonuclar.parquet [--workers N]
+    if "--stream" in sys.argv or "--parallel" in sys.argv:
+        parser = argparse.ArgumentParser(description="Large-file batch prediction")
+        mode = parser.add_mutually_exclusive_group(required=True)
+        mode.add_argument("--stream", nargs=2, metavar=("INPUT_CSV", "OUTPUT"), help="single process, resumable")
+        mode.add_argument("--parallel", nargs=2, metavar=("INPUT_CSV", "OUTPUT"), help="byte-range shards")
+        parser.add_argument("--chunk-rows", type=int, default=None)
+        parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start over")
+        parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+        args = parser.parse_args()
+        if args.stream:
+            ExoplanetPredictor().predict_batch_streaming(args.stream[0], args.stream[1],
+                                                         chunk_rows=args.chunk_rows or STREAM_CHUNK_ROWS,
+                                                         resume=not args.restart)
+        else:
+            ExoplanetPredictor().predict_batch_parallel(args.parallel[0], args.parallel[1], n_workers=args.workers,
+                                                        chunk_rows=args.chunk_rows or BATCH_CHUNK_ROWS)
+        sys.exit(0)
+    
     # Demo çalıştır
     success1 = demo_single_prediction()
     success2 = demo_batch_prediction()
@@ -0,0 +1,124 @@
+# prediction_cache.py
+# Tek kayıt tahminleri için LRU + TTL önbellek (mobil uygulama aynı adayları tekrar tekrar gönderir).
+# Anahtar: model sürümü + FusedScorer'ın ürettiği girdi satırı (features sırasında, float32'ye nicelenmiş).
+# Model yeniden yüklenince önbellek boşaltılır.
+
+import collections
+import os
+import threading
+import time
+import numpy as np
+from tree_engine import file_identity
+
+CACHE_MAX_ENTRIES = 4096
+CACHE_TTL_SECONDS = 3600.0
+
+
+def model_version(manifest=None, model_path=None):
+    """
+    Paket manifestindeki model_sha1; paket yoksa model dosyasının boyut + mtime'ı (dosya okunmaz).
+    İkisi de yoksa None. /api/health aynı kimliği raporlar.
+    """
+    if manifest is not None and manifest.get("model_sha1"):
+        return manifest["model_sha1"]
+    if model_path is not None and os.path.exists(model_path):
+        size, mtime_ns = file_identity(model_path)
+        return f"file:{size}:{mtime_ns}"
+    return None
+
+
+def canonical_key(row):
+    """
+    Girdi satırını anahtara çevir: float32'ye nicelenir (ağaç modelleri de float32 ile değerlendirir),
+    -0.0 -> 0.0 ve tüm NaN'lar tek bit desenine indirgenir. NaN içeren tuple'lar eşit sayılmadığı için
+    anahtar baytlardır.
+    """
+    values = np.asarray(row, dtype=np.float32) + np.float32(0.0)
+    values[np.isnan(values)] = np.nan
+    return values.tobytes()
+
+
+class PredictionCache:
+    """
+    (model sürümü, nicelenmiş özellik satırı) -> (etiket, pozitif sınıf olasılığı).
+    max_entries'i aşınca en uzun süre kullanılmayan kayıt atılır; ttl_seconds'tan eski kayıtlar yeniden hesaplanır.
+    max_entries=0 önbelleği kapatır. Flask thread'leri arasında paylaşılabilir (kilitli).
+    """
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, version=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = version
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def invalidate(self, version=None):
+        """Tüm kayıtları at ve yeni model sürümüne geç (model yeniden yüklendiğinde)"""
+        with self._lock:
+            self._entries.clear()
+            self.version = version
+            self.invalidations += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and time.monotonic() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def score_one(self, fused, record):
+        """FusedScorer.score_one'ın önbellekli karşılığı: (etiket, pozitif sınıf olasılığı)"""
+        X = fused.to_array(record)
+        key = (self.version, canonical_key(X[0]))
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        labels, probabilities = fused.score_array(X)
+        result = (labels[0], float(probabilities[0]))
+        self.put(key, result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+def cache_from_env(environ=None):
+    """EXOPLANET_PREDICTION_CACHE_SIZE (0 = kapalı) ve EXOPLANET_PREDICTION_CACHE_TTL (saniye, 0 = süresiz)"""
+    environ = os.environ if environ is None else environ
+    return PredictionCache(max_entries=int(environ.get("EXOPLANET_PREDICTION_CACHE_SIZE", CACHE_MAX_ENTRIES)),
+                           ttl_seconds=float(environ.get("EXOPLANET_PREDICTION_CACHE_TTL", CACHE_TTL_SECONDS)))
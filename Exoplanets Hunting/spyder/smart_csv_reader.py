@@ -1,66 +1,23 @@
 # smart_csv_reader.py
 import pandas as pd
 import os
+from archive_cache import load_archive_table
 
 print("🎯 AKILLI CSV OKUYUCU BAŞLATILDI...")
 
 def smart_read_nasa_csv(filename):
-    """NASA CSV'lerini akıllıca oku"""
+    """NASA CSV'lerini akıllıca oku (tek geçiş, geçici dosya yok)"""
     print(f"\n📂 {filename} analiz ediliyor...")
     
     try:
-        # Tüm satırları oku
-        with open(filename, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f.readlines() if line.strip()]
+        df, schema = load_archive_table(filename)
         
-        print(f"   📊 Toplam satır: {len(lines)}")
-        
-        # Header'ı bul (# ile başlayan ama veri içeren satır)
-        header_line = None
-        data_start = 0
-        
-        for i, line in enumerate(lines):
-            if line.startswith('#'):
-                # Bu bir header satırı olabilir
-                clean_line = line[1:].strip()  # # işaretini kaldır
-                if clean_line and not clean_line.startswith('This file'):
-                    # Virgülle ayrılmış sütun isimlerini kontrol et
-                    if ',' in clean_line and len(clean_line.split(',')) > 5:
-                        header_line = clean_line
-                        data_start = i + 1
-                        print(f"   🎯 Header bulundu (satır {i+1})")
-                        break
-        
-        if header_line:
-            print(f"   🏷️  Header: {header_line[:80]}...")
-            print(f"   📝 Veri başlangıcı: satır {data_start+1}")
-            
-            # Veri satırlarını al
-            data_lines = lines[data_start:]
-            print(f"   📈 Veri satırı: {len(data_lines)}")
-            
-            # Geçici dosya oluştur
-            temp_file = f"temp_{os.path.basename(filename)}"
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(header_line + '\n')
-                f.write('\n'.join(data_lines))
-            
-            # CSV'yi oku
-            df = pd.read_csv(temp_file)
-            
-            # Geçici dosyayı sil
-            os.remove(temp_file)
-            
-            print(f"   ✅ {len(df)} kayıt yüklendi")
-            print(f"   🎯 Sütun sayısı: {df.shape[1]}")
-            return df
-        else:
-            print("   ❌ Header bulunamadı, manuel deneme...")
-            # Manuel deneme - ilk 10 satırı göster
-            print("   👀 İlk 10 satır:")
-            for i in range(min(10, len(lines))):
-                print(f"      {i+1}: {lines[i][:100]}...")
-            return None
+        print(f"   📊 Önsöz satırı: {schema.preamble_lines}")
+        print(f"   📝 Açıklamalı sütun: {len(schema.columns)}")
+        print(f"   🏷️  Header: {','.join(schema.header)[:80]}...")
+        print(f"   ✅ {len(df)} kayıt yüklendi")
+        print(f"   🎯 Sütun sayısı: {df.shape[1]}")
+        return df
             
     except Exception as e:
         print(f"   ❌ Hata: {e}")
@@ -0,0 +1,377 @@
+# spool_scoring.py
+# Ortak dosya sistemi üzerinden çok makineli toplu tahmin (aracı servis yok):
+#   create  -> girdi bayt aralığı parçalarına bölünür, her parça için spool/pending/ altında bir manifest yazılır
+#   worker  -> herhangi bir makinede: parça atomik rename ile sahiplenilir, skorlanır, sonuç yayınlanır;
+#              çalışırken sahiplik dosyası düzenli olarak dokunulur (heartbeat), duran parçalar geri alınır
+#   merge   -> tamamlanan parçalar girdi sırasıyla prediction_results.csv'de birleştirilir (yerel id'ler parça
+#              ofsetleriyle global id'lere çevrilir) + genel özet
+#
+# Kullanım:
+#   python spool_scoring.py create adaylar.csv spool/ --shards 64
+#   python spool_scoring.py worker spool/            (her makinede bir veya daha fazla)
+#   python spool_scoring.py status spool/
+#   python spool_scoring.py merge spool/ --output prediction_results.csv
+
+import argparse
+import io
+import json
+import os
+import socket
+import sys
+import threading
+import time
+import pandas as pd
+from prediction import (ExoplanetPredictor, BATCH_CHUNK_ROWS, MIN_SHARD_BYTES, MAX_SHARD_BYTES, plan_byte_shards,
+                        read_shard, count_shard_rows, merge_shard_outputs)
+
+JOB_FILE = "job.json"
+SUMMARY_FILE = "summary.json"
+QUEUE_DIRS = ("pending", "claimed", "done", "failed", "results")
+SHARD_BYTES = 64 * 1024 ** 2    # create: hedef parça boyutu
+HEARTBEAT_SECONDS = 15          # işçi sahiplik dosyasının mtime'ını bu aralıkla günceller
+STALE_SECONDS = 300             # bu kadar süre heartbeat gelmeyen parça geri alınır (makineler arası saat farkı payı)
+MAX_ATTEMPTS = 3                # hata veren parça bu kadar denemeden sonra failed/'a taşınır
+POLL_SECONDS = 5
+
+
+def _atomic_write_json(path, data):
+    tmp_path = f"{path}.{socket.gethostname()}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _shard_name(index):
+    return f"shard-{index:05d}"
+
+
+def _dir(spool_dir, name):
+    return os.path.join(spool_dir, name)
+
+
+def _check_input(job):
+    """Girdi iş oluşturulduktan sonra değiştiyse parça bayt aralıkları geçersizdir: RuntimeError"""
+    size = os.path.getsize(job["input"])
+    if size != job["input_size"]:
+        raise RuntimeError(f"{job['input']} changed since the job was created "
+                           f"({job['input_size']:,} -> {size:,} bytes) - create a new job")
+
+
+# ---------------------------
+# Koordinatör
+# ---------------------------
+def create_job(csv_file_path, spool_dir, model_path="models/best_model.pkl", n_shards=None,
+               chunk_rows=BATCH_CHUNK_ROWS):
+    """
+    Girdiyi satır sınırlarına hizalı bayt aralıklarına böl ve parça manifestlerini pending/'e yaz.
+    Satırlar burada sayılmaz: işçiler yerel id'ler yazar, merge_results bunları predict_batch ile aynı
+    global id'lere çevirir.
+    Girdi ve model yolu tüm işçi makinelerden aynı yolla erişilebilir olmalıdır.
+    """
+    if os.path.exists(_dir(spool_dir, JOB_FILE)):
+        raise FileExistsError(f"{spool_dir} already holds a job - use a new spool directory")
+    for name in QUEUE_DIRS:
+        os.makedirs(_dir(spool_dir, name), exist_ok=True)
+
+    input_path = os.path.abspath(csv_file_path)
+    size = os.path.getsize(input_path)
+    requested = n_shards or max(1, -(-size // SHARD_BYTES))
+    header, shards = plan_byte_shards(input_path, requested)
+    if n_shards and len(shards) != n_shards:
+        print(f"⚠️ --shards {n_shards} -> {len(shards)} shards "
+              f"(shard size is kept within {MIN_SHARD_BYTES // 1024 ** 2}-{MAX_SHARD_BYTES // 1024 ** 2} MB)")
+    for index, shard in enumerate(shards):
+        _atomic_write_json(os.path.join(_dir(spool_dir, "pending"), _shard_name(index) + ".json"), {
+            "index": index, "start": shard[0], "end": shard[1], "attempts": 0, "errors": [],
+        })
+
+    job = {
+        "input": input_path,
+        "input_size": size,
+        "header": header.decode("latin-1"),   # bayt bayt geri dönüşür
+        "model_path": os.path.abspath(model_path),
+        "chunk_rows": chunk_rows,
+        "shards": len(shards),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    _atomic_write_json(_dir(spool_dir, JOB_FILE), job)
+    print(f"📦 Job created: {spool_dir} ({len(shards)} shards, {size / 1024 ** 2:,.1f} MB)")
+    return job
+
+
+def job_status(spool_dir):
+    """Kuyruk durumlarına göre parça sayıları (+ en eski heartbeat yaşı)"""
+    status = {}
+    for name in ("pending", "claimed", "done", "failed"):
+        status[name] = len([f for f in os.listdir(_dir(spool_dir, name)) if f.endswith(".json")])
+    ages = []
+    for name in os.listdir(_dir(spool_dir, "claimed")):
+        try:
+            ages.append(time.time() - os.path.getmtime(os.path.join(_dir(spool_dir, "claimed"), name)))
+        except FileNotFoundError:
+            pass
+    status["oldest_heartbeat_seconds"] = max(ages) if ages else None
+    return status
+
+
+def reclaim_stale(spool_dir, stale_seconds=STALE_SECONDS):
+    """
+    Heartbeat'i stale_seconds'tan eski sahiplenilmiş parçaları pending/'e geri taşı.
+    Birden çok süreç aynı anda denerse rename'i sadece biri başarır. Geri alınan parça sayısını döndürür.
+    """
+    claimed_dir = _dir(spool_dir, "claimed")
+    reclaimed = 0
+    for name in os.listdir(claimed_dir):
+        path = os.path.join(claimed_dir, name)
+        try:
+            if time.time() - os.path.getmtime(path) < stale_seconds:
+                continue
+            shard, owner = name[:-len(".json")].split("@", 1)
+            os.rename(path, os.path.join(_dir(spool_dir, "pending"), shard + ".json"))
+        except (FileNotFoundError, ValueError):
+            continue
+        reclaimed += 1
+        print(f"♻️ Reclaimed stalled {shard} (owner {owner})")
+    return reclaimed
+
+
+def merge_results(spool_dir, output_path="prediction_results.csv"):
+    """
+    Tüm parçalar bittiyse sonuçları girdi sırasıyla birleştir, genel özeti yaz ve döndür.
+    Parça ofseti önceki parçaların kayıt sayısıdır (done/ kayıtlarından; başarısız parçalar burada sayılır).
+    """
+    job = _read_json(_dir(spool_dir, JOB_FILE))
+    _check_input(job)
+    done = [_read_json(os.path.join(_dir(spool_dir, "done"), _shard_name(i) + ".json"))
+            for i in range(job["shards"])
+            if os.path.exists(os.path.join(_dir(spool_dir, "done"), _shard_name(i) + ".json"))]
+    rows_by_index = {r["index"]: r["rows"] for r in done}
+    # Başarısız olup geri alınan ve sonra biten parça hem done/ hem failed/'da olabilir: done/ geçerlidir
+    failed = {}
+    for name in os.listdir(_dir(spool_dir, "failed")):
+        if name.endswith(".json"):
+            manifest = _read_json(os.path.join(_dir(spool_dir, "failed"), name))
+            if manifest["index"] not in rows_by_index:
+                failed[manifest["index"]] = manifest
+    if len(rows_by_index) + len(failed) < job["shards"]:
+        raise RuntimeError(f"Job not finished yet: {job_status(spool_dir)}")
+    for index, manifest in failed.items():
+        rows_by_index[index] = count_shard_rows(job["input"], (manifest["start"], manifest["end"]))
+    offsets, offset = {}, 0
+    for index in range(job["shards"]):
+        offsets[index] = offset
+        offset += rows_by_index[index]
+    merge_shard_outputs([os.path.join(_dir(spool_dir, "results"), _shard_name(r["index"]) + ".csv") for r in done],
+                        [offsets[r["index"]] for r in done], output_path)
+
+    scored = sum(r["scored"] for r in done)
+    planets = sum(r["planets"] for r in done)
+    hosts = {}
+    for r in done:
+        h = hosts.setdefault(r["worker"], {"shards": 0, "rows": 0, "busy_seconds": 0.0})
+        h["shards"] += 1
+        h["rows"] += r["rows"]
+        h["busy_seconds"] += r["seconds"]
+    for h in hosts.values():
+        h["rows_per_second"] = h["rows"] / max(h["busy_seconds"], 1e-9)
+
+    summary = {
+        "output": output_path,
+        "shards": job["shards"],
+        "failed_shards": [_shard_name(index) for index in sorted(failed)],
+        "total_records": sum(r["rows"] for r in done),
+        "successful_predictions": scored,
+        "planets_detected": planets,
+        "false_positives": scored - planets,
+        "planet_ratio": planets / scored if scored else 0,
+        "invalid_rows": sum(r["invalid"] for r in done),
+        "workers": hosts,
+    }
+    _atomic_write_json(_dir(spool_dir, SUMMARY_FILE), summary)
+
+    print(f"\n📊 TOPLU TAHMİN SONUÇLARI (spool, {len(hosts)} workers):")
+    print(f"   ✅ Gezegen Tespit Edilen: {planets:,}")
+    print(f"   ❌ Sahte Pozitif: {scored - planets:,}")
+    print(f"   📈 Gezegen Oranı: {summary['planet_ratio']:.2%}")
+    if summary["failed_shards"]:
+        print(f"   ⚠️ Failed shards (not in output): {', '.join(summary['failed_shards'])}")
+    print(f"✅ Tahmin sonuçları kaydedildi: {output_path}")
+    return summary
+
+
+# ---------------------------
+# İşçi
+# ---------------------------
+class _Heartbeat:
+    """Sahiplik dosyasının mtime'ını düzenli güncelle; dosya başkası tarafından geri alındıysa lost=True"""
+
+    def __init__(self, path, interval=HEARTBEAT_SECONDS):
+        self.path = path
+        self.interval = interval
+        self.lost = False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                os.utime(self.path)
+            except FileNotFoundError:
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def claim_next(spool_dir, worker_id):
+    """Sıradaki parçayı atomik rename ile sahiplen: (manifest, sahiplik yolu) veya None"""
+    pending_dir = _dir(spool_dir, "pending")
+    for name in sorted(os.listdir(pending_dir)):
+        if not name.endswith(".json"):
+            continue
+        claim_path = os.path.join(_dir(spool_dir, "claimed"), f"{name[:-len('.json')]}@{worker_id}.json")
+        pending_path = os.path.join(pending_dir, name)
+        try:
+            # rename mtime'ı korur: heartbeat saati rename'den önce başlatılır, yoksa eski mtime'lı sahiplik
+            # dosyası başka bir işçinin reclaim_stale'i tarafından hemen geri alınabilir
+            os.utime(pending_path)
+            os.rename(pending_path, claim_path)
+            os.utime(claim_path)
+            return _read_json(claim_path), claim_path
+        except FileNotFoundError:
+            continue   # başka bir işçi önce aldı ya da sahiplik hemen geri alındı
+    return None
+
+
+def _score_claimed(predictor, job, manifest, worker_id):
+    start_time = time.perf_counter()
+    shard = (manifest["start"], manifest["end"])
+    data = job["header"].encode("latin-1") + read_shard(job["input"], shard)
+    frame = pd.read_csv(io.BytesIO(data))
+    results_df, n_invalid = predictor.score_frame(frame, job["chunk_rows"])   # yerel id'ler
+    return results_df, {
+        "index": manifest["index"], "worker": worker_id, "rows": len(frame), "scored": len(results_df),
+        "planets": int((results_df['prediction'] == 'CONFIRMED PLANET').sum()), "invalid": n_invalid,
+        "seconds": time.perf_counter() - start_time, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def _publish(spool_dir, manifest, results_df, record, claim_path):
+    """
+    Sonucu yayınla: önce sonuç dosyası, sonra done/ kaydı (ikisi de atomik replace), en son sahiplik silinir.
+    Parça geri alınıp başka işçide de bitmiş olabilir: sonuç deterministik, ikinci yayın aynı içeriği yazar.
+    """
+    name = _shard_name(manifest["index"])
+    result_path = os.path.join(_dir(spool_dir, "results"), name + ".csv")
+    tmp_path = f"{result_path}.{record['worker']}.tmp"
+    results_df.to_csv(tmp_path, index=False, header=False)
+    os.replace(tmp_path, result_path)
+    _atomic_write_json(os.path.join(_dir(spool_dir, "done"), name + ".json"), record)
+    try:
+        os.remove(claim_path)
+    except FileNotFoundError:
+        pass
+
+
+def _release_failed(spool_dir, manifest, claim_path, error):
+    """Hata: deneme sayısı artırılır, sınır aşılmadıysa pending/'e, aşıldıysa failed/'a taşınır"""
+    manifest["attempts"] += 1
+    manifest["errors"].append(error)
+    target_dir = "failed" if manifest["attempts"] >= MAX_ATTEMPTS else "pending"
+    target = os.path.join(_dir(spool_dir, target_dir), _shard_name(manifest["index"]) + ".json")
+    try:
+        _atomic_write_json(claim_path, manifest)
+        os.rename(claim_path, target)
+    except FileNotFoundError:
+        pass   # bu arada geri alınmış
+
+
+def run_worker(spool_dir, worker_id=None, model_path=None, stale_seconds=STALE_SECONDS, poll_seconds=POLL_SECONDS,
+               max_shards=None):
+    """
+    Kuyruk boşalana kadar parça sahiplen + skorla + yayınla. Model süreç başına bir kez yüklenir.
+    model_path: iş kaydındakinden farklı bir yolda (örn. yerel kopya) ise. İşlenen parça sayısını döndürür.
+    """
+    job = _read_json(_dir(spool_dir, JOB_FILE))
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    predictor = ExoplanetPredictor(model_path=model_path or job["model_path"], backend="sklearn")
+    print(f"👷 Worker {worker_id} joined {spool_dir}")
+
+    processed = 0
+    while max_shards is None or processed < max_shards:
+        _check_input(job)   # değişmiş girdide yanlış bayt aralıkları skorlanmasın
+        reclaim_stale(spool_dir, stale_seconds)
+        claim = claim_next(spool_dir, worker_id)
+        if claim is None:
+            status = job_status(spool_dir)
+            if status["claimed"] == 0:
+                break   # bekleyen de sahiplenilmiş de yok: iş bitti
+            time.sleep(poll_seconds)   # başka işçilerdeki parçalar bitsin ya da geri alınabilir hale gelsin
+            continue
+
+        manifest, claim_path = claim
+        try:
+            with _Heartbeat(claim_path) as heartbeat:
+                results_df, record = _score_claimed(predictor, job, manifest, worker_id)
+        except Exception as e:
+            print(f"❌ {_shard_name(manifest['index'])} failed: {e}")
+            _release_failed(spool_dir, manifest, claim_path, f"{worker_id}: {type(e).__name__}: {e}")
+            continue
+        if heartbeat.lost:
+            print(f"⚠️ {_shard_name(manifest['index'])} was reclaimed while scoring - publishing anyway")
+        _publish(spool_dir, manifest, results_df, record, claim_path)
+        processed += 1
+        print(f"   ✅ {_shard_name(manifest['index'])}: {record['rows']:,} rows in {record['seconds']:.1f}s "
+              f"({record['rows'] / max(record['seconds'], 1e-9):,.0f} rows/s)")
+    print(f"👷 Worker {worker_id} finished: {processed} shards")
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spool-directory batch scoring across machines")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("create", help="split the input into shard manifests")
+    p.add_argument("input")
+    p.add_argument("spool")
+    p.add_argument("--model-path", default="models/best_model.pkl")
+    p.add_argument("--shards", type=int, default=None)
+    p.add_argument("--chunk-rows", type=int, default=BATCH_CHUNK_ROWS)
+    p = sub.add_parser("worker", help="claim and score shards until the queue is empty")
+    p.add_argument("spool")
+    p.add_argument("--worker-id", default=None)
+    p.add_argument("--model-path", default=None, help="override the job's model path on this host")
+    p.add_argument("--stale-seconds", type=float, default=STALE_SECONDS)
+    p = sub.add_parser("status", help="shard counts per queue")
+    p.add_argument("spool")
+    p = sub.add_parser("merge", help="merge results in input order and write the summary")
+    p.add_argument("spool")
+    p.add_argument("--output", default="prediction_results.csv")
+    args = parser.parse_args(argv)
+
+    if args.command == "create":
+        create_job(args.input, args.spool, model_path=args.model_path, n_shards=args.shards,
+                   chunk_rows=args.chunk_rows)
+    elif args.command == "worker":
+        run_worker(args.spool, worker_id=args.worker_id, model_path=args.model_path,
+                   stale_seconds=args.stale_seconds)
+    elif args.command == "status":
+        print(json.dumps(job_status(args.spool), indent=2))
+    else:
+        merge_results(args.spool, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
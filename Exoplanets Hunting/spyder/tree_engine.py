@@ -0,0 +1,277 @@
+# tree_engine.py
+# Eğitilmiş ağaç topluluklarını düz NumPy dizilerine derleme ve vektörel (seviye seviye) çıkarım
+# (sklearn'ün ağaç başına genel çağrı yükü olmadan, aynı olasılıklar)
+
+import hashlib
+import os
+import numpy as np
+from sklearn.ensemble import (RandomForestClassifier, ExtraTreesClassifier, HistGradientBoostingClassifier,
+                              HistGradientBoostingRegressor)
+from sklearn.tree import DecisionTreeClassifier
+
+FLAT_MODEL_FILE = "flat_model.npz"
+FLAT_MODEL_VERSION = 1
+CHUNK_ROWS = 4096   # (satır x ağaç) düğüm matrisi bellekte sınırlı kalsın
+
+# Toplama biçimleri
+AGG_MEAN = "mean"        # orman: yaprak olasılıklarının ortalaması
+AGG_SIGMOID = "sigmoid"  # HistGradientBoostingClassifier: sigmoid(taban + yaprak toplamı)
+AGG_CLIP = "clip"        # DistilledClassifier: clip(taban + yaprak toplamı, 0, 1)
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_identity(path):
+    """Ucuz değişiklik kontrolü için [boyut, mtime_ns]"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def source_matches(path, sha1, identity=None):
+    """
+    path hâlâ sha1 özetli dosya mı? Kaydedilmiş boyut + mtime aynıysa dosya okunmaz;
+    farklıysa (kopyalama, dokunma) SHA-1 hesaplanıp karşılaştırılır.
+    """
+    if identity is not None and list(identity) == file_identity(path):
+        return True
+    return file_sha1(path) == sha1
+
+
+class FlatForest:
+    """
+    Tüm ağaçların düğümleri tek bir düz dizi kümesinde:
+      feature, threshold, left, right, value, missing_left  (düğüm başına)
+      roots                                                  (ağaç başına kök düğüm indeksi)
+    Yapraklar kendilerine işaret eder (left = right = kendisi), böylece tüm satırlar max_depth adımda
+    sabit bir döngüyle ilerletilir.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, missing_left, roots, max_depth, classes,
+                 aggregation=AGG_MEAN, baseline=0.0, input_dtype=np.float32, source_sha1="", source_identity=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.missing_left = missing_left
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = np.asarray(classes)
+        self.aggregation = aggregation
+        self.baseline = float(baseline)
+        self.input_dtype = np.dtype(input_dtype)
+        self.source_sha1 = source_sha1
+        self.source_identity = source_identity
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    # ---------------------------
+    # Derleme
+    # ---------------------------
+    @classmethod
+    def _from_nodes(cls, trees, classes, aggregation, baseline, input_dtype):
+        """trees: her ağaç için (feature, threshold, left, right, is_leaf, value, missing_left, depth)"""
+        sizes = [len(t[0]) for t in trees]
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        feature, threshold, left, right, value, missing_left = [], [], [], [], [], []
+        for (f, thr, lo, hi, is_leaf, val, miss, _), offset in zip(trees, offsets):
+            own = np.arange(len(f), dtype=np.int64) + offset
+            feature.append(np.where(is_leaf, 0, f))
+            threshold.append(np.where(is_leaf, np.inf, thr))
+            left.append(np.where(is_leaf, own, lo + offset))
+            right.append(np.where(is_leaf, own, hi + offset))
+            value.append(val)
+            missing_left.append(miss)
+        index_dtype = np.int32 if sum(sizes) < 2 ** 31 else np.int64
+        return cls(
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            left=np.concatenate(left).astype(index_dtype),
+            right=np.concatenate(right).astype(index_dtype),
+            value=np.concatenate(value).astype(np.float64),
+            missing_left=np.concatenate(missing_left).astype(bool),
+            roots=offsets.astype(index_dtype),
+            max_depth=max(t[7] for t in trees),
+            classes=classes,
+            aggregation=aggregation,
+            baseline=baseline,
+            input_dtype=input_dtype,
+        )
+
+    @staticmethod
+    def _sklearn_tree_nodes(estimator):
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        value = tree.value[:, 0, :]
+        totals = value.sum(axis=1)
+        totals[totals == 0] = 1
+        # İkili sınıflandırma: düğüm değeri pozitif sınıf olasılığı
+        positive = value[:, 1] / totals
+        missing = getattr(tree, "missing_go_to_left", np.zeros(tree.node_count, dtype=np.uint8))
+        return (tree.feature, tree.threshold, tree.children_left, tree.children_right, is_leaf, positive,
+                missing.astype(bool), tree.max_depth)
+
+    @staticmethod
+    def _hist_tree_nodes(predictor):
+        nodes = predictor.nodes
+        if nodes["is_categorical"].any():
+            raise ValueError("Categorical splits are not supported by the flat engine")
+        is_leaf = nodes["is_leaf"].astype(bool)
+        return (nodes["feature_idx"], nodes["num_threshold"], nodes["left"].astype(np.int64),
+                nodes["right"].astype(np.int64), is_leaf, np.where(is_leaf, nodes["value"], 0.0),
+                nodes["missing_go_to_left"].astype(bool), int(nodes["depth"].max()))
+
+    @classmethod
+    def from_model(cls, model):
+        """sklearn ormanı, HistGradientBoostingClassifier veya DistilledClassifier'dan derle"""
+        if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier)):
+            estimators = model.estimators_
+        elif isinstance(model, DecisionTreeClassifier):
+            estimators = [model]
+        else:
+            estimators = None
+
+        if estimators is not None:
+            if len(model.classes_) != 2:
+                raise ValueError("Flat engine supports binary classifiers only")
+            trees = [cls._sklearn_tree_nodes(est) for est in estimators]
+            # sklearn ağaçları girdiyi float32'ye çevirip float64 eşiklerle karşılaştırır
+            return cls._from_nodes(trees, model.classes_, AGG_MEAN, 0.0, np.float32)
+
+        # model_compression.DistilledClassifier (döngüsel import olmaması için yapısından tanınır)
+        if isinstance(getattr(model, "regressor", None), HistGradientBoostingRegressor):
+            hist, classes, aggregation = model.regressor, model.classes_, AGG_CLIP
+        elif isinstance(model, HistGradientBoostingClassifier):
+            if len(model.classes_) != 2:
+                raise ValueError("Flat engine supports binary classifiers only")
+            hist, classes, aggregation = model, model.classes_, AGG_SIGMOID
+        else:
+            raise ValueError(f"{type(model).__name__} is not supported by the flat engine")
+
+        if getattr(hist, "_preprocessor", None) is not None:
+            raise ValueError("Models with categorical preprocessing are not supported by the flat engine")
+        trees = [cls._hist_tree_nodes(iteration[0]) for iteration in hist._predictors]
+        baseline = float(np.ravel(hist._baseline_prediction)[0])
+        # HistGradientBoosting ham girdiyi float64 olarak karşılaştırır
+        return cls._from_nodes(trees, classes, aggregation, baseline, np.float64)
+
+    # ---------------------------
+    # Çıkarım
+    # ---------------------------
+    def _leaf_values(self, X):
+        """(satır, ağaç) yaprak değerleri: tüm satırlar ve ağaçlar aynı anda, seviye seviye"""
+        n_rows = X.shape[0]
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = np.where(np.isnan(x), self.missing_left[nodes], x <= self.threshold[nodes])
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return self.value[nodes]
+
+    def positive_proba(self, X, chunk_rows=CHUNK_ROWS):
+        X = np.asarray(X, dtype=self.input_dtype)
+        if X.ndim == 1:
+            X = X[None, :]
+        out = np.empty(X.shape[0], dtype=np.float64)
+        for start in range(0, X.shape[0], chunk_rows):
+            leaves = self._leaf_values(X[start:start + chunk_rows])
+            if self.aggregation == AGG_MEAN:
+                out[start:start + chunk_rows] = leaves.mean(axis=1)
+            else:
+                raw = self.baseline + leaves.sum(axis=1)
+                if self.aggregation == AGG_SIGMOID:
+                    out[start:start + chunk_rows] = 1.0 / (1.0 + np.exp(-raw))
+                else:
+                    out[start:start + chunk_rows] = np.clip(raw, 0.0, 1.0)
+        return out
+
+    def predict_proba(self, X):
+        p = self.positive_proba(X)
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        return self.classes_[np.argmax(proba, axis=1)]
+
+    # ---------------------------
+    # Kayıt
+    # ---------------------------
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, version=FLAT_MODEL_VERSION, feature=self.feature, threshold=self.threshold,
+                 left=self.left, right=self.right, value=self.value, missing_left=self.missing_left,
+                 roots=self.roots, max_depth=self.max_depth, classes=self.classes_,
+                 aggregation=self.aggregation, baseline=self.baseline, input_dtype=self.input_dtype.str,
+                 source_sha1=self.source_sha1,
+                 source_identity=np.asarray(self.source_identity if self.source_identity is not None else [-1, -1],
+                                            dtype=np.int64))
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != FLAT_MODEL_VERSION:
+                raise ValueError(f"Unsupported flat model version: {int(data['version'])}")
+            return cls(
+                feature=data["feature"], threshold=data["threshold"], left=data["left"], right=data["right"],
+                value=data["value"], missing_left=data["missing_left"], roots=data["roots"],
+                max_depth=int(data["max_depth"]), classes=data["classes"], aggregation=str(data["aggregation"]),
+                baseline=float(data["baseline"]), input_dtype=str(data["input_dtype"]),
+                source_sha1=str(data["source_sha1"]),
+                source_identity=(data["source_identity"].tolist() if "source_identity" in data.files
+                                 and data["source_identity"][0] >= 0 else None),
+            )
+
+    def __repr__(self):
+        return (f"FlatForest(trees={self.n_trees}, nodes={self.n_nodes}, max_depth={self.max_depth}, "
+                f"aggregation={self.aggregation!r})")
+
+
+def export_flat_model(model, out_dir="models"):
+    """
+    Kaydedilmiş best_model.pkl'yi flat_model.npz olarak derle.
+    Desteklenmeyen modellerde (örn. XGBoost, LogisticRegression) eski dosya silinir ve None döner.
+    Dosya best_model.pkl'nin SHA-1'ini taşır: model değişip derleme yenilenmezse yükleyici fark eder.
+    """
+    flat_path = os.path.join(out_dir, FLAT_MODEL_FILE)
+    try:
+        flat = FlatForest.from_model(model)
+    except ValueError as e:
+        print(f"   ℹ️ Flat engine export skipped: {e}")
+        if os.path.exists(flat_path):
+            os.remove(flat_path)
+        return None
+    flat.source_sha1 = file_sha1(os.path.join(out_dir, "best_model.pkl"))
+    flat.source_identity = file_identity(os.path.join(out_dir, "best_model.pkl"))
+    flat.save(flat_path)
+    print(f"   ✅ Saved: {flat_path} ({flat.n_trees} trees, {flat.n_nodes:,} nodes)")
+    return flat_path
+
+
+def load_flat_model(model_dir="models"):
+    """
+    flat_model.npz'yi yükle; yoksa veya best_model.pkl ile eşleşmiyorsa (eski derleme) None döner.
+    """
+    flat_path = os.path.join(model_dir, FLAT_MODEL_FILE)
+    model_path = os.path.join(model_dir, "best_model.pkl")
+    if not os.path.exists(flat_path) or not os.path.exists(model_path):
+        return None
+    flat = FlatForest.load(flat_path)
+    if not source_matches(model_path, flat.source_sha1, flat.source_identity):
+        print(f"⚠️ {flat_path} is stale (best_model.pkl changed) - using the sklearn model")
+        return None
+    return flat
@@ -6,6 +6,8 @@ from sklearn.metrics import confusion_matrix, roc_curve, roc_auc_score, precisio
 import joblib
 import pandas as pd
 import os
+from feature_store import FEATURE_STORE_DIR, load_feature_store
+from model_bundle import BUNDLE_FILE, load_serving_artifacts
 
 plt.rcParams['font.family'] = 'DejaVu Sans'  # Türkçe karakter desteği
 
@@ -14,14 +16,18 @@ class ExoplanetVisualizer:
                  preprocessor_path="models/preprocessor.pkl",
                  feature_path="models/feature_list.pkl"):
         
+        model_dir = os.path.dirname(model_path) or "."
+
         # Dosya kontrolü
-        if not os.path.exists(model_path):
+        if not os.path.exists(model_path) and not os.path.exists(os.path.join(model_dir, BUNDLE_FILE)):
             print(f"⚠️  Model dosyası bulunamadı: {model_path}")
             return
-            
-        self.model = joblib.load(model_path)
-        self.preprocessor = joblib.load(preprocessor_path)
-        self.features = joblib.load(feature_path)
+
+        # model_bundle.joblib varsa o, yoksa üç ayrı pkl (görselleştirme her zaman sklearn modelini kullanır)
+        artifacts = load_serving_artifacts(model_dir, backend="sklearn")
+        self.model = artifacts["model"]
+        self.preprocessor = artifacts["preprocessor"]
+        self.features = artifacts["features"]
         print("✅ Görselleştirici başarıyla yüklendi!")
         
     def plot_feature_importance(self, feature_names=None):
@@ -190,7 +196,13 @@ def test_visualizations():
         visualizer.plot_feature_importance()
         visualizer.plot_confusion_matrix(y_test_demo, y_pred_demo)
         visualizer.plot_roc_curve(y_test_demo, y_proba_demo)
-        visualizer.plot_correlation_heatmap(X_test_demo)
+        
+        # Feature store varsa korelasyon için gerçek eğitim verisi kullanılır (memmap, sıfır kopya)
+        if os.path.exists(os.path.join(FEATURE_STORE_DIR, "schema.json")):
+            X_store, _, _ = load_feature_store(FEATURE_STORE_DIR)
+            visualizer.plot_correlation_heatmap(X_store[[f for f in visualizer.features if f in X_store.columns]])
+        else:
+            visualizer.plot_correlation_heatmap(X_test_demo)
         
         print("\n🎉 Tüm görselleştirmeler başarıyla tamamlandı!")
         
@@ -0,0 +1,224 @@
+# warm_start_retrain.py
+# Yeni etiketli satırlar geldiğinde modeli sıfırdan eğitmeden güncelleme (warm start)
+# Orman: yeni ağaçlar eklenir, sınırı aşan en eski ağaçlar emekliye ayrılır
+# Boosting: mevcut topluluğun üzerine yeni turlar eklenir
+# Yeni ağaçlar / turlar tüm etiketli katalogda (delta ağırlıklı) eğitilir: yalnız deltayı görmüş ağaçlarla
+# zamanla kayma olmaz. Karşılaştırma, ilk eğitimin test ayrımında (holdout_set.pkl) yapılır.
+
+import copy
+import json
+import os
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.metrics import roc_auc_score
+from tree_engine import export_flat_model
+from model_bundle import write_model_bundle
+from derived_features import add_derived_features
+from exoplanet_tabular_pipeline import (LABEL_UNKNOWN, COORD_COLUMNS, DEDUP_MODE, MATERIALIZED_STATE,
+                                        deduplicate_missions, stage_snapshot, commit_snapshot, koi_path, toi_path,
+                                        k2_path, load_holdout_set, row_fingerprints)
+RETRAIN_LOG_FILE = "retrain_log.json"
+
+N_NEW_TREES = 50        # RandomForest: her güncellemede eklenen ağaç sayısı
+MAX_TREES = 400         # RandomForest: tutulacak en fazla ağaç (fazlası en eskiden başlayarak atılır)
+N_NEW_ROUNDS = 50       # Boosting: her güncellemede eklenen tur sayısı
+MAX_ROUNDS = 2000       # Boosting: toplam tur sınırı (aşılırsa tam yeniden eğitim gerekir)
+AUC_TOLERANCE = 0.002   # güncellenen model holdout ROC-AUC'de en fazla bu kadar düşebilir
+DELTA_WEIGHT = 3.0      # yeni/değişen satırların eğitimdeki örnek ağırlığı (diğer etiketli satırlar 1)
+
+
+def load_artifacts(model_dir="models"):
+    model = joblib.load(os.path.join(model_dir, "best_model.pkl"))
+    preproc = joblib.load(os.path.join(model_dir, "preprocessor.pkl"))
+    features = joblib.load(os.path.join(model_dir, "feature_list.pkl"))
+    return model, preproc, features
+
+
+def snapshot_delta(old_state, new_state, features, dedup=None):
+    """
+    Yeni materyalize veride (görev, nesne kimliği, satır özeti) üçlüsü önceki veride olmayan etiketli satırlar:
+    eklenen nesneler ve disposition'ı/özellikleri değişenler.
+    dedup: eğitimdeki gibi görevler arası kopyalar atılır (bkz. deduplicate_missions).
+    (X_delta, y_delta, labeled, is_delta) döndürür; is_delta tüm etiketli satırlar (labeled) üzerinde bir maskedir.
+    """
+    labeled = new_state[new_state["label"] != LABEL_UNKNOWN].reset_index(drop=True)
+    if dedup is not None:
+        labeled, _, _ = deduplicate_missions(labeled, labeled["label"], labeled["mission"].astype(str),
+                                             labeled[COORD_COLUMNS].to_numpy(dtype=np.float64), mode=dedup)
+    # Materyalize veri temel özellikleri tutar; türetilmiş özellikler eğitimdeki gibi eklenir
+    labeled = add_derived_features(labeled, cache_dir=None)
+    if old_state is None:
+        is_delta = np.ones(len(labeled), dtype=bool)
+    else:
+        key = ["mission", "object_id", "row_hash"]
+        seen = pd.MultiIndex.from_frame(old_state[key].astype({"mission": str}))
+        is_delta = ~pd.MultiIndex.from_frame(labeled[key].astype({"mission": str})).isin(seen)
+    return labeled.loc[is_delta, features], labeled.loc[is_delta, "label"].astype(int), labeled, is_delta
+
+
+def warm_start_update(model, X_new, y_new, sample_weight=None, n_new_trees=N_NEW_TREES, max_trees=MAX_TREES,
+                      n_new_rounds=N_NEW_ROUNDS, max_rounds=MAX_ROUNDS):
+    """
+    Modelin bir kopyasını yeni satırlarla warm start ile büyüt (orijinal modele dokunulmaz).
+    X_new kaydedilmiş ön işleyiciden geçmiş olmalıdır; sample_weight ile delta satırları ağırlıklandırılır.
+    """
+    if len(np.unique(y_new)) < 2:
+        raise ValueError("Eğitim satırları tek sınıf içeriyor: warm start için iki sınıf da gerekli")
+
+    updated = copy.deepcopy(model)
+    if isinstance(updated, RandomForestClassifier):
+        n_old = len(updated.estimators_)
+        # Her güncelleme farklı bootstrap tohumları alsın (ağaç sayısı sınırda sabit kalsa bile)
+        update_count = getattr(model, "warm_start_updates_", 0) + 1
+        base_seed = updated.random_state if isinstance(updated.random_state, int) else 0
+        updated.set_params(warm_start=True, n_estimators=n_old + n_new_trees,
+                           random_state=base_seed + update_count)
+        updated.fit(X_new, y_new, sample_weight=sample_weight)
+        # estimators_ eklenme sırasında: sınırı aşan en eski ağaçlar atılır
+        retired = max(0, len(updated.estimators_) - max_trees)
+        updated.estimators_ = updated.estimators_[retired:]
+        updated.set_params(warm_start=False, n_estimators=len(updated.estimators_),
+                           random_state=model.random_state)
+        updated.warm_start_updates_ = update_count
+        return updated, {"added": n_new_trees, "retired": retired, "size": len(updated.estimators_)}
+
+    if isinstance(updated, HistGradientBoostingClassifier):
+        # Boosting turları toplamsaldır: eski turlar atılamaz, sınıra gelince tam yeniden eğitim gerekir
+        n_old = updated.n_iter_
+        if n_old + n_new_rounds > max_rounds:
+            raise ValueError(f"Boosting round cap reached ({n_old}/{max_rounds}) - run a full retrain")
+        updated.set_params(warm_start=True, max_iter=n_old + n_new_rounds)
+        updated.fit(X_new, y_new, sample_weight=sample_weight)
+        updated.set_params(warm_start=False)
+        return updated, {"added": updated.n_iter_ - n_old, "retired": 0, "size": updated.n_iter_}
+
+    if hasattr(updated, "get_booster"):
+        # XGBoost: mevcut booster'ın üzerine yeni turlar
+        n_old = model.get_booster().num_boosted_rounds()
+        if n_old + n_new_rounds > max_rounds:
+            raise ValueError(f"Boosting round cap reached ({n_old}/{max_rounds}) - run a full retrain")
+        updated.set_params(n_estimators=n_new_rounds)
+        updated.fit(X_new, y_new, sample_weight=sample_weight, xgb_model=model.get_booster())
+        size = updated.get_booster().num_boosted_rounds()
+        updated.set_params(n_estimators=size)
+        return updated, {"added": size - n_old, "retired": 0, "size": size}
+
+    raise ValueError(f"{type(model).__name__} does not support warm start - run a full retrain")
+
+
+def _holdout_auc(model, X_holdout, y_holdout):
+    if hasattr(model, "predict_proba"):
+        return roc_auc_score(y_holdout, model.predict_proba(X_holdout)[:, 1])
+    return roc_auc_score(y_holdout, model.decision_function(X_holdout))
+
+
+def retrain_incremental(X_new, y_new, X_holdout, y_holdout, is_delta=None, delta_weight=DELTA_WEIGHT,
+                        model_dir="models", tolerance=AUC_TOLERANCE, dry_run=False, **update_options):
+    """
+    best_model.pkl + preprocessor.pkl'yi yükle, warm start güncellemesi yap,
+    holdout'ta doğrula ve sadece ROC-AUC en fazla `tolerance` kadar düşüyorsa kaydet.
+    X_new: yeni ağaçların / turların eğitim satırları. is_delta (maske) verilirse bunlar tüm etiketli katalogdur
+    ve yeni/değişen satırlar delta_weight ağırlığı alır; verilmezse tüm satırlar delta sayılır.
+    Holdout satırları modelin (ilk eğitim ve önceki güncellemeler dahil) hiç görmediği satırlar olmalıdır.
+    Ön işleyici yeniden fit edilmez: eski ve yeni ağaçlar aynı ölçeklenmiş uzayda kalmalı.
+    """
+    is_delta = np.ones(len(X_new), dtype=bool) if is_delta is None else np.asarray(is_delta, dtype=bool)
+    sample_weight = np.where(is_delta, delta_weight, 1.0)
+    print(f"\n♻️ WARM-START RETRAIN: {int(is_delta.sum()):,} new/changed rows (weight {delta_weight:g}) "
+          f"in {len(X_new):,} training rows, {len(X_holdout):,} holdout rows")
+    model, preproc, features = load_artifacts(model_dir)
+    X_new_pp = preproc.transform(X_new[features])
+    X_holdout_pp = preproc.transform(X_holdout[features])
+
+    start = time.perf_counter()
+    updated, change = warm_start_update(model, X_new_pp, np.asarray(y_new), sample_weight=sample_weight,
+                                        **update_options)
+    fit_seconds = time.perf_counter() - start
+
+    baseline_auc = _holdout_auc(model, X_holdout_pp, y_holdout)
+    updated_auc = _holdout_auc(updated, X_holdout_pp, y_holdout)
+    accepted = updated_auc >= baseline_auc - tolerance
+    print(f"   {type(model).__name__}: +{change['added']} / -{change['retired']} -> {change['size']} "
+          f"({fit_seconds:.1f}s)")
+    print(f"   Holdout ROC-AUC: {baseline_auc:.4f} -> {updated_auc:.4f} "
+          f"({'accepted' if accepted else 'rejected'})")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model": type(model).__name__,
+        "delta_rows": int(is_delta.sum()),
+        "train_rows": int(len(X_new)),
+        "holdout_rows": int(len(X_holdout)),
+        "fit_seconds": fit_seconds,
+        "baseline_roc_auc": float(baseline_auc),
+        "updated_roc_auc": float(updated_auc),
+        "accepted": bool(accepted),
+        "saved": bool(accepted and not dry_run),
+        **change,
+    }
+
+    if accepted and not dry_run:
+        model_path = os.path.join(model_dir, "best_model.pkl")
+        tmp_path = f"{model_path}.{os.getpid()}.tmp"
+        joblib.dump(updated, tmp_path)
+        os.replace(tmp_path, model_path)
+        print(f"   ✅ Saved: {model_path}")
+        export_flat_model(updated, model_dir)
+        write_model_bundle(model_dir, last_warm_start={k: report[k] for k in
+                                                       ("timestamp", "delta_rows", "updated_roc_auc", "size")})
+    elif not accepted:
+        print("   ⚠️ Updated model kept out of production - previous best_model.pkl unchanged")
+
+    log_path = os.path.join(model_dir, RETRAIN_LOG_FILE)
+    log = []
+    if os.path.exists(log_path):
+        with open(log_path, 'r', encoding='utf-8') as f:
+            log = json.load(f)
+    log.append(report)
+    tmp_path = f"{log_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp_path, log_path)
+    return report
+
+
+if __name__ == "__main__":
+    # Eğitimde (best_model.pkl ile birlikte) yazılan snapshot'a göre yeni dökümü artımlı materyalize et,
+    # farkla modeli güncelle. Yeni snapshot sadece güncellenen model kaydedilirse yayınlanır.
+    if not os.path.exists(MATERIALIZED_STATE):
+        print(f"⚠️ No training snapshot ({MATERIALIZED_STATE}) - run the training pipeline first")
+    else:
+        old_state = pd.read_pickle(MATERIALIZED_STATE)
+        staged_state = stage_snapshot(koi_path, toi_path, k2_path)
+        new_state = pd.read_pickle(staged_state)
+
+        _, _, features = load_artifacts()
+        # Eğitimle aynı görevler arası kopya ayıklaması: holdout nesnelerinin kopyaları eğitim satırı olmasın
+        X_new, y_new, labeled, is_delta = snapshot_delta(old_state, new_state, features, dedup=DEDUP_MODE)
+        # Holdout: ilk eğitimin test ayrımı (modelin hiç görmediği satırlar); eğitim satırlarından çıkarılır ki
+        # güncellenen model de onları görmesin
+        holdout = load_holdout_set()
+        report = None
+        if len(X_new) == 0:
+            print("✅ No new or changed labeled rows - model is up to date")
+        elif holdout is None or not set(features) <= set(holdout.columns):
+            print("⚠️ No held-out split for this model (models/holdout_set.pkl) - run a full retrain")
+        elif holdout["label"].nunique() < 2:
+            print("⚠️ Held-out split has a single class - ROC-AUC undefined, run a full retrain")
+        else:
+            in_holdout = np.isin(row_fingerprints(labeled[features]), row_fingerprints(holdout[features]))
+            train = labeled.loc[~in_holdout]
+            if train["label"].nunique() < 2:
+                print("⚠️ Training rows have a single class - run a full retrain")
+            else:
+                report = retrain_incremental(train[features], train["label"].astype(int), holdout[features],
+                                             holdout["label"].astype(int), is_delta=np.asarray(is_delta)[~in_holdout])
+
+        if len(X_new) == 0 or (report is not None and report["saved"]):
+            commit_snapshot(staged_state)
+        else:
+            # Model değişmedi: delta satırları bir sonraki çalıştırmada yine yeni sayılır
+            os.remove(staged_state)